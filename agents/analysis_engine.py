@@ -0,0 +1,320 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# ⚙️ MoodMixr Agent: Analysis Engine
+# The one BPM / key / energy / mood implementation. The audio and mood
+# services wrap it, the app calls it in-process (hedges, fallbacks,
+# MOODMIXR_MODE=local) and the CLI agents print it — so every path agrees on
+# sample rates, chroma variant and result schema, and shares the decode cache.
+# Pool workers take either a path or PCM the caller already decoded, handed
+# over in shared memory instead of being pickled through the pool's pipe.
+# The acoustic fingerprint is taken from the same tempo-rate decode, so
+# duplicate lookup costs callers no decode of their own.
+
+import os
+import sys
+import json
+import threading
+import concurrent.futures
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agents.audio_decoder import AudioDecoder, PURPOSE_SR, RESAMPLE_QUALITY
+from agents.signature_agent import SignatureAgent
+from agents.streaming_feature_agent import StreamingFeatureAgent
+
+# --- Config ------------------------------------------------------------------
+SCHEMA_VERSION = 1
+KEY_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+FEATURES = ("tempo", "key", "energy")
+AUDIO_FEATURES = ("tempo", "key")  # what the audio service reports
+MOOD_FEATURES = ("tempo", "energy")  # what the mood service reports
+# Opt-in extra: the acoustic fingerprint (text, see SignatureAgent.to_text)
+FINGERPRINT = "fingerprint"
+ENERGETIC_BPM = 120
+ENERGETIC_RMS = 0.04
+# Peak RSS of one worker on a ~10 min track (decodes + librosa intermediates)
+ENGINE_WORKER_MB = int(os.getenv("MOODMIXR_ENGINE_WORKER_MB", "600"))
+
+
+def _available_mb():
+    """MemAvailable from /proc/meminfo (None where there is no procfs)."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _default_workers():
+    """One worker per core, fewer when RAM can't hold that many at peak."""
+    cores = os.cpu_count() or 1
+    mem_mb = _available_mb()
+    if mem_mb is None:
+        return cores
+    return max(1, min(cores, mem_mb // ENGINE_WORKER_MB))
+
+
+ENGINE_WORKERS = int(os.getenv("MOODMIXR_ENGINE_WORKERS") or _default_workers())
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _empty(path):
+    return {
+        "schema": SCHEMA_VERSION,
+        "filename": os.path.basename(path or ""),
+        "bpm": None,
+        "key": None,
+        "rms": None,
+        "energy": None,  # RMS x 100, the scale the mood agent always reported
+        "mood": None,
+        "duration_sec": None,
+        "streamed": False,
+    }
+
+
+def normalize_energy(value):
+    """
+    Any reported energy on the 0..1 scale the app and set roles use: values
+    above 1 are percent-like (the mood agent reports RMS x 100) and are
+    divided by 10, 100 or 1000 by magnitude. None for missing/non-positive.
+    """
+    try:
+        e = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not e > 0:
+        return None
+    if e <= 1:
+        return round(e, 3)
+    if e <= 10:
+        return round(e / 10.0, 3)
+    if e <= 100:
+        return round(e / 100.0, 3)
+    return round(min(e / 1000.0, 1.0), 3)
+
+
+def _mood(bpm, rms):
+    return "Energetic" if bpm > ENERGETIC_BPM and rms > ENERGETIC_RMS else "Calm"
+
+
+def _estimate(load, features):
+    """(tempo, rms, key, fingerprint) from decodes; load(purpose) -> (y, sr)."""
+    import librosa
+
+    tempo = rms = key = fp = None
+    if "tempo" in features:
+        y, sr = load("tempo")
+        beat_tempo, _ = librosa.beat.beat_track(
+            y=y, sr=sr, hop_length=AudioDecoder.hop_length(sr)
+        )
+        tempo = float(np.atleast_1d(beat_tempo)[0])
+    if "key" in features or "energy" in features:
+        y, sr = load("chroma")
+        if "key" in features:
+            chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+            key = KEY_NAMES[int(np.argmax(chroma.mean(axis=1)))]
+        if "energy" in features:
+            rms = float(np.mean(librosa.feature.rms(y=y)))
+    if FINGERPRINT in features:
+        y, sr = load(FINGERPRINT)  # the tempo decode: same rate
+        fp = SignatureAgent.fingerprint(y, sr)
+    return tempo, rms, key, fp
+
+
+def _finish(out, tempo, rms, key, fp, features):
+    if "tempo" in features:
+        out["bpm"] = round(tempo or 0.0)
+    if "key" in features:
+        out["key"] = key
+    if "energy" in features:
+        out["rms"] = round(float(rms or 0.0), 5)
+        out["energy"] = round(float(rms or 0.0) * 100, 2)
+    if out["bpm"] is not None and out["rms"] is not None:
+        out["mood"] = _mood(out["bpm"], out["rms"])
+    if FINGERPRINT in features and fp is not None and len(fp):
+        out[FINGERPRINT] = SignatureAgent.to_text(fp)
+    out["duration_sec"] = round(float(out["duration_sec"] or 0.0), 2)
+    return out
+
+
+def _analyze_shared(name, length, sr, features, filename):
+    """Pool-worker side of submit_pcm(): analyze PCM from a shared-memory block."""
+    # Pool workers share the submitting process's resource tracker, which
+    # unlinks the block when the submitter does: nothing to unregister here
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        y = np.ndarray((length,), dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+    return AnalysisEngine.analyze_pcm(y, sr, features, filename)
+
+
+class AnalysisEngine:
+    """Single-track analysis with a stable schema, in-process or in a process pool."""
+
+    @staticmethod
+    def analyze(path, features=FEATURES):
+        """
+        Analyze one file. Tempo runs on the 11 kHz decode, key (chroma_stft) and
+        RMS energy on the 22 kHz one; hour-long files are streamed block-wise
+        with the same estimators.
+
+        Args:
+            path (str): Audio file path.
+            features (tuple): Subset of FEATURES to compute; the rest stay None.
+                Add FINGERPRINT for a "fingerprint" field (not for streamed files).
+
+        Returns:
+            dict: {"schema", "filename", "bpm", "key", "rms", "energy", "mood",
+            "duration_sec", "streamed"[, "fingerprint"]} or {"error": str}
+        """
+        try:
+            out = _empty(path)
+            if StreamingFeatureAgent.should_stream(path):
+                lanes = tuple(
+                    lane
+                    for lane, wanted in (
+                        ("tempo", "tempo" in features),
+                        ("energy", "key" in features or "energy" in features),
+                    )
+                    if wanted
+                )
+                feats = StreamingFeatureAgent.extract(path, lanes)
+                out["streamed"] = True
+                out["duration_sec"] = feats["duration_sec"]
+                tempo, rms, key, fp = (
+                    feats.get("tempo"),
+                    feats.get("energy"),
+                    feats.get("key"),
+                    None,
+                )
+            else:
+                out["duration_sec"] = AudioDecoder.duration(path)
+                tempo, rms, key, fp = _estimate(
+                    lambda purpose: AudioDecoder.load_for(path, purpose), features
+                )
+            return _finish(out, tempo, rms, key, fp, features)
+        except Exception as e:
+            print(f"[AnalysisEngine] {path}: {e}")
+            return {"error": f"Librosa failed: {e}"}
+
+    @staticmethod
+    def analyze_pcm(y, sr, features=FEATURES, filename=None):
+        """
+        analyze() for samples that are already decoded (float32 mono at `sr`).
+        Lower analysis rates are derived with soxr, as AudioDecoder would.
+        """
+        import soxr
+
+        rates = {}
+
+        def _load(purpose):
+            target = min(PURPOSE_SR[purpose] or sr, sr)
+            if target not in rates:
+                rates[target] = (
+                    y
+                    if target == sr
+                    else soxr.resample(y, sr, target, quality=RESAMPLE_QUALITY).astype(
+                        np.float32, copy=False
+                    )
+                )
+            return rates[target], target
+
+        try:
+            out = _empty(filename)
+            out["duration_sec"] = len(y) / sr
+            return _finish(out, *_estimate(_load, features), features)
+        except Exception as e:
+            print(f"[AnalysisEngine] {filename or 'pcm'}: {e}")
+            return {"error": f"Librosa failed: {e}"}
+
+    @staticmethod
+    def audio_payload(result):
+        """The audio service's response shape (bpm, key, duration[, fingerprint])."""
+        if result.get("error"):
+            return result
+        out = {
+            k: result[k]
+            for k in ("schema", "filename", "bpm", "key", "duration_sec", "streamed")
+        }
+        if FINGERPRINT in result:
+            out[FINGERPRINT] = result[FINGERPRINT]
+        return out
+
+    @staticmethod
+    def mood_payload(result):
+        """The mood service's response shape (bpm, energy, mood)."""
+        if result.get("error"):
+            return result
+        return {
+            k: result[k]
+            for k in ("schema", "filename", "bpm", "rms", "energy", "mood", "streamed")
+        }
+
+    @staticmethod
+    def pool():
+        """Shared warm process pool for single-box deployments (created on first use)."""
+        global _pool
+        with _pool_lock:
+            if _pool is None:
+                from services.warmup import warm_up
+
+                _pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=ENGINE_WORKERS, initializer=warm_up
+                )
+            return _pool
+
+    @staticmethod
+    def submit(path, features=FEATURES):
+        """analyze() in the process pool; returns a Future."""
+        return AnalysisEngine.pool().submit(AnalysisEngine.analyze, path, features)
+
+    @staticmethod
+    def submit_pcm(y, sr, features=FEATURES, filename=None):
+        """
+        analyze_pcm() in the process pool; returns a Future. The samples are
+        copied once into shared memory, which is released when the future is done.
+        """
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, y.nbytes))
+        np.ndarray(y.shape, dtype=np.float32, buffer=shm.buf)[:] = y
+
+        def _release(_):
+            shm.close()
+            shm.unlink()
+
+        try:
+            fut = AnalysisEngine.pool().submit(
+                _analyze_shared, shm.name, len(y), sr, features, filename
+            )
+        except Exception:
+            _release(None)
+            raise
+        fut.add_done_callback(_release)
+        return fut
+
+    @staticmethod
+    def analyze_many(paths, features=FEATURES):
+        """analyze() every path in the pool; results in input order."""
+        futures = [AnalysisEngine.submit(p, features) for p in paths]
+        return [f.result() for f in futures]
+
+
+# 👇 CLI: `python -m agents.analysis_engine track.mp3 [more.flac ...]`
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m agents.analysis_engine <audio> [<audio> ...]")
+        sys.exit(2)
+    files = sys.argv[1:]
+    if len(files) == 1:
+        print(json.dumps(AnalysisEngine.analyze(files[0])))
+    else:
+        for path, result in zip(files, AnalysisEngine.analyze_many(files)):
+            print(json.dumps({"path": path, **result}))
@@ -8,38 +8,22 @@
 
 import sys
 import json
-import librosa
+
+from agents.analysis_engine import AnalysisEngine, AUDIO_FEATURES
 
 
 class AudioAnalyzerAgent:
     @staticmethod
     def analyze(path):
-        try:
-            y, sr = librosa.load(path)
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            tempo_val = (
-                float(tempo[0]) if hasattr(tempo, "__getitem__") else float(tempo)
-            )
-
-            chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-            key_index = chroma.mean(axis=1).argmax()
-
-            key_map = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-            musical_key = key_map[key_index % 12]
-
-            duration = librosa.get_duration(y=y, sr=sr)
-
-            result = {
-                "bpm": round(tempo_val),
-                "key": musical_key,
-                "duration_sec": round(duration, 2),
-                "track_path": path,
-            }
-
-            return result  # ✅ Used by Streamlit / FastAPI
-
-        except Exception as e:
-            return {"error": str(e)}
+        result = AnalysisEngine.analyze(path, AUDIO_FEATURES)
+        if result.get("error"):
+            return {"error": result["error"]}
+        return {
+            "bpm": result["bpm"],
+            "key": result["key"],
+            "duration_sec": result["duration_sec"],
+            "track_path": path,
+        }  # ✅ Used by Streamlit / FastAPI
 
 
 # 👇 For CLI use — works with n8n, bash, etc.
@@ -6,7 +6,7 @@
 
 from fastapi import FastAPI, UploadFile, File
 import uvicorn
-from agents.audio_agent import AudioAgent  # your existing agent logic
+from agents.audio_agent import AudioAnalyzerAgent  # your existing agent logic
 
 app = FastAPI()
 
@@ -17,7 +17,7 @@ async def analyze_audio(file: UploadFile = File(...)):
     with open("temp_input.flac", "wb") as f:
         f.write(contents)
 
-    result = AudioAgent.analyze("temp_input.flac")
+    result = AudioAnalyzerAgent.analyze("temp_input.flac")
     return result
 
 
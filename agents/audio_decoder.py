@@ -0,0 +1,169 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🎚️ MoodMixr Agent: Audio Decoder
+# One decode per track, shared by every agent. Each analysis asks for the
+# lowest sample rate it needs; lower rates are derived from a cached decode
+# with soxr instead of decoding (and resampling) the file again.
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Config ------------------------------------------------------------------
+# Target rate per analysis purpose (None = the file's native rate). Vocal and
+# mood thresholds were calibrated on native-rate features (ZCR, roll-off,
+# centroid), so those stay native.
+PURPOSE_SR = {
+    "tempo": 11025,  # onset envelopes only need content below ~5 kHz
+    "display": 11025,
+    "fingerprint": 11025,
+    "chroma": 22050,
+    "energy": 22050,
+    "spectral": 22050,
+    "vocal": None,
+    "native": None,
+}
+RESAMPLE_QUALITY = os.getenv("MOODMIXR_RESAMPLE_QUALITY", "MQ")  # soxr QQ/LQ/MQ/HQ/VHQ
+DECODE_CACHE_MAX_BYTES = int(os.getenv("MOODMIXR_DECODE_CACHE_MB", "512")) * 1024 * 1024
+# librosa's default hop (512 @ 22050 Hz ≈ 23 ms); hops are scaled to keep it
+REFERENCE_HOP = 512
+REFERENCE_SR = 22050
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # (path, size, mtime_ns, sr) -> float32 mono array
+_cache_bytes = 0
+_native_sr = {}  # (path, size, mtime_ns) -> native sample rate
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _decode_native(path):
+    """Decode straight to float32 mono at the file's own rate."""
+    import soundfile as sf
+
+    try:
+        y, sr = sf.read(path, dtype="float32", always_2d=True)
+        return np.ascontiguousarray(y.mean(axis=1), dtype=np.float32), sr
+    except RuntimeError:
+        # Containers libsndfile can't read (m4a/webm): librosa's audioread path
+        import librosa
+
+        y, sr = librosa.load(path, sr=None, mono=True, dtype=np.float32)
+        return y, sr
+
+
+def _resample(y, sr_in, sr_out):
+    import soxr
+
+    return soxr.resample(y, sr_in, sr_out, quality=RESAMPLE_QUALITY).astype(
+        np.float32, copy=False
+    )
+
+
+def _remember(key, y):
+    global _cache_bytes
+    y.flags.writeable = False  # shared between agents: nobody may mutate it
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+        _cache[key] = y
+        _cache_bytes += y.nbytes
+        while _cache_bytes > DECODE_CACHE_MAX_BYTES and len(_cache) > 1:
+            _, old = _cache.popitem(last=False)
+            _cache_bytes -= old.nbytes
+    return y
+
+
+def _lookup(fkey, sr):
+    """Cached decode at exactly sr, else the lowest cached rate above it."""
+    with _lock:
+        exact = _cache.get(fkey + (sr,))
+        if exact is not None:
+            _cache.move_to_end(fkey + (sr,))
+            return exact, sr
+        higher = sorted(k[3] for k in _cache if k[:3] == fkey and k[3] > sr)
+        if higher:
+            _cache.move_to_end(fkey + (higher[0],))
+            return _cache[fkey + (higher[0],)], higher[0]
+    return None, None
+
+
+class AudioDecoder:
+    """Sample-rate-negotiating, cached decode layer for all analysis agents."""
+
+    @staticmethod
+    def decode(path, sr=None, cache=True):
+        """
+        Float32 mono samples at `sr` (or native when None). Never upsamples:
+        a file recorded below `sr` comes back at its own rate.
+
+        Args:
+            path (str): Audio file path.
+            sr (int | None): Target sample rate.
+            cache (bool): Keep the decode for other agents (off for temp files).
+
+        Returns:
+            (np.ndarray, int): read-only samples and their sample rate.
+        """
+        fkey = _file_key(path)
+        native = _native_sr.get(fkey)
+        if native is not None:
+            target = native if sr is None else min(sr, native)
+            y, have = _lookup(fkey, target)
+            if y is not None:
+                if have == target:
+                    return y, target
+                y = _resample(y, have, target)
+                return (_remember(fkey + (target,), y) if cache else y), target
+
+        y, native = _decode_native(path)
+        target = native if sr is None else min(sr, native)
+        if cache:
+            _native_sr[fkey] = native
+            # Keep the native decode only when something asked for it; derived
+            # rates can always be rebuilt from the file.
+            if target == native:
+                return _remember(fkey + (native,), y), native
+        if target != native:
+            y = _resample(y, native, target)
+        return (_remember(fkey + (target,), y) if cache else y), target
+
+    @staticmethod
+    def load_for(path, purpose):
+        """decode() at the rate registered for an analysis purpose (see PURPOSE_SR)."""
+        return AudioDecoder.decode(path, PURPOSE_SR[purpose])
+
+    @staticmethod
+    def hop_length(sr):
+        """Hop that keeps librosa's default ~23 ms frame period at any rate."""
+        return max(64, int(round(REFERENCE_HOP * sr / REFERENCE_SR)))
+
+    @staticmethod
+    def duration(path):
+        """Duration in seconds from the file header when possible (no decode)."""
+        import soundfile as sf
+        from agents.probe_agent import ProbeAgent
+
+        seconds = ProbeAgent.duration(path)
+        if seconds is not None:
+            return seconds
+        try:
+            info = sf.info(path)
+            return info.frames / info.samplerate
+        except RuntimeError:
+            y, sr = AudioDecoder.decode(path)
+            return len(y) / sr
+
+    @staticmethod
+    def clear():
+        global _cache_bytes
+        with _lock:
+            _cache.clear()
+            _native_sr.clear()
+            _cache_bytes = 0
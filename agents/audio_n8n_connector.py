@@ -7,29 +7,15 @@
 import sys
 import json
 import requests
-import librosa
+
+from agents.audio_agent import AudioAnalyzerAgent
 
 
 def analyze_audio(path):
-    y, sr = librosa.load(path)
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-
-    # 🛠️ Fix: ensure tempo is a scalar (not array)
-    if hasattr(tempo, "item"):
-        tempo = tempo.item()
-
-    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-    key_index = chroma.mean(axis=1).argmax()
-    key_map = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-    key = key_map[key_index % 12]
-    duration = librosa.get_duration(y=y, sr=sr)
-
-    return {
-        "bpm": round(tempo),
-        "key": key,
-        "duration_sec": round(duration, 2),
-        "track_path": path,
-    }
+    result = AudioAnalyzerAgent.analyze(path)
+    if result.get("error"):
+        raise ValueError(result["error"])
+    return result
 
 
 if __name__ == "__main__":
@@ -2,129 +2,229 @@
 # 🌐 A fusion of AI + Human creativity, built with sacred precision.
 # 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
 
-import tempfile
-import requests
-import numpy as np
-import librosa
-import os
+import concurrent.futures
 
-from utils.utils import search_spotify_track, get_spotify_audio_features
+from utils.cache import TTLCache
+from utils.utils import search_spotify_track, get_spotify_audio_features_batch
 from agents.youtube_fallback_agent import YouTubeFallbackAgent
+from agents.preview_stream_agent import PreviewStreamAgent
+from agents.audio_decoder import AudioDecoder
+from agents.analysis_engine import AnalysisEngine
+from agents.spotify_api_agent import SpotifyApiError
+
+# --- Config ------------------------------------------------------------------
+FALLBACK_WORKERS = 4  # concurrent preview/YouTube downloads + librosa runs
+MIN_FALLBACK_SECONDS = 10  # shorter clips are too unreliable to analyze
+SEARCH_PAGE_MAX = 50  # Spotify's per-request search limit
+# Persistent cache TTLs (seconds) and the downloaded-audio size cap
+SEARCH_TTL_S = 24 * 3600
+FEATURES_TTL_S = 30 * 24 * 3600
+FALLBACK_TTL_S = 30 * 24 * 3600
+YOUTUBE_ANALYSIS_SECONDS = 90  # fallback analysis only needs the first minute or so
+
+
+_search_cache = TTLCache("discover_search", SEARCH_TTL_S)
+_features_cache = TTLCache("spotify_features", FEATURES_TTL_S)
+_fallback_cache = TTLCache("discover_fallback", FALLBACK_TTL_S)
+
+# Fields a fallback analysis contributes to an entry
+_FALLBACK_FIELDS = ("bpm", "key", "energy", "mood", "youtube_url")
+
+
+def _mood_from_energy(energy):
+    return "Energetic" if energy > 0.6 else "Chill" if energy < 0.3 else "Groovy"
 
 
 class DiscoverAgent:
     @staticmethod
-    def fetch_tracks(query, start=0, limit=5, use_youtube_fallback=True):
-        enriched = []
-        results = search_spotify_track(query)
-        sliced_results = results[start : start + limit]
-
-        for track in sliced_results:
-            bpm = 0
-            key = "Unknown"
-            energy = 0.0
-            danceability = 0.0
-            mood = "Chill"
-            use_fallback = False
-            file_path = None
-
-            # Try Spotify audio features first
-            features = get_spotify_audio_features(track["id"])
-            if features and features.get("tempo"):
-                try:
-                    bpm = round(features.get("tempo", 0))
-                    key = features.get("key", "Unknown")
-                    energy = round(features.get("energy", 0.0), 2)
-                    danceability = round(features.get("danceability", 0.0), 2)
-                    mood = (
-                        "Energetic"
-                        if energy > 0.6
-                        else "Chill"
-                        if energy < 0.3
-                        else "Groovy"
-                    )
-                except Exception as e:
-                    print(f"[Spotify Audio Feature Error] {e}")
-                    use_fallback = True
-            else:
-                use_fallback = True
-
-            # 🔁 Fallback logic (only if allowed)
-            if use_youtube_fallback and use_fallback:
-                if not track.get("preview_url"):
-                    print(f"[MoodMixr] Falling back to YouTube for: {track['name']}")
-                    file_path, yt_url = YouTubeFallbackAgent.download_audio(query)
-                else:
-                    print(
-                        f"[MoodMixr] Using Spotify preview for Librosa fallback: {track['name']}"
-                    )
-                    try:
-                        with tempfile.NamedTemporaryFile(
-                            delete=False, suffix=".mp3"
-                        ) as tmp:
-                            audio_data = requests.get(track["preview_url"]).content
-                            tmp.write(audio_data)
-                            file_path = tmp.name
-                    except Exception as e:
-                        print(f"[Fallback] Failed to fetch preview: {e}")
-                        file_path = None
-
-                # 📊 Analyze fallback audio with Librosa
-                if file_path:
-                    try:
-                        y, sr = librosa.load(file_path, sr=None)
-                        if len(y) < sr * 10:  # less than 10 seconds
-                            raise ValueError("Audio clip too short for analysis")
-
-                        bpm = round(librosa.beat.tempo(y, sr=sr)[0])
-                        energy = float(np.mean(librosa.feature.rms(y=y)))
-                        chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-                        key_index = np.argmax(np.mean(chroma, axis=1))
-                        key = [
-                            "C",
-                            "C#",
-                            "D",
-                            "D#",
-                            "E",
-                            "F",
-                            "F#",
-                            "G",
-                            "G#",
-                            "A",
-                            "A#",
-                            "B",
-                        ][key_index]
-                        mood = (
-                            "Energetic"
-                            if energy > 0.6
-                            else "Chill"
-                            if energy < 0.3
-                            else "Groovy"
-                        )
-                    except Exception as e:
-                        print(f"[Librosa Error] for {track['name']}: {e}")
+    def _base_entry(track):
+        return {
+            "name": track["name"],
+            "artist": track["artist"],
+            "album": track["album"],
+            "image": track["image"],
+            "preview_url": track.get("preview_url"),
+            "id": track["id"],
+            "bpm": 0,
+            "key": "Unknown",
+            "energy": 0.0,
+            "danceability": 0.0,
+            "mood": "Chill",
+            "source": "Fallback Analysis",
+            "youtube_url": None,
+        }
 
+    @staticmethod
+    def _apply_spotify_features(entry, features):
+        """Fill entry from Spotify audio features. Returns False if a fallback is needed."""
+        if not features or not features.get("tempo"):
+            return False
+        try:
+            entry["bpm"] = round(features.get("tempo", 0))
+            entry["key"] = features.get("key", "Unknown")
+            entry["energy"] = round(features.get("energy", 0.0), 2)
+            entry["danceability"] = round(features.get("danceability", 0.0), 2)
+            entry["mood"] = _mood_from_energy(entry["energy"])
+            entry["source"] = "Spotify Features"
+            return True
+        except Exception as e:
+            print(f"[Spotify Audio Feature Error] {e}")
+            return False
+
+    @staticmethod
+    def _analyze_audio(file_path):
+        """Librosa BPM/key/energy/mood on a downloaded clip."""
+        if AudioDecoder.duration(file_path) < MIN_FALLBACK_SECONDS:
+            raise ValueError("Audio clip too short for analysis")
+
+        result = AnalysisEngine.analyze(file_path)
+        if result.get("error"):
+            raise ValueError(result["error"])
+        return {
+            "bpm": result["bpm"],
+            "energy": result["rms"],
+            "key": result["key"],
+            "mood": _mood_from_energy(result["rms"]),
+        }
+
+    @staticmethod
+    def _fallback(query, track, entry):
+        """Download a preview (or YouTube audio) and analyze it. Runs in the pool."""
+        cached = _fallback_cache.get(track["id"])
+        if cached:
+            entry.update(cached)
+            return entry
+
+        if track.get("preview_url"):
+            # Previews are decoded from memory while they download — no files at all
             print(
-                f"🎯 Final: {track['name']} → BPM: {bpm}, Energy: {energy}, Mood: {mood}, Key: {key}"
+                f"[MoodMixr] Using Spotify preview for Librosa fallback: {track['name']}"
             )
-            enriched.append(
-                {
-                    "name": track["name"],
-                    "artist": track["artist"],
-                    "album": track["album"],
-                    "image": track["image"],
-                    "preview_url": track.get("preview_url"),
-                    "id": track["id"],
-                    "bpm": bpm,
-                    "key": key,
-                    "energy": energy,
-                    "danceability": danceability,
-                    "mood": mood,
-                    "source": "Spotify Features"
-                    if not use_fallback
-                    else "Fallback Analysis",
-                    "youtube_url": yt_url,
-                }
+            try:
+                result = PreviewStreamAgent.analyze(track["preview_url"])
+                result["mood"] = _mood_from_energy(result["energy"])
+                entry.update(result)
+                _fallback_cache.set(
+                    track["id"], {k: entry[k] for k in _FALLBACK_FIELDS}
+                )
+            except Exception as e:
+                print(f"[Fallback] Preview analysis failed for {track['name']}: {e}")
+            return entry
+
+        # YouTube audio is cached and de-duplicated by the download manager;
+        # the analysis only needs the opening of the native stream.
+        print(f"[MoodMixr] Falling back to YouTube for: {track['name']}")
+        file_path, entry["youtube_url"] = YouTubeFallbackAgent.download_audio(
+            query, max_seconds=YOUTUBE_ANALYSIS_SECONDS, transcode=False
+        )
+
+        # 📊 Analyze fallback audio with Librosa
+        if file_path:
+            try:
+                entry.update(DiscoverAgent._analyze_audio(file_path))
+                _fallback_cache.set(
+                    track["id"], {k: entry[k] for k in _FALLBACK_FIELDS}
+                )
+            except Exception as e:
+                print(f"[Librosa Error] for {track['name']}: {e}")
+        return entry
+
+    @staticmethod
+    def _search(query, start, limit):
+        """Search page cached by (query, start, limit)."""
+        key = f"{query.strip().lower()}|{start}|{limit}"
+        try:
+            return _search_cache.get_or_compute(
+                key,
+                lambda: search_spotify_track(
+                    query, limit=min(limit, SEARCH_PAGE_MAX), offset=start
+                )[:limit],
+            )
+        except SpotifyApiError as e:
+            # Not cached: the next search retries Spotify
+            print(f"[DiscoverAgent] Spotify search failed for {query!r}: {e}")
+            return []
+
+    @staticmethod
+    def _audio_features(track_ids):
+        """Per-ID cached audio features; only unseen IDs go to Spotify (one request)."""
+        out = {}
+        missing = []
+        for tid in track_ids:
+            cached = _features_cache.get(tid)
+            if cached is None:
+                missing.append(tid)
+            else:
+                out[tid] = cached or None  # {} marks "Spotify has no features"
+        if missing:
+            try:
+                fetched = get_spotify_audio_features_batch(missing)
+            except SpotifyApiError as e:
+                # Unknown, not "no features": leave uncached and use fallbacks
+                print(f"[DiscoverAgent] Spotify audio features failed: {e}")
+                out.update({tid: None for tid in missing})
+                return out
+            for tid in missing:
+                feats = fetched.get(tid)
+                _features_cache.set(tid, feats or {})
+                out[tid] = feats
+        return out
+
+    @staticmethod
+    def iter_tracks(query, start=0, limit=5, use_youtube_fallback=True):
+        """
+        Stream enriched tracks as soon as each one is ready.
+
+        One search request and one multi-ID audio-features request cover the
+        whole page, and both are cached persistently (search by query/page,
+        features and fallback results by track ID); tracks that need a librosa fallback are downloaded and
+        analyzed concurrently in a bounded pool.
+
+        Yields:
+            (int, dict): position within the requested page, enriched track.
+        """
+        # Page server-side so `start`/`limit` map straight onto Spotify's offset
+        sliced_results = DiscoverAgent._search(query, start, limit) or []
+        features_by_id = DiscoverAgent._audio_features(
+            [t["id"] for t in sliced_results]
+        )
+
+        pending = []
+        for pos, track in enumerate(sliced_results):
+            entry = DiscoverAgent._base_entry(track)
+            has_features = DiscoverAgent._apply_spotify_features(
+                entry, features_by_id.get(track["id"])
             )
+            if has_features or not use_youtube_fallback:
+                yield pos, entry
+            else:
+                pending.append((pos, track, entry))
 
-        return enriched
+        if not pending:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(FALLBACK_WORKERS, len(pending))
+        ) as ex:
+            futures = {
+                ex.submit(DiscoverAgent._fallback, query, track, entry): (pos, entry)
+                for pos, track, entry in pending
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                pos, entry = futures[fut]
+                try:
+                    entry = fut.result()
+                except Exception as e:
+                    print(f"[Fallback] {entry['name']}: {e}")
+                print(
+                    f"🎯 Final: {entry['name']} → BPM: {entry['bpm']}, Energy: {entry['energy']}, Mood: {entry['mood']}, Key: {entry['key']}"
+                )
+                yield pos, entry
+
+    @staticmethod
+    def fetch_tracks(query, start=0, limit=5, use_youtube_fallback=True):
+        """Enrich a page of search results; returned in Spotify's result order."""
+        enriched = dict(
+            DiscoverAgent.iter_tracks(query, start, limit, use_youtube_fallback)
+        )
+        return [enriched[pos] for pos in sorted(enriched)]
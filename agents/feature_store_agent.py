@@ -0,0 +1,239 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🗃️ MoodMixr Agent: Feature Store
+# Persists the raw intermediate features behind every decision layer so that
+# vocal thresholds, mood profiles and set-role cut-offs can be re-tuned and
+# re-applied to a whole library without decoding a single audio file.
+
+import os
+import sys
+import json
+
+import numpy as np
+
+from agents.mood_agent import MoodClassifierAgent, FEATURE_NAMES as MOOD_FEATURES
+from agents.vocal_detector_agent import (
+    VocalDetectorAgent,
+    FEATURE_NAMES as VOCAL_FEATURES,
+)
+from agents.set_optimizer_agent import SetOptimizerAgent
+from agents.probe_agent import ProbeAgent
+from agents.streaming_feature_agent import StreamingFeatureAgent, GROUP_LANES
+
+# --- Config ------------------------------------------------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FEATURE_CACHE_DIR = os.path.join(REPO_ROOT, "data", "feature_cache")
+# Bump when an extractor changes numerically; older records are re-extracted
+FEATURE_VERSION = 2
+
+# Per-track series (not scalars): beat grid in seconds + RMS energy every hop
+TIMELINE_FEATURES = ["beat_times", "energy_timeline"]
+TIMELINE_HOP_S = 0.5
+# Set roles cut energy on a 0..1 scale: stored RMS maps linearly onto it and
+# clips here (loud modern masters sit around 0.15-0.3), so louder always
+# ranks at least as energetic
+ROLE_RMS_FULL_SCALE = 0.3
+
+
+def extract_timeline(track_path):
+    """Beat grid and coarse energy curve from one 11 kHz decode."""
+    import librosa
+    from agents.audio_decoder import AudioDecoder
+
+    y, sr = AudioDecoder.load_for(track_path, "tempo")
+    _, beats = librosa.beat.beat_track(
+        y=y, sr=sr, hop_length=AudioDecoder.hop_length(sr), units="time"
+    )
+    hop = int(sr * TIMELINE_HOP_S)
+    rms = librosa.feature.rms(y=y, frame_length=2 * hop, hop_length=hop)[0]
+    return {
+        "beat_times": [round(float(t), 3) for t in beats],
+        "energy_timeline": [round(float(v), 4) for v in rms],
+    }
+
+
+FEATURE_GROUPS = {
+    "vocal": (VocalDetectorAgent.extract_features, VOCAL_FEATURES),
+    "mood": (MoodClassifierAgent.extract_features, MOOD_FEATURES),
+    "timeline": (extract_timeline, TIMELINE_FEATURES),
+}
+
+
+class FeatureStoreAgent:
+    """Per-track raw feature persistence + vectorized library-wide re-labelling."""
+
+    @staticmethod
+    def track_id(track_path):
+        """Audio-payload hash (same key as data/analysis_cache); tag edits keep it."""
+        return ProbeAgent.content_id(track_path)
+
+    @staticmethod
+    def _record_path(track_id):
+        return os.path.join(FEATURE_CACHE_DIR, f"{track_id}.json")
+
+    @staticmethod
+    def load(track_id):
+        """Return the stored record for a track id, or None."""
+        try:
+            with open(FeatureStoreAgent._record_path(track_id), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def save(record):
+        """Write a record atomically so a crashed extraction never leaves half a file."""
+        os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+        path = FeatureStoreAgent._record_path(record["track_id"])
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def extract(track_path, groups=("vocal", "mood"), force=False):
+        """
+        Compute (or reuse) the raw features for a track and persist them.
+
+        Args:
+            track_path (str): Audio file path.
+            groups (tuple): Feature groups to make sure are present ("vocal",
+                "mood", "timeline").
+            force (bool): Recompute even if the group is already stored.
+
+        Returns:
+            dict: {"track_id", "filename", "features": {...}}
+        """
+        tid = FeatureStoreAgent.track_id(track_path)
+        record = FeatureStoreAgent.load(tid)
+        if not record or record.get("version") != FEATURE_VERSION:
+            record = {
+                "track_id": tid,
+                "filename": os.path.basename(track_path),
+                "version": FEATURE_VERSION,
+                "features": {},
+            }
+        features = record["features"]
+
+        missing = [
+            g
+            for g in groups
+            if force or any(n not in features for n in FEATURE_GROUPS[g][1])
+        ]
+        streamable = [g for g in missing if g in GROUP_LANES]
+        if len(streamable) > 1 and StreamingFeatureAgent.should_stream(track_path):
+            # Long file: one bounded-memory pass serves every missing group
+            lanes = sorted({lane for g in streamable for lane in GROUP_LANES[g]})
+            streamed = StreamingFeatureAgent.extract(track_path, lanes=lanes)
+            for g in streamable:
+                features.update({n: streamed[n] for n in FEATURE_GROUPS[g][1]})
+            for group in missing:
+                if group not in streamable:
+                    features.update(FEATURE_GROUPS[group][0](track_path))
+        else:
+            for group in missing:
+                extractor, _ = FEATURE_GROUPS[group]
+                features.update(extractor(track_path))
+
+        if missing:
+            FeatureStoreAgent.save(record)
+        return record
+
+    @staticmethod
+    def load_library():
+        """Load every stored record (sorted by filename for stable output)."""
+        records = []
+        if not os.path.isdir(FEATURE_CACHE_DIR):
+            return records
+        for name in os.listdir(FEATURE_CACHE_DIR):
+            if not name.endswith(".json"):
+                continue
+            rec = FeatureStoreAgent.load(name[: -len(".json")])
+            if rec and rec.get("features"):
+                records.append(rec)
+        records.sort(key=lambda r: r.get("filename") or "")
+        return records
+
+    @staticmethod
+    def feature_matrix(records, names):
+        """(N, len(names)) float array; missing features become NaN."""
+        return np.array(
+            [[r["features"].get(n, np.nan) for n in names] for r in records],
+            dtype=np.float64,
+        ).reshape(-1, len(names))
+
+    @staticmethod
+    def relabel_library(records=None, mood_profiles=None, mood_weights=None):
+        """
+        Re-run vocal, mood and set-role decisions over the whole cached library
+        in one vectorized pass per layer. No audio is touched.
+
+        Returns:
+            list[dict]: one row per track with filename, mood, mood_confidence,
+            has_vocals, confidence_vocals and set_role ("Unknown" where the
+            required features were never extracted).
+        """
+        if records is None:
+            records = FeatureStoreAgent.load_library()
+        n = len(records)
+        if n == 0:
+            return []
+
+        mood_X = FeatureStoreAgent.feature_matrix(records, MOOD_FEATURES)
+        vocal_X = FeatureStoreAgent.feature_matrix(records, VOCAL_FEATURES)
+        has_mood = ~np.isnan(mood_X).any(axis=1)
+        has_vocal = ~np.isnan(vocal_X).any(axis=1)
+
+        moods = np.full(n, "Unknown", dtype=object)
+        mood_conf = np.zeros(n)
+        if has_mood.any():
+            res = MoodClassifierAgent.classify(
+                mood_X[has_mood], profiles=mood_profiles, weights=mood_weights
+            )
+            moods[has_mood] = res["labels"]
+            mood_conf[has_mood] = res["probabilities"].max(axis=1)
+
+        vocals = np.zeros(n, dtype=bool)
+        vocal_conf = np.zeros(n, dtype=int)
+        if has_vocal.any():
+            vocal_dicts = [dict(zip(VOCAL_FEATURES, row)) for row in vocal_X[has_vocal]]
+            v, c = VocalDetectorAgent.score_features(vocal_dicts)
+            vocals[has_vocal] = v
+            vocal_conf[has_vocal] = c
+
+        # Stored energy is raw RMS: monotonic clipped-linear 0..1 scale (NaN
+        # stays NaN and comes back "Unknown")
+        energy = np.clip(
+            mood_X[:, MOOD_FEATURES.index("energy")] / ROLE_RMS_FULL_SCALE, 0.0, 1.0
+        )
+        roles = SetOptimizerAgent.classify_roles(
+            mood_X[:, MOOD_FEATURES.index("tempo")], energy
+        )
+
+        return [
+            {
+                "track_id": r["track_id"],
+                "filename": r.get("filename"),
+                "mood": str(moods[i]),
+                "mood_confidence": round(float(mood_conf[i]), 3),
+                "has_vocals": bool(vocals[i]),
+                "confidence_vocals": int(vocal_conf[i]),
+                "set_role": str(roles[i]),
+            }
+            for i, r in enumerate(records)
+        ]
+
+
+# 👇 CLI: `python -m agents.feature_store_agent extract <files...>` or `... relabel`
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("extract", "relabel"):
+        print(
+            "usage: python -m agents.feature_store_agent extract <files...> | relabel"
+        )
+        sys.exit(2)
+    if sys.argv[1] == "extract":
+        for p in sys.argv[2:]:
+            print(json.dumps(FeatureStoreAgent.extract(p, tuple(FEATURE_GROUPS))))
+    else:
+        print(json.dumps(FeatureStoreAgent.relabel_library(), indent=2))
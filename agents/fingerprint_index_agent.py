@@ -0,0 +1,298 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🧩 MoodMixr Agent: Fingerprint Index
+# Every analyzed track's acoustic fingerprint, searchable. A new file that is
+# the same recording as a known track (MP3 vs FLAC, re-encode, "(1)" copy)
+# reuses that track's analysis instead of being analyzed again, and the whole
+# library can be grouped into duplicate clusters.
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+import concurrent.futures
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+from agents.signature_agent import SignatureAgent
+
+# --- Config ------------------------------------------------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FINGERPRINT_DB = os.getenv("MOODMIXR_FINGERPRINT_DB") or os.path.join(
+    REPO_ROOT, "data", "fingerprints", "fingerprints.sqlite3"
+)
+MATCH_SIMILARITY = float(os.getenv("MOODMIXR_FP_MATCH", "0.75"))  # 1 - bit error rate
+MATCH_DURATION_TOLERANCE_S = 2.0  # edits/extended mixes are not duplicates
+# Only sub-fingerprints whose hash falls in 1/INDEX_SAMPLE of the space are
+# indexed (content-defined, so the same ones are picked at any alignment)
+INDEX_SAMPLE = 8
+VOTE_CANDIDATES = 8
+DURATION_CANDIDATES = 32  # verified when too few exact sub-fingerprints survive
+INDEX_WORKERS = int(os.getenv("MOODMIXR_FP_WORKERS", "4"))
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".aiff", ".aif", ".ogg", ".m4a")
+SQL_VARS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    track_id TEXT PRIMARY KEY,
+    name     TEXT,
+    path     TEXT,
+    duration REAL NOT NULL,
+    fp       BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracks_duration ON tracks (duration);
+CREATE TABLE IF NOT EXISTS codes (
+    code     INTEGER NOT NULL,
+    track_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS codes_code ON codes (code);
+CREATE INDEX IF NOT EXISTS codes_track ON codes (track_id);
+"""
+
+_write_lock = threading.Lock()
+_schema_ready = False
+
+
+@contextmanager
+def _connect():
+    global _schema_ready
+    os.makedirs(os.path.dirname(FINGERPRINT_DB), exist_ok=True)
+    conn = sqlite3.connect(FINGERPRINT_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _index_codes(fp):
+    """Distinct sampled sub-fingerprints (silence/saturation codes dropped)."""
+    codes = np.unique(np.asarray(fp, dtype=np.uint32))
+    codes = codes[(codes != 0) & (codes != 0xFFFFFFFF)]
+    mixed = (codes.astype(np.uint64) * 0x9E3779B1) & 0xFFFFFFFF
+    return [int(c) for c in codes[(mixed >> 16) % INDEX_SAMPLE == 0]]
+
+
+class FingerprintIndexAgent:
+    """Acoustic fingerprint store: duplicate lookup and library clustering."""
+
+    @staticmethod
+    def fingerprint(path, cache=True):
+        """(fingerprint, duration_sec) of a file."""
+        from agents.audio_decoder import AudioDecoder
+
+        return SignatureAgent.fingerprint_file(path, cache=cache), float(
+            AudioDecoder.duration(path)
+        )
+
+    @staticmethod
+    def take(payload):
+        """
+        Pop the fingerprint an analysis payload carries (see AnalysisEngine's
+        FINGERPRINT feature) so it isn't cached with it. None if there is none.
+        """
+        text = payload.pop("fingerprint", None) if isinstance(payload, dict) else None
+        if not text:
+            return None
+        try:
+            return SignatureAgent.from_text(text)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def add(track_id, fp, duration, name=None, path=None):
+        """Index (or re-index) a track under its content id."""
+        codes = _index_codes(fp)
+        with _write_lock, _connect() as conn:
+            conn.execute("DELETE FROM codes WHERE track_id = ?", (track_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?)",
+                (track_id, name, path, duration, SignatureAgent.to_bytes(fp)),
+            )
+            conn.executemany(
+                "INSERT INTO codes VALUES (?, ?)", [(c, track_id) for c in codes]
+            )
+
+    @staticmethod
+    def matches(fp, duration, exclude=()):
+        """
+        Known tracks that are the same recording, best first.
+
+        Returns:
+            list[dict]: {"track_id", "name", "path", "duration", "similarity"}
+        """
+        if len(fp) == 0:
+            return []
+        exclude = set(exclude)
+        codes = _index_codes(fp)
+        votes = Counter()
+        with _connect() as conn:
+            for i in range(0, len(codes), SQL_VARS):
+                chunk = codes[i : i + SQL_VARS]
+                rows = conn.execute(
+                    "SELECT track_id, COUNT(*) AS n FROM codes WHERE code IN"
+                    f" ({','.join('?' * len(chunk))}) GROUP BY track_id",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    votes[row["track_id"]] += row["n"]
+            candidates = [t for t, _ in votes.most_common() if t not in exclude]
+            candidates = candidates[:VOTE_CANDIDATES]
+            if len(candidates) < VOTE_CANDIDATES:
+                # Heavy re-encodes keep few exact sub-fingerprints: also try
+                # tracks of the same length
+                rows = conn.execute(
+                    "SELECT track_id FROM tracks WHERE duration BETWEEN ? AND ?"
+                    " ORDER BY ABS(duration - ?) LIMIT ?",
+                    (
+                        duration - MATCH_DURATION_TOLERANCE_S,
+                        duration + MATCH_DURATION_TOLERANCE_S,
+                        duration,
+                        DURATION_CANDIDATES,
+                    ),
+                ).fetchall()
+                candidates += [
+                    r["track_id"]
+                    for r in rows
+                    if r["track_id"] not in exclude and r["track_id"] not in candidates
+                ]
+            out = []
+            for tid in candidates:
+                row = conn.execute(
+                    "SELECT * FROM tracks WHERE track_id = ?", (tid,)
+                ).fetchone()
+                if not row or abs(row["duration"] - duration) > (
+                    MATCH_DURATION_TOLERANCE_S
+                ):
+                    continue
+                sim = SignatureAgent.similarity(
+                    fp, SignatureAgent.from_bytes(row["fp"])
+                )
+                if sim >= MATCH_SIMILARITY:
+                    out.append(
+                        {
+                            "track_id": tid,
+                            "name": row["name"],
+                            "path": row["path"],
+                            "duration": row["duration"],
+                            "similarity": round(sim, 4),
+                        }
+                    )
+        out.sort(key=lambda m: -m["similarity"])
+        return out
+
+    @staticmethod
+    def match(fp, duration, exclude=()):
+        """Best matches() entry, or None."""
+        found = FingerprintIndexAgent.matches(fp, duration, exclude)
+        return found[0] if found else None
+
+    @staticmethod
+    def reuse(analysis, filename, duration):
+        """
+        Copy a matched track's cached {"audio", "mood", "merged"} for another
+        file of the same recording: per-file fields (filename, duration_sec)
+        are taken from that file, not the match.
+        """
+        out = {}
+        for part in ("audio", "mood", "merged"):
+            payload = analysis.get(part)
+            if isinstance(payload, dict):
+                payload = dict(payload)
+                for field, value in (
+                    ("filename", filename),
+                    ("duration_sec", round(float(duration), 2)),
+                ):
+                    if field in payload or part == "merged":
+                        payload[field] = value
+            out[part] = payload
+        return out
+
+    @staticmethod
+    def clusters():
+        """
+        Groups of indexed tracks that are the same recording (2+ members).
+
+        Returns:
+            list[list[dict]]: largest first; members are {"track_id", "name", "path", "duration"}
+        """
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT track_id, name, path, duration, fp FROM tracks"
+            ).fetchall()
+        parent = {r["track_id"]: r["track_id"] for r in rows}
+
+        def _root(t):
+            while parent[t] != t:
+                parent[t] = parent[parent[t]]
+                t = parent[t]
+            return t
+
+        for r in rows:
+            fp = SignatureAgent.from_bytes(r["fp"])
+            for m in FingerprintIndexAgent.matches(
+                fp, r["duration"], exclude=(r["track_id"],)
+            ):
+                if m["track_id"] in parent:
+                    parent[_root(m["track_id"])] = _root(r["track_id"])
+
+        groups = {}
+        for r in rows:
+            groups.setdefault(_root(r["track_id"]), []).append(
+                {k: r[k] for k in ("track_id", "name", "path", "duration")}
+            )
+        return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: -len(g))
+
+    @staticmethod
+    def index_folder(root, max_workers=INDEX_WORKERS):
+        """Fingerprint every audio file under `root` (already indexed ids are skipped)."""
+        from agents.probe_agent import ProbeAgent
+
+        paths = []
+        for dirpath, _, filenames in os.walk(root):
+            paths += [
+                os.path.join(dirpath, f)
+                for f in sorted(filenames)
+                if f.lower().endswith(AUDIO_EXTENSIONS)
+            ]
+        with _connect() as conn:
+            known = {r[0] for r in conn.execute("SELECT track_id FROM tracks")}
+
+        def _index(path):
+            try:
+                tid = ProbeAgent.content_id(path)
+                if tid in known:
+                    return False
+                fp, duration = FingerprintIndexAgent.fingerprint(path, cache=False)
+                FingerprintIndexAgent.add(
+                    tid, fp, duration, name=os.path.basename(path), path=path
+                )
+                return True
+            except Exception as e:
+                print(f"[FingerprintIndexAgent] Skipped {path}: {e}")
+                return False
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+            added = sum(ex.map(_index, paths))
+        print(f"[FingerprintIndexAgent] Indexed {added} of {len(paths)} files")
+        return {"files": len(paths), "indexed": added}
+
+
+# 👇 CLI: `python -m agents.fingerprint_index_agent index <folder>` or `... clusters`
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("index", "clusters"):
+        print("usage: python -m agents.fingerprint_index_agent index <folder>|clusters")
+        sys.exit(2)
+    if sys.argv[1] == "index":
+        print(json.dumps(FingerprintIndexAgent.index_folder(sys.argv[2])))
+    else:
+        print(json.dumps(FingerprintIndexAgent.clusters(), indent=2))
@@ -0,0 +1,267 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 📚 MoodMixr Agent: Library Export
+# Folds every per-track JSON (analysis cache, feature store, exports, debug
+# dumps) into one columnar Arrow file. Loading memory-maps it, so a 50k-track
+# library is available as NumPy/pandas columns without parsing any JSON.
+
+import os
+import sys
+import json
+import glob
+
+import numpy as np
+
+from agents.feature_store_agent import (
+    FEATURE_CACHE_DIR,
+    MOOD_FEATURES,
+    VOCAL_FEATURES,
+    TIMELINE_FEATURES,
+)
+
+# --- Config ------------------------------------------------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ANALYSIS_CACHE_DIR = os.path.join(REPO_ROOT, "data", "analysis_cache")
+EXPORTS_DIR = os.path.join(REPO_ROOT, "data", "exports")
+# Arrow IPC, uncompressed: the only layout numeric columns can be mmapped from
+LIBRARY_EXPORT_PATH = os.path.join(EXPORTS_DIR, "library.arrow")
+
+STRING_COLUMNS = ["track_id", "filename", "name", "artist", "key", "mood"]
+SCALAR_COLUMNS = ["bpm", "energy", "duration_sec"]  # energy: merged 0..1 scale
+# Raw feature-store values whose names clash with a merged column keep their
+# own column (mood "energy" is librosa RMS, ~0.01-0.08)
+RAW_FEATURE_COLUMNS = {"energy": "rms_energy"}
+FEATURE_COLUMNS = [
+    RAW_FEATURE_COLUMNS.get(n, n) for n in dict.fromkeys(MOOD_FEATURES + VOCAL_FEATURES)
+]
+LIST_COLUMNS = TIMELINE_FEATURES  # list<float32> per track
+TEXT_LIST_COLUMNS = ["transitions"]  # list<string> per track
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _fill(row, values):
+    """Set fields the row doesn't have yet (earlier sources win)."""
+    for k, v in values.items():
+        if v is not None and row.get(k) in (None, "", "Unknown", "?"):
+            row[k] = v
+
+
+class LibraryExportAgent:
+    """Library-wide columnar export + memory-mapped loading."""
+
+    @staticmethod
+    def collect_rows():
+        """
+        One dict per track, merged from every on-disk source.
+
+        Feature store and analysis cache share the file-hash track id; export
+        and debug JSONs only know the filename, so they join on it (or become
+        rows of their own when no hashed record has that filename).
+        """
+        rows = {}
+
+        if os.path.isdir(FEATURE_CACHE_DIR):
+            for path in glob.glob(os.path.join(FEATURE_CACHE_DIR, "*.json")):
+                rec = _read_json(path)
+                if not rec or not rec.get("track_id"):
+                    continue
+                row = rows.setdefault(rec["track_id"], {"track_id": rec["track_id"]})
+                row["filename"] = rec.get("filename")
+                row.update(
+                    {
+                        RAW_FEATURE_COLUMNS.get(k, k): v
+                        for k, v in (rec.get("features") or {}).items()
+                    }
+                )
+
+        for path in glob.glob(os.path.join(ANALYSIS_CACHE_DIR, "*.json")):
+            cached = _read_json(path)
+            if not cached:
+                continue
+            tid = os.path.splitext(os.path.basename(path))[0]
+            merged = cached.get("merged") or {}
+            row = rows.setdefault(tid, {"track_id": tid})
+            _fill(
+                row,
+                {
+                    "bpm": merged.get("bpm"),
+                    "key": merged.get("key"),
+                    "energy": merged.get("energy"),
+                    "mood": merged.get("mood"),
+                    "duration_sec": merged.get("duration_sec"),
+                },
+            )
+
+        by_filename = {r["filename"]: r for r in rows.values() if r.get("filename")}
+        unmatched = {}
+
+        def _row_for(filename):
+            if filename in by_filename:
+                return by_filename[filename]
+            return unmatched.setdefault(filename, {"filename": filename})
+
+        for path in glob.glob(os.path.join(EXPORTS_DIR, "*_analysis.json")):
+            meta = _read_json(path)
+            if not meta or not meta.get("filename"):
+                continue
+            _fill(
+                _row_for(meta["filename"]),
+                {
+                    "bpm": meta.get("BPM"),
+                    "key": meta.get("Key"),
+                    "mood": meta.get("Mood"),
+                    "energy": meta.get("Energy"),
+                    "transitions": meta.get("TransitionSuggestions"),
+                },
+            )
+
+        for path in glob.glob(os.path.join(EXPORTS_DIR, "debug", "*.json")):
+            dbg = _read_json(path)
+            if not dbg or not dbg.get("filename"):
+                continue
+            info = dbg.get("track_info") or {}
+            _fill(
+                _row_for(dbg["filename"]),
+                {k: info.get(k) for k in ("name", "artist", "bpm", "key", "mood")},
+            )
+
+        out = list(rows.values()) + list(unmatched.values())
+        out.sort(key=lambda r: (r.get("filename") or "", r.get("track_id") or ""))
+        return out
+
+    @staticmethod
+    def build_table(rows):
+        """pyarrow Table; numbers are float32 with NaN (not null) for zero-copy reads."""
+        import pyarrow as pa
+
+        columns = {}
+        for name in STRING_COLUMNS:
+            columns[name] = pa.array(
+                [None if r.get(name) is None else str(r[name]) for r in rows],
+                type=pa.string(),
+            )
+        for name in SCALAR_COLUMNS + FEATURE_COLUMNS:
+            columns[name] = pa.array(
+                np.array([_num(r.get(name)) for r in rows], dtype=np.float32)
+            )
+        for name in LIST_COLUMNS:
+            columns[name] = pa.array(
+                [
+                    np.asarray(r[name], dtype=np.float32) if r.get(name) else []
+                    for r in rows
+                ],
+                type=pa.list_(pa.float32()),
+            )
+        for name in TEXT_LIST_COLUMNS:
+            columns[name] = pa.array(
+                [[str(s) for s in r.get(name) or []] for r in rows],
+                type=pa.list_(pa.string()),
+            )
+        return pa.table(columns)
+
+    @staticmethod
+    def export(path=LIBRARY_EXPORT_PATH):
+        """
+        Write the whole library to `path` (.arrow/.feather → Arrow IPC,
+        .parquet → Parquet for interchange). Atomic: readers never see a
+        half-written file.
+
+        Returns:
+            dict: {"path", "tracks", "bytes"}
+        """
+        import pyarrow as pa
+
+        table = LibraryExportAgent.build_table(LibraryExportAgent.collect_rows())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            with pa.OSFile(tmp, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        print(f"[LibraryExportAgent] Exported {table.num_rows} tracks to {path}")
+        return {"path": path, "tracks": table.num_rows, "bytes": size}
+
+    @staticmethod
+    def load(path=LIBRARY_EXPORT_PATH, columns=None):
+        """
+        Open an export as a pyarrow Table. Arrow files are memory-mapped: only
+        the pages of the columns actually touched are read.
+        """
+        import pyarrow as pa
+
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            return pq.read_table(path, columns=columns, memory_map=True)
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return table.select(columns) if columns else table
+
+    @staticmethod
+    def to_numpy(table, columns=None):
+        """{name: ndarray}; numeric columns are zero-copy views of the mapped file."""
+        out = {}
+        for name in columns or table.column_names:
+            col = table.column(name)
+            if name in LIST_COLUMNS + TEXT_LIST_COLUMNS:
+                out[name] = col.to_pylist()
+            elif name in STRING_COLUMNS:
+                out[name] = col.to_numpy(zero_copy_only=False)
+            else:
+                out[name] = col.combine_chunks().to_numpy(zero_copy_only=True)
+        return out
+
+    @staticmethod
+    def to_pandas(table, columns=None):
+        return (table.select(columns) if columns else table).to_pandas()
+
+    @staticmethod
+    def feature_matrix(table, names=FEATURE_COLUMNS):
+        """(N, len(names)) float64, same layout as FeatureStoreAgent.feature_matrix."""
+        return np.column_stack(
+            [table.column(n).combine_chunks().to_numpy() for n in names]
+        ).astype(np.float64)
+
+    @staticmethod
+    def list_column(table, name):
+        """
+        Flat (values, offsets) arrays of a list column without building Python
+        lists: track i's series is values[offsets[i]:offsets[i + 1]].
+        """
+        col = table.column(name).combine_chunks()
+        offsets = col.offsets.to_numpy()
+        return col.flatten().to_numpy(), offsets - offsets[0]
+
+
+# 👇 CLI: `python -m agents.library_export_agent export [path]` or `... info [path]`
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "info"):
+        print("usage: python -m agents.library_export_agent export|info [path]")
+        sys.exit(2)
+    target = sys.argv[2] if len(sys.argv) > 2 else LIBRARY_EXPORT_PATH
+    if sys.argv[1] == "export":
+        print(json.dumps(LibraryExportAgent.export(target)))
+    else:
+        t = LibraryExportAgent.load(target)
+        print(f"{t.num_rows} tracks, {t.num_columns} columns")
+        print(t.schema)
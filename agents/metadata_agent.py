@@ -0,0 +1,270 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🏷️ MoodMixr Agent: Metadata
+# Tags and album art, read once per file version and served from a cache.
+# Lookups are by (path, size, mtime) — a stat, no file open — with the content
+# hash as fallback so a re-written upload doesn't trigger a re-parse. Art is
+# stored as small pre-scaled thumbnails, shared by every track of an album.
+
+import os
+import io
+import json
+import sqlite3
+import hashlib
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+
+# --- Config ------------------------------------------------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+METADATA_CACHE_DIR = os.getenv("MOODMIXR_METADATA_CACHE") or os.path.join(
+    REPO_ROOT, "data", "metadata_cache"
+)
+DB_PATH = os.path.join(METADATA_CACHE_DIR, "metadata.sqlite3")
+THUMB_DIR = os.path.join(METADATA_CACHE_DIR, "thumbs")
+THUMB_SIZES = (96, 256)  # px, longest side
+THUMB_QUALITY = 85
+METADATA_WORKERS = int(os.getenv("MOODMIXR_METADATA_WORKERS", "8"))
+TAG_FIELDS = ("artist", "title", "album", "genre", "date")
+HASH_CHUNK_BYTES = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1     TEXT NOT NULL,
+    meta     TEXT NOT NULL,
+    art_sha1 TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_sha1 ON tracks (sha1);
+"""
+
+_memo_lock = threading.Lock()
+_thumb_lock = threading.Lock()
+_memo = {}  # (path, size, mtime_ns) -> meta
+_schema_ready = False
+
+
+@contextmanager
+def _connect():
+    global _schema_ready
+    os.makedirs(METADATA_CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _sha1_file(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _thumb_ext():
+    from PIL import features
+
+    return "webp" if features.check("webp") else "jpg"
+
+
+def _thumb_path(art_sha1, size):
+    return os.path.join(THUMB_DIR, f"{art_sha1}_{size}.{_thumb_ext()}")
+
+
+def _embedded_art(path):
+    """Raw bytes of the first embedded picture (FLAC/Ogg, ID3 APIC, MP4 covr)."""
+    from mutagen import File as MutagenFile
+
+    audio = MutagenFile(path)
+    if audio is None:
+        return None
+    pictures = getattr(audio, "pictures", None)
+    if pictures:
+        return pictures[0].data
+    tags = audio.tags or {}
+    for key in tags.keys():
+        if key.startswith("APIC"):
+            return tags[key].data
+    covers = tags.get("covr") if hasattr(tags, "get") else None
+    if covers:
+        return bytes(covers[0])
+    return None
+
+
+def _store_thumbnails(art):
+    """Write every thumbnail size for an image once; returns its hash."""
+    from PIL import Image
+
+    art_sha1 = hashlib.sha1(art).hexdigest()
+    # Tracks of one album share the art: only one thread renders it
+    with _thumb_lock:
+        if all(os.path.exists(_thumb_path(art_sha1, s)) for s in THUMB_SIZES):
+            return art_sha1
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        img = Image.open(io.BytesIO(art))
+        img.draft(
+            "RGB", (max(THUMB_SIZES), max(THUMB_SIZES))
+        )  # JPEG: decode downscaled
+        img = img.convert("RGB")
+        for size in sorted(THUMB_SIZES, reverse=True):
+            img.thumbnail((size, size))
+            target = _thumb_path(art_sha1, size)
+            fmt = "WEBP" if target.endswith(".webp") else "JPEG"
+            tmp = f"{target}.{os.getpid()}.tmp"  # other processes may race us
+            img.save(tmp, format=fmt, quality=THUMB_QUALITY)
+            os.replace(tmp, target)
+    return art_sha1
+
+
+def _parse(path):
+    """Open the file with mutagen: tag fields plus the art thumbnails."""
+    from mutagen import File as MutagenFile
+
+    meta = {field: "Unknown" for field in TAG_FIELDS}
+    art_sha1 = None
+    try:
+        tags = MutagenFile(path, easy=True)
+        if tags is not None:
+            for field in TAG_FIELDS:
+                meta[field] = (tags.get(field) or ["Unknown"])[0]
+    except Exception as e:
+        print(f"[MetadataAgent] Tag error for {path}: {e}")
+    try:
+        art = _embedded_art(path)
+        if art:
+            art_sha1 = _store_thumbnails(art)
+    except Exception as e:
+        print(f"[MetadataAgent] Album art error for {path}: {e}")
+    meta["has_art"] = art_sha1 is not None
+    return meta, art_sha1
+
+
+def _remember(key, meta):
+    with _memo_lock:
+        _memo[key] = meta
+    return meta
+
+
+class MetadataAgent:
+    """Cached, parallel tag + album art reader."""
+
+    @staticmethod
+    def read_many(paths, max_workers=METADATA_WORKERS):
+        """
+        Metadata for many files: cache hits cost a stat; misses are parsed in
+        parallel and written to the cache in one transaction.
+
+        Returns:
+            dict: path -> {"artist", "title", "album", "genre", "date", "has_art", "art_sha1"}
+        """
+        out, keys, misses = {}, {}, []
+        for path in dict.fromkeys(paths):
+            try:
+                keys[path] = _stat_key(path)
+            except OSError:
+                out[path] = {field: "Unknown" for field in TAG_FIELDS}
+                out[path].update(has_art=False, art_sha1=None)
+                continue
+            with _memo_lock:
+                hit = _memo.get(keys[path])
+            if hit is not None:
+                out[path] = hit
+            else:
+                misses.append(path)
+        if not misses:
+            return out
+
+        with _connect() as conn:
+            # 1) same path, same size + mtime
+            still_missing = []
+            for path in misses:
+                abspath, size, mtime_ns = keys[path]
+                row = conn.execute(
+                    "SELECT meta, art_sha1 FROM tracks WHERE path = ? AND size = ?"
+                    " AND mtime_ns = ?",
+                    (abspath, size, mtime_ns),
+                ).fetchone()
+                if row:
+                    meta = {**json.loads(row["meta"]), "art_sha1": row["art_sha1"]}
+                    out[path] = _remember(keys[path], meta)
+                else:
+                    still_missing.append(path)
+
+        def _resolve(path):
+            # 2) same bytes seen before (re-written upload, moved file)
+            sha1 = _sha1_file(path)
+            with _connect() as conn:
+                row = conn.execute(
+                    "SELECT meta, art_sha1 FROM tracks WHERE sha1 = ? LIMIT 1", (sha1,)
+                ).fetchone()
+            if row:
+                return sha1, json.loads(row["meta"]), row["art_sha1"]
+            # 3) parse the file
+            meta, art_sha1 = _parse(path)
+            return sha1, meta, art_sha1
+
+        if still_missing:
+            workers = max(1, min(max_workers, len(still_missing)))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+                resolved = list(ex.map(_resolve, still_missing))
+            with _connect() as conn:
+                for path, (sha1, meta, art_sha1) in zip(still_missing, resolved):
+                    abspath, size, mtime_ns = keys[path]
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?)",
+                        (abspath, size, mtime_ns, sha1, json.dumps(meta), art_sha1),
+                    )
+                    out[path] = _remember(keys[path], {**meta, "art_sha1": art_sha1})
+        return out
+
+    @staticmethod
+    def read(path):
+        """Metadata for one file (see read_many)."""
+        return MetadataAgent.read_many([path])[path]
+
+    @staticmethod
+    def thumbnail_path(path, size=THUMB_SIZES[-1]):
+        """Path of the cached album-art thumbnail (nearest stored size), or None."""
+        art_sha1 = MetadataAgent.read(path).get("art_sha1")
+        if not art_sha1:
+            return None
+        size = min(THUMB_SIZES, key=lambda s: (s < size, abs(s - size)))
+        thumb = _thumb_path(art_sha1, size)
+        if not os.path.exists(thumb):
+            # Thumbnail store was cleared: rebuild it from the file
+            _, art_sha1 = _parse(path)
+            thumb = _thumb_path(art_sha1, size) if art_sha1 else None
+        return thumb
+
+    @staticmethod
+    def album_art(path, size=THUMB_SIZES[-1]):
+        """Album art as a small PIL image decoded from the thumbnail store, or None."""
+        from PIL import Image
+
+        thumb = MetadataAgent.thumbnail_path(path, size)
+        if not thumb:
+            return None
+        with Image.open(thumb) as img:
+            img.load()
+            return img
+
+    @staticmethod
+    def clear():
+        with _memo_lock:
+            _memo.clear()
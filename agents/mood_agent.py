@@ -1,10 +1,32 @@
 # 🎧 MoodMixr Agent: Mood Analyzer
 # 🕉️ Guided by Saraswati – goddess of clarity, sound, and wisdom.
 
-import librosa
 import numpy as np
 from utils.constants import MOODMIXR_SIGNATURE
 
+# --- Config: mood profiles ---------------------------------------------------
+# One row per mood, one column per feature (same order as FEATURE_NAMES).
+# Tuning a profile only needs a re-run of classify(), never an audio decode.
+
+FEATURE_NAMES = ("tempo", "energy", "perc_ratio", "spectral_centroid")
+
+MOOD_PROFILES = {
+    "Energetic": (130, 0.06, 1.1, 3500),
+    "Aggressive": (128, 0.08, 1.4, 4000),
+    "Uplifting": (120, 0.05, 0.9, 3000),
+    "Romantic": (110, 0.045, 0.7, 2500),
+    "Chill": (105, 0.03, 0.5, 2000),
+    "Melancholy": (90, 0.02, 0.3, 1800),
+    "Calm": (80, 0.015, 0.2, 1600),
+    "Dark": (60, 0.01, 0.1, 1200),
+}
+
+# Per-feature penalty for distance from a profile (higher = stricter match)
+FEATURE_WEIGHTS = (0.25, 150, 10, 0.01)
+
+# Softmax temperature used to turn similarity scores into probabilities
+SCORE_TEMPERATURE = 1.0
+
 
 class MoodClassifierAgent:
     VALID_MOODS = [
@@ -18,91 +40,113 @@ class MoodClassifierAgent:
         "Calm",
     ]
 
+    MOOD_LABELS = list(MOOD_PROFILES.keys())
+    PROFILE_MATRIX = np.array(list(MOOD_PROFILES.values()), dtype=np.float64)
+    FEATURE_WEIGHTS = np.array(FEATURE_WEIGHTS, dtype=np.float64)
+
+    @staticmethod
+    def extract_features(track_path):
+        """Decode a track and return the raw feature dict used for mood scoring."""
+        import librosa  # only feature extraction needs it; scoring is numpy-only
+        from agents.audio_decoder import AudioDecoder
+        from agents.streaming_feature_agent import StreamingFeatureAgent, GROUP_LANES
+
+        if StreamingFeatureAgent.should_stream(track_path):
+            feats = StreamingFeatureAgent.extract(track_path, GROUP_LANES["mood"])
+            return {name: feats[name] for name in FEATURE_NAMES}
+
+        # Centroid is calibrated on the native rate; tempo and the HPSS energy
+        # ratio are computed on cheaper low-rate decodes of the same file.
+        y, sr = AudioDecoder.load_for(track_path, "native")
+        spectral_centroid = float(
+            np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
+        )
+
+        y_t, sr_t = AudioDecoder.load_for(track_path, "tempo")
+        tempo = float(
+            librosa.feature.tempo(
+                y=y_t, sr=sr_t, hop_length=AudioDecoder.hop_length(sr_t)
+            )[0]
+        )
+
+        y_e, _ = AudioDecoder.load_for(track_path, "energy")
+        energy = float(np.mean(librosa.feature.rms(y=y_e)))
+        harmonic, percussive = librosa.effects.hpss(y_e)
+        perc_energy = float(np.mean(librosa.feature.rms(y=percussive).flatten()))
+        harm_energy = float(np.mean(librosa.feature.rms(y=harmonic).flatten()))
+        perc_ratio = perc_energy / (harm_energy + 1e-6)
+
+        return {
+            "tempo": tempo,
+            "energy": energy,
+            "perc_ratio": perc_ratio,
+            "spectral_centroid": spectral_centroid,
+        }
+
+    @staticmethod
+    def features_to_matrix(features):
+        """Stack one or many feature dicts into an (N, len(FEATURE_NAMES)) array."""
+        if isinstance(features, dict):
+            features = [features]
+        return np.array(
+            [[float(f[name]) for name in FEATURE_NAMES] for f in features],
+            dtype=np.float64,
+        ).reshape(-1, len(FEATURE_NAMES))
+
+    @staticmethod
+    def classify(feature_matrix, profiles=None, weights=None):
+        """
+        Score N tracks against every mood profile in one vectorized pass.
+
+        Args:
+            feature_matrix: (N, F) array in FEATURE_NAMES order, or a list of feature dicts.
+            profiles: optional {mood: (tempo, energy, perc_ratio, centroid)} override.
+            weights: optional per-feature weights override.
+
+        Returns:
+            dict with "labels" (N,), "scores" (N, M), "probabilities" (N, M) and "moods" (M,).
+        """
+        X = feature_matrix
+        if not isinstance(X, np.ndarray):
+            X = MoodClassifierAgent.features_to_matrix(X)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+        if profiles is None:
+            moods = MoodClassifierAgent.MOOD_LABELS
+            P = MoodClassifierAgent.PROFILE_MATRIX
+        else:
+            moods = list(profiles.keys())
+            P = np.array(list(profiles.values()), dtype=np.float64)
+        W = (
+            MoodClassifierAgent.FEATURE_WEIGHTS
+            if weights is None
+            else np.asarray(weights, dtype=np.float64)
+        )
+
+        # (N, 1, F) - (1, M, F) -> weighted L1 distance per (track, mood)
+        scores = -(np.abs(X[:, None, :] - P[None, :, :]) * W).sum(axis=2)
+
+        logits = scores / SCORE_TEMPERATURE
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+
+        best = scores.argmax(axis=1)
+        labels = np.array(moods, dtype=object)[best] if len(X) else np.array([])
+
+        return {
+            "labels": labels,
+            "scores": scores,
+            "probabilities": probabilities,
+            "moods": moods,
+        }
+
     @staticmethod
     def analyze(track_path):
         try:
-            y, sr = librosa.load(track_path, sr=None)
-            duration = librosa.get_duration(y=y, sr=sr)
-            tempo = librosa.beat.tempo(y=y, sr=sr)[0]
-            rms = librosa.feature.rms(y=y).flatten()
-            energy = float(np.mean(rms))
-            spectral_centroid = float(
-                np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-            )
-            percussive = librosa.effects.percussive(y)
-            harmonic = librosa.effects.harmonic(y)
-            perc_energy = float(np.mean(librosa.feature.rms(y=percussive).flatten()))
-            harm_energy = float(np.mean(librosa.feature.rms(y=harmonic).flatten()))
-            perc_ratio = perc_energy / (harm_energy + 1e-6)
-
-            mood_profiles = {
-                "Energetic": {
-                    "tempo": 130,
-                    "energy": 0.06,
-                    "perc_ratio": 1.1,
-                    "spectral_centroid": 3500,
-                },
-                "Aggressive": {
-                    "tempo": 128,
-                    "energy": 0.08,
-                    "perc_ratio": 1.4,
-                    "spectral_centroid": 4000,
-                },
-                "Uplifting": {
-                    "tempo": 120,
-                    "energy": 0.05,
-                    "perc_ratio": 0.9,
-                    "spectral_centroid": 3000,
-                },
-                "Romantic": {
-                    "tempo": 110,
-                    "energy": 0.045,
-                    "perc_ratio": 0.7,
-                    "spectral_centroid": 2500,
-                },
-                "Chill": {
-                    "tempo": 105,
-                    "energy": 0.03,
-                    "perc_ratio": 0.5,
-                    "spectral_centroid": 2000,
-                },
-                "Melancholy": {
-                    "tempo": 90,
-                    "energy": 0.02,
-                    "perc_ratio": 0.3,
-                    "spectral_centroid": 1800,
-                },
-                "Calm": {
-                    "tempo": 80,
-                    "energy": 0.015,
-                    "perc_ratio": 0.2,
-                    "spectral_centroid": 1600,
-                },
-                "Dark": {
-                    "tempo": 60,
-                    "energy": 0.01,
-                    "perc_ratio": 0.1,
-                    "spectral_centroid": 1200,
-                },
-            }
-
-            def similarity_score(mood, profile):
-                return (
-                    -abs(tempo - profile["tempo"]) * 0.25
-                    + -abs(energy - profile["energy"]) * 150
-                    + -abs(perc_ratio - profile["perc_ratio"]) * 10
-                    + -abs(spectral_centroid - profile["spectral_centroid"]) * 0.01
-                )
-
-            best_mood = "Unknown"
-            best_score = -float("inf")
-            for mood, profile in mood_profiles.items():
-                score = similarity_score(mood, profile)
-                if score > best_score:
-                    best_score = score
-                    best_mood = mood
-
-            return best_mood, round(energy, 3)
+            features = MoodClassifierAgent.extract_features(track_path)
+            result = MoodClassifierAgent.classify([features])
+            return str(result["labels"][0]), round(features["energy"], 3)
 
         except Exception as e:
             print(f"[MoodClassifierAgent] Error: {e}")
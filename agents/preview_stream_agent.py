@@ -0,0 +1,192 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🌊 MoodMixr Agent: Preview Stream Analyzer
+# Fetches a preview clip into memory in chunks and analyzes it while it is
+# still downloading — no temp files, no disk round trip.
+
+import io
+import os
+import tempfile
+import threading
+
+import numpy as np
+import requests
+import soundfile as sf
+import librosa
+
+from agents.audio_decoder import AudioDecoder
+
+# --- Config ------------------------------------------------------------------
+DOWNLOAD_CHUNK_BYTES = 32 * 1024
+DECODE_STEP_BYTES = 96 * 1024  # decode whenever this much new audio has arrived
+DOWNLOAD_TIMEOUT_S = 30
+MIN_ANALYSIS_SECONDS = 10
+N_FFT = 2048
+HOP_LENGTH = 512
+# Samples held back from a partial decode (the last MP3 frame may be truncated)
+PARTIAL_HOLDBACK = 4096
+KEY_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+
+class _ChunkedDownload:
+    """Background chunked download into an in-memory buffer."""
+
+    def __init__(self, url):
+        self.buffer = bytearray()
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(url,), daemon=True)
+        self._thread.start()
+
+    def _run(self, url):
+        try:
+            with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT_S) as res:
+                res.raise_for_status()
+                for chunk in res.iter_content(DOWNLOAD_CHUNK_BYTES):
+                    with self._cond:
+                        self.buffer.extend(chunk)
+                        self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def wait_for(self, nbytes):
+        """Block until nbytes are buffered or the download ends; return a snapshot."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.buffer) >= nbytes or self.done)
+            return bytes(self.buffer), self.done
+
+
+class _BlockFeatures:
+    """Frame-aligned incremental RMS / chroma / onset accumulation."""
+
+    def __init__(self, sr):
+        self.sr = sr
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.total_samples = 0
+        self.rms = []
+        self.mel_db = []
+        self.chroma_sum = np.zeros(12)
+        self.n_frames = 0
+
+    def feed(self, y):
+        self.total_samples += len(y)
+        buf = np.concatenate([self.pending, y])
+        n = 1 + (len(buf) - N_FFT) // HOP_LENGTH if len(buf) >= N_FFT else 0
+        if n <= 0:
+            self.pending = buf
+            return
+        used = (n - 1) * HOP_LENGTH + N_FFT
+        block = buf[:used]
+        # Keep the tail starting at the next frame so frames tile seamlessly
+        self.pending = buf[n * HOP_LENGTH :]
+
+        power = (
+            np.abs(
+                librosa.stft(block, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False)
+            )
+            ** 2
+        )
+        self.rms.append(
+            librosa.feature.rms(
+                y=block, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False
+            )[0]
+        )
+        mel = librosa.feature.melspectrogram(S=power, sr=self.sr)
+        self.mel_db.append(librosa.power_to_db(mel, ref=1.0, top_db=None))
+        self.chroma_sum += librosa.feature.chroma_stft(S=power, sr=self.sr).sum(axis=1)
+        self.n_frames += power.shape[1]
+
+    def result(self):
+        if self.total_samples < self.sr * MIN_ANALYSIS_SECONDS or not self.n_frames:
+            raise ValueError("Audio clip too short for analysis")
+        onset_env = librosa.onset.onset_strength(
+            S=np.concatenate(self.mel_db, axis=1), sr=self.sr
+        )
+        tempo = librosa.feature.tempo(
+            onset_envelope=onset_env, sr=self.sr, hop_length=HOP_LENGTH
+        )[0]
+        energy = float(np.mean(np.concatenate(self.rms)))
+        return {
+            "bpm": round(float(tempo)),
+            "energy": energy,
+            "key": KEY_NAMES[int(np.argmax(self.chroma_sum))],
+        }
+
+
+class PreviewStreamAgent:
+    @staticmethod
+    def _decode_from(data, start_frame):
+        """Decode mono float32 samples from an in-memory (possibly partial) clip."""
+        with sf.SoundFile(io.BytesIO(data)) as f:
+            if start_frame:
+                f.seek(start_frame)
+            y = f.read(dtype="float32", always_2d=True)
+            return y.mean(axis=1), f.samplerate
+
+    @staticmethod
+    def _analyze_buffered(data):
+        """
+        Last resort for codecs libsndfile can't read: decode via a scoped temp
+        file, then hand the samples to the engine's process pool in shared
+        memory (librosa holds the GIL; the download threads shouldn't run it).
+        """
+        from agents.analysis_engine import AnalysisEngine
+
+        fd, path = tempfile.mkstemp(suffix=".mp3")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            y, sr = AudioDecoder.decode(path, cache=False)
+        finally:
+            os.unlink(path)
+        if len(y) < sr * MIN_ANALYSIS_SECONDS:
+            raise ValueError("Audio clip too short for analysis")
+        result = AnalysisEngine.submit_pcm(y, sr).result()
+        if result.get("error"):
+            raise ValueError(result["error"])
+        return {"bpm": result["bpm"], "energy": result["rms"], "key": result["key"]}
+
+    @staticmethod
+    def analyze(url):
+        """
+        Stream a preview and compute BPM / key / energy while it downloads.
+
+        Returns:
+            dict: {"bpm", "key", "energy"} — raises on download/decode failure.
+        """
+        download = _ChunkedDownload(url)
+        feats = None
+        decoded = 0
+        want = DECODE_STEP_BYTES
+
+        while True:
+            data, done = download.wait_for(want)
+            if download.error:
+                raise download.error
+            try:
+                y, sr = PreviewStreamAgent._decode_from(data, decoded)
+            except Exception:
+                if not done:
+                    # Not enough header/frames yet — wait for more bytes
+                    want = len(data) + DECODE_STEP_BYTES
+                    continue
+                if feats is None:
+                    return PreviewStreamAgent._analyze_buffered(data)
+                raise
+
+            if feats is None:
+                feats = _BlockFeatures(sr)
+            usable = len(y) if done else max(len(y) - PARTIAL_HOLDBACK, 0)
+            if usable:
+                feats.feed(y[:usable])
+                decoded += usable
+
+            if done:
+                return feats.result()
+            want = len(data) + DECODE_STEP_BYTES
@@ -0,0 +1,443 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🔎 MoodMixr Agent: Probe
+# Duration, sample rate, channels and bit depth straight from container
+# headers (FLAC STREAMINFO, WAV/AIFF chunks, MP3 Xing/VBRI/frame headers,
+# MP4 mvhd/mdhd/stsd) — a few small reads per file, never a decode. Also
+# reports where the audio payload sits inside the file.
+
+import os
+import struct
+import hashlib
+
+# --- Config ------------------------------------------------------------------
+HEAD_BYTES = 64 * 1024
+MP3_SAMPLE_FRAMES = 24  # frames checked before trusting a CBR estimate
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+HASH_CHUNK_BYTES = 1 << 20
+
+_MP3_BITRATES = {  # (mpeg1?, layer) -> kbps by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+def _result(fmt, frames, sample_rate, channels, bit_depth, offset, size):
+    return {
+        "format": fmt,
+        "duration_sec": frames / sample_rate if sample_rate else 0.0,
+        "frames": int(frames),
+        "sample_rate": int(sample_rate),
+        "channels": int(channels),
+        "bit_depth": bit_depth,
+        # byte span of the encoded audio (tags/metadata excluded)
+        "audio_offset": int(offset),
+        "audio_size": int(size),
+    }
+
+
+def _id3v2_size(head):
+    """Bytes taken by a leading ID3v2 tag (0 when absent)."""
+    if head[:3] != b"ID3" or len(head) < 10:
+        return 0
+    size = 0
+    for b in head[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _trailing_tags_size(f, file_size):
+    """ID3v1 + APEv2 tags at the end of an MP3."""
+    end = file_size
+    if file_size >= 128:
+        f.seek(file_size - 128)
+        if f.read(3) == b"TAG":
+            end -= 128
+    if end >= 32:
+        f.seek(end - 32)
+        footer = f.read(32)
+        if footer[:8] == b"APETAGEX":
+            tag_size, _, flags = struct.unpack("<III", footer[12:24])
+            end -= tag_size + (32 if flags & 0x80000000 else 0)
+    return file_size - end
+
+
+def _probe_flac(f, head, file_size):
+    pos = _id3v2_size(head)
+    f.seek(pos)
+    if f.read(4) != b"fLaC":
+        return None
+    info = None
+    while True:
+        hdr = f.read(4)
+        if len(hdr) < 4:
+            return None
+        last, btype, length = (
+            hdr[0] & 0x80,
+            hdr[0] & 0x7F,
+            int.from_bytes(hdr[1:], "big"),
+        )
+        if btype == 0:
+            block = f.read(length)
+            bits = int.from_bytes(block[10:18], "big")
+            info = (
+                bits >> 44,  # sample rate (20 bits)
+                ((bits >> 41) & 0x7) + 1,  # channels
+                ((bits >> 36) & 0x1F) + 1,  # bits per sample
+                bits & 0xFFFFFFFFF,  # total samples (36 bits)
+            )
+        else:
+            f.seek(length, os.SEEK_CUR)
+        if last:
+            break
+    if info is None:
+        return None
+    sr, channels, bps, total = info
+    offset = f.tell()
+    return _result("flac", total, sr, channels, bps, offset, file_size - offset)
+
+
+def _probe_wav(f, head, file_size):
+    if head[:4] not in (b"RIFF", b"RF64") or head[8:12] != b"WAVE":
+        return None
+    f.seek(12)
+    fmt = None
+    ds64_data_size = None
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            return None
+        cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+        if cid == b"ds64":
+            ds64_data_size = struct.unpack("<Q", f.read(28)[8:16])[0]
+            f.seek(size - 28, os.SEEK_CUR)
+        elif cid == b"fmt ":
+            body = f.read(size)
+            channels, sr, _, block_align, bits = struct.unpack("<HIIHH", body[2:16])
+            fmt = (channels, sr, block_align, bits)
+        elif cid == b"data":
+            if fmt is None:
+                return None
+            if size == 0xFFFFFFFF and ds64_data_size is not None:
+                size = ds64_data_size
+            offset = f.tell()
+            size = min(size, file_size - offset)  # truncated/streamed files
+            channels, sr, block_align, bits = fmt
+            return _result("wav", size // block_align, sr, channels, bits, offset, size)
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _ieee_extended(b):
+    """80-bit IEEE 754 extended float (AIFF sample rate)."""
+    exp = ((b[0] & 0x7F) << 8) | b[1]
+    mant = int.from_bytes(b[2:10], "big")
+    return mant * 2.0 ** (exp - 16383 - 63)
+
+
+def _probe_aiff(f, head, file_size):
+    if head[:4] != b"FORM" or head[8:12] not in (b"AIFF", b"AIFC"):
+        return None
+    f.seek(12)
+    comm = None
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            return None
+        cid, size = hdr[:4], struct.unpack(">I", hdr[4:])[0]
+        if cid == b"COMM":
+            body = f.read(size)
+            channels, frames, bits = struct.unpack(">HIH", body[:8])
+            comm = (channels, frames, bits, _ieee_extended(body[8:18]))
+            if size & 1:
+                f.seek(1, os.SEEK_CUR)
+        elif cid == b"SSND":
+            if comm is None:
+                return None
+            data_offset = struct.unpack(">I", f.read(8)[:4])[0]
+            offset = f.tell() + data_offset
+            channels, frames, bits, sr = comm
+            return _result("aiff", frames, sr, channels, bits, offset, size - 8)
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _mp3_header(b):
+    """Parse a 4-byte MPEG audio frame header; None if it isn't one."""
+    if len(b) < 4 or b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    version = (b[1] >> 3) & 0x3  # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = 4 - ((b[1] >> 1) & 0x3)
+    br_idx, sr_idx = b[2] >> 4, (b[2] >> 2) & 0x3
+    if version == 1 or layer == 4 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][br_idx] * 1000
+    sr = _MP3_RATES[version][sr_idx]
+    padding = (b[2] >> 1) & 0x1
+    channels = 1 if (b[3] >> 6) == 3 else 2
+    if layer == 1:
+        spf, length = 384, (12 * bitrate // sr + padding) * 4
+    else:
+        spf = 1152 if (layer == 2 or mpeg1) else 576
+        length = spf // 8 * bitrate // sr + padding
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sr,
+        "channels": channels,
+        "spf": spf,
+        "length": length,
+    }
+
+
+def _lame_gapless(frame, xing_at):
+    """Encoder delay + padding samples from a LAME tag (0 when absent)."""
+    flags = struct.unpack(">I", frame[xing_at + 4 : xing_at + 8])[0]
+    lame_at = xing_at + 8
+    lame_at += 4 * bool(flags & 0x1) + 4 * bool(flags & 0x2)
+    lame_at += 100 * bool(flags & 0x4) + 4 * bool(flags & 0x8)
+    if frame[lame_at : lame_at + 4] != b"LAME" or len(frame) < lame_at + 24:
+        return 0
+    b = frame[lame_at + 21 : lame_at + 24]
+    delay, padding = (b[0] << 4) | (b[1] >> 4), ((b[1] & 0x0F) << 8) | b[2]
+    return delay + padding
+
+
+def _probe_mp3(f, head, file_size):
+    if head[:4] in (b"OggS", b"RIFF", b"RF64", b"fLaC", b"FORM"):
+        return None  # other containers can contain sync-like byte pairs
+    start = _id3v2_size(head)
+    f.seek(start)
+    buf = f.read(HEAD_BYTES)
+    # First frame whose successor is also a valid header (avoids false syncs)
+    pos, first = 0, None
+    while pos < len(buf) - 4:
+        hdr = _mp3_header(buf[pos : pos + 4])
+        if hdr and _mp3_header(buf[pos + hdr["length"] : pos + hdr["length"] + 4]):
+            first = hdr
+            break
+        pos += 1
+    if first is None:
+        return None
+    audio_start = start + pos
+    audio_end = file_size - _trailing_tags_size(f, file_size)
+    sr, channels, spf = first["sample_rate"], first["channels"], first["spf"]
+
+    # Xing/Info (LAME) header sits after the side info of the first frame
+    side = (
+        (32 if channels == 2 else 17)
+        if first["mpeg1"]
+        else (17 if channels == 2 else 9)
+    )
+    frame = buf[pos : pos + first["length"]]
+    xing, vbri = frame[4 + side : 4 + side + 12], frame[36:54]
+    frames = None
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x1:
+        frames = struct.unpack(">I", xing[8:12])[0] * spf
+        frames -= _lame_gapless(frame, 4 + side)
+    elif vbri[:4] == b"VBRI":
+        frames = struct.unpack(">I", vbri[14:18])[0] * spf
+    else:
+        # No VBR header: constant bitrate unless the first frames disagree
+        bitrates, p = set(), pos
+        for _ in range(MP3_SAMPLE_FRAMES):
+            hdr = _mp3_header(buf[p : p + 4])
+            if not hdr:
+                break
+            bitrates.add(hdr["bitrate"])
+            p += hdr["length"]
+        if len(bitrates) <= 1:
+            frames = round((audio_end - audio_start) * 8 / first["bitrate"] * sr)
+        else:
+            frames = _scan_mp3_frames(f, audio_start, audio_end) * spf
+
+    size = audio_end - audio_start
+    out = _result("mp3", frames, sr, channels, None, audio_start, size)
+    if frames:
+        out["bitrate_kbps"] = round(size * 8 / (frames / sr) / 1000)
+    return out
+
+
+def _scan_mp3_frames(f, start, end):
+    """Count frames by hopping header to header (VBR file without a Xing tag)."""
+    count, pos = 0, start
+    f.seek(start)
+    data = f.read(end - start)
+    while pos - start < len(data) - 4:
+        hdr = _mp3_header(data[pos - start : pos - start + 4])
+        if hdr is None:
+            pos += 1  # resync
+            continue
+        count += 1
+        pos += hdr["length"]
+    return count
+
+
+def _mp4_atoms(f, start, end):
+    """Yield (type, payload_offset, payload_size) for atoms in [start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            return
+        size, kind = struct.unpack(">I4s", hdr)
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, size - header
+        pos += size
+
+
+def _probe_mp4(f, head, file_size):
+    if head[4:8] != b"ftyp":
+        return None
+    found = {"mdat": [0, 0]}
+
+    def walk(start, end):
+        for kind, off, size in _mp4_atoms(f, start, end):
+            if kind == b"mdat":
+                found["mdat"][0] = found["mdat"][0] or off
+                found["mdat"][1] += size
+            elif kind in MP4_CONTAINERS:
+                walk(off, off + size)
+            elif kind == b"mvhd" and "mvhd" not in found:
+                f.seek(off)
+                body = f.read(min(size, 32))
+                if body[0] == 1:
+                    timescale, duration = struct.unpack(">IQ", body[20:32])
+                else:
+                    timescale, duration = struct.unpack(">II", body[12:20])
+                found["mvhd"] = (timescale, duration)
+            elif kind == b"mdhd" and "mdhd" not in found:
+                f.seek(off)
+                body = f.read(min(size, 32))
+                if body[0] == 1:
+                    timescale, duration = struct.unpack(">IQ", body[20:32])
+                else:
+                    timescale, duration = struct.unpack(">II", body[12:20])
+                found["mdhd"] = (timescale, duration)
+            elif kind == b"stsd" and "stsd" not in found:
+                f.seek(off)
+                body = f.read(min(size, 64))
+                entry = body[8:]  # version/flags + entry count
+                if entry[4:8] in (b"mp4a", b"alac", b"fLaC", b"Opus", b"ac-3"):
+                    channels, bits = struct.unpack(">HH", entry[24:28])
+                    sr = struct.unpack(">I", entry[32:36])[0] >> 16
+                    found["stsd"] = (entry[4:8].decode(), channels, bits, sr)
+
+    walk(0, file_size)
+    if "mvhd" not in found and "mdhd" not in found:
+        return None
+    codec, channels, bits, sr = found.get("stsd", ("mp4a", 2, 16, 0))
+    if "mdhd" in found:
+        # Audio track timescale is normally its sample rate
+        timescale, duration = found["mdhd"]
+        sr = sr or timescale
+        seconds = duration / timescale
+    else:
+        timescale, duration = found["mvhd"]
+        seconds = duration / timescale
+    if not sr:
+        return None
+    offset, size = found["mdat"]
+    out = _result("m4a", round(seconds * sr), sr, channels, None, offset, size)
+    out["codec"] = codec
+    out["bit_depth"] = bits if codec in ("alac", "fLaC") else None
+    return out
+
+
+_PROBES = (_probe_flac, _probe_wav, _probe_aiff, _probe_mp4, _probe_mp3)
+
+
+class ProbeAgent:
+    """Header-only audio file inspection."""
+
+    @staticmethod
+    def probe(path):
+        """
+        Args:
+            path (str): Audio file path.
+
+        Returns:
+            dict | None: {"format", "duration_sec", "frames", "sample_rate",
+            "channels", "bit_depth", "audio_offset", "audio_size", ...} or None
+            when the container isn't recognised (callers fall back to a decoder).
+        """
+        try:
+            file_size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                head = f.read(HEAD_BYTES)
+                for probe in _PROBES:
+                    f.seek(0)
+                    info = probe(f, head, file_size)
+                    if info is not None and info["sample_rate"] > 0:
+                        return info
+        except (OSError, struct.error, IndexError, ValueError) as e:
+            print(f"[ProbeAgent] Could not probe {path}: {e}")
+        return None
+
+    @staticmethod
+    def duration(path):
+        """Seconds from the header, or None when probing fails."""
+        info = ProbeAgent.probe(path)
+        return info["duration_sec"] if info else None
+
+    @staticmethod
+    def content_id(path):
+        """
+        SHA1 of the audio payload only (FLAC frames, MP3 frames without
+        ID3/APE tags, WAV/AIFF sample data, MP4 mdat), streamed in 1 MB
+        chunks. Re-tagging or new artwork keeps the id; a file the probe
+        can't parse falls back to hashing every byte.
+        """
+        info = ProbeAgent.probe(path)
+        offset = info["audio_offset"] if info else 0
+        remaining = info["audio_size"] if info else None
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while remaining is None or remaining > 0:
+                n = (
+                    HASH_CHUNK_BYTES
+                    if remaining is None
+                    else min(HASH_CHUNK_BYTES, remaining)
+                )
+                chunk = f.read(n)
+                if not chunk:
+                    break
+                h.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def describe(info):
+        """Short listing label, e.g. '44.1 kHz · 16-bit · stereo'."""
+        parts = [f"{info['sample_rate'] / 1000:g} kHz"]
+        if info.get("bit_depth"):
+            parts.append(f"{info['bit_depth']}-bit")
+        elif info.get("bitrate_kbps"):
+            parts.append(f"{info['bitrate_kbps']} kbps")
+        parts.append(
+            {1: "mono", 2: "stereo"}.get(info["channels"], f"{info['channels']} ch")
+        )
+        return " · ".join(parts)
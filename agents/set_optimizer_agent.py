@@ -3,6 +3,8 @@
 # 🎛️ This agent reshapes energy into harmony through sacred transitions.
 # © 2025 Karmonic | MoodMixr Signature Embedded
 # 🔱 Agent of Shiva — Transforms raw tempo into set-building power.
+import numpy as np
+
 from utils.constants import MOODMIXR_SIGNATURE
 
 from utils.constants import MOODMIXR_SIGNATURE
@@ -30,6 +32,36 @@ class SetOptimizerAgent:
             print(f"[SetOptimizerAgent] Error: {e}")
             return "Unknown"
 
+    @staticmethod
+    def classify_roles(bpms, energies):
+        """
+        Vectorized classify_role over whole arrays of BPM and energy values.
+        NaN/None entries come back as "Unknown", matching the scalar version.
+        """
+        bpm = np.asarray(
+            [np.nan if b is None else b for b in bpms], dtype=np.float64
+        ).reshape(-1)
+        energy = np.asarray(
+            [np.nan if e is None else e for e in energies], dtype=np.float64
+        ).reshape(-1)
+        unknown = np.isnan(bpm) | np.isnan(energy)
+
+        conditions = [
+            unknown,
+            (bpm < 95) | (energy < 0.2),
+            (bpm >= 95) & (bpm < 115) & (energy < 0.4),
+            (bpm >= 115) & (bpm < 130) & (energy < 0.6),
+            (bpm >= 130) & (energy >= 0.6),
+        ]
+        choices = [
+            "Unknown",
+            "Warm-up / Opening",
+            "Early Groove",
+            "Main Set",
+            "Peak Hour Banger",
+        ]
+        return np.select(conditions, choices, default="Afterhours / Cooldown")
+
     @staticmethod
     def optimize_dj_set(track_queue):
         try:
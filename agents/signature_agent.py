@@ -1,10 +1,43 @@
 # 🧬 MoodMixr Agent: Signature Encoder
 # 🔏 Protects track metadata with MoodMixr’s creative DNA.
 # 🧠 Encodes unique mood+energy+track fingerprint for export.
+# 🎧 Acoustic fingerprints: the same recording matches across formats,
+#    bitrates and re-encodes (band-energy difference bits, one uint32/frame).
 # © 2025 Karmonic | MoodMixr Signature Embedded
 
+import base64
 import hashlib
 
+import numpy as np
+
+# --- Config ------------------------------------------------------------------
+FP_SR = 11025  # same decode as tempo analysis
+FP_N_FFT = 4096  # ~0.37 s analysis window
+FP_HOP = 512  # ~46 ms per sub-fingerprint
+FP_BAND_RANGE = (300.0, 2000.0)  # Hz; survives lossy coding and EQ
+FP_BITS = 32  # 33 log-spaced bands -> 32 difference bits
+FP_MAX_OFFSET = 32  # frames of misalignment tolerated (~1.5 s of lead-in)
+FP_MIN_OVERLAP = 0.5  # of the shorter fingerprint, for a similarity to count
+FP_BLOCK_FRAMES = 512
+
+_band_cache = {}
+
+
+def _band_matrix(n_fft, sr):
+    key = (n_fft, sr)
+    if key not in _band_cache:
+        freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+        edges = np.geomspace(*FP_BAND_RANGE, FP_BITS + 2)
+        W = np.zeros((FP_BITS + 1, len(freqs)), dtype=np.float32)
+        for b in range(FP_BITS + 1):
+            W[b, (freqs >= edges[b]) & (freqs < edges[b + 1])] = 1.0
+        _band_cache[key] = W
+    return _band_cache[key]
+
+
+def _popcount(x):
+    return int(np.unpackbits(np.ascontiguousarray(x).view(np.uint8)).sum())
+
 
 class SignatureAgent:
     """
@@ -15,3 +48,78 @@ class SignatureAgent:
     def generate_signature(mood, energy, track_name):
         combined = f"{mood}-{energy}-{track_name}"
         return hashlib.sha256(combined.encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint(y, sr):
+        """
+        Acoustic fingerprint of mono samples: for every frame, the signs of the
+        energy differences between adjacent bands, differenced over time.
+        Gain changes and codec noise leave most bits alone.
+
+        Returns:
+            np.ndarray: uint32 per frame (empty for clips shorter than a window).
+        """
+        import soxr
+
+        y = np.asarray(y, dtype=np.float32)
+        if sr != FP_SR:
+            y = soxr.resample(y, sr, FP_SR, quality="LQ").astype(np.float32)
+        if len(y) < FP_N_FFT + 2 * FP_HOP:
+            return np.zeros(0, dtype=np.uint32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(y, FP_N_FFT)[::FP_HOP]
+        window = np.hanning(FP_N_FFT).astype(np.float32)
+        bands = _band_matrix(FP_N_FFT, FP_SR).T
+        energy = np.empty((len(frames), FP_BITS + 1), dtype=np.float32)
+        for i in range(0, len(frames), FP_BLOCK_FRAMES):  # bounded memory
+            spec = np.abs(np.fft.rfft(frames[i : i + FP_BLOCK_FRAMES] * window)) ** 2
+            energy[i : i + FP_BLOCK_FRAMES] = spec.astype(np.float32) @ bands
+        band_diff = energy[:, :-1] - energy[:, 1:]
+        bits = (band_diff[1:] - band_diff[:-1]) > 0  # (T-1, 32)
+        weights = np.left_shift(np.uint32(1), np.arange(FP_BITS, dtype=np.uint32))
+        return (bits.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint32)
+
+    @staticmethod
+    def fingerprint_file(path, cache=True):
+        """fingerprint() of a file, from the shared tempo-rate decode."""
+        from agents.audio_decoder import AudioDecoder, PURPOSE_SR
+
+        y, sr = AudioDecoder.decode(path, PURPOSE_SR["fingerprint"], cache=cache)
+        return SignatureAgent.fingerprint(y, sr)
+
+    @staticmethod
+    def similarity(a, b, max_offset=FP_MAX_OFFSET):
+        """
+        1 - bit error rate at the best alignment within ±max_offset frames.
+        Unrelated audio scores ~0.5, re-encodes of one master ~0.9+.
+        """
+        a = np.asarray(a, dtype=np.uint32)
+        b = np.asarray(b, dtype=np.uint32)
+        min_frames = max(1, int(FP_MIN_OVERLAP * min(len(a), len(b))))
+        best = 0.0
+        for off in range(-max_offset, max_offset + 1):
+            x = a[max(0, off) :]
+            z = b[max(0, -off) :]
+            n = min(len(x), len(z))
+            if n < min_frames or n == 0:
+                continue
+            errors = _popcount(np.bitwise_xor(x[:n], z[:n]))
+            best = max(best, 1.0 - errors / (n * FP_BITS))
+        return best
+
+    @staticmethod
+    def to_bytes(fp):
+        return np.asarray(fp, dtype="<u4").tobytes()
+
+    @staticmethod
+    def from_bytes(blob):
+        return np.frombuffer(blob, dtype="<u4").astype(np.uint32)
+
+    @staticmethod
+    def to_text(fp):
+        """JSON-safe form (base64) for analysis payloads."""
+        return base64.b64encode(SignatureAgent.to_bytes(fp)).decode("ascii")
+
+    @staticmethod
+    def from_text(text):
+        return SignatureAgent.from_bytes(base64.b64decode(text))
@@ -2,34 +2,115 @@
 # 🎛️ Built by Karmonic for sacred creative intelligence and modular clarity
 # 🧠 Purpose: Handle audio processing, mood detection, waveform rendering, transition logic, and platform sync
 # Created: 2025-07-21 | License: MIT + Karma Clause
+import os
+import time
+import threading
+
 import requests
 import streamlit as st
 
+# --- Config ------------------------------------------------------------------
+# Base URLs are overridable so tests/dev can point at a local stand-in server.
+SPOTIFY_AUTH_URL = os.getenv(
+    "SPOTIFY_AUTH_URL", "https://accounts.spotify.com/api/token"
+)
+SPOTIFY_API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1")
+TOKEN_REFRESH_MARGIN_S = 60  # refresh this long before Spotify says it expires
+AUDIO_FEATURES_BATCH = 100  # max ids per /audio-features request
+REQUEST_TIMEOUT_S = 15
+
+# Client-credentials tokens are app-wide, so one cache serves every instance.
+_token_cache = {}  # client_id -> (access_token, expires_at_monotonic)
+_token_lock = threading.Lock()
+_session = requests.Session()
+
+
+class SpotifyApiError(RuntimeError):
+    """Spotify didn't answer the request (rate limit, 5xx, network, auth)."""
+
+
+def _secret(name):
+    try:
+        return st.secrets[name]
+    except Exception:
+        return os.getenv(name)
+
 
 class SpotifyApiAgent:
-    def __init__(self):
-        self.client_id = st.secrets["SPOTIFY_CLIENT_ID"]
-        self.client_secret = st.secrets["SPOTIFY_CLIENT_SECRET"]
-        self.token = self._get_token()
-
-    def _get_token(self):
-        auth_url = "https://accounts.spotify.com/api/token"
-        auth_data = {"grant_type": "client_credentials"}
-        auth_response = requests.post(
-            auth_url, data=auth_data, auth=(self.client_id, self.client_secret)
-        )
-        return auth_response.json().get("access_token")
-
-    def search(self, query, types="track", limit=5):
-        headers = {"Authorization": f"Bearer {self.token}"}
-        params = {"q": query, "type": types, "limit": limit}
-        res = requests.get(
-            "https://api.spotify.com/v1/search", headers=headers, params=params
-        )
-        return res.json()
+    def __init__(self, client_id=None, client_secret=None):
+        self.client_id = client_id or _secret("SPOTIFY_CLIENT_ID")
+        self.client_secret = client_secret or _secret("SPOTIFY_CLIENT_SECRET")
+
+    @property
+    def token(self):
+        """Cached access token, refreshed shortly before it expires."""
+        return self._get_token()
+
+    def _get_token(self, force=False):
+        with _token_lock:
+            cached = _token_cache.get(self.client_id)
+            if cached and not force and time.monotonic() < cached[1]:
+                return cached[0]
+
+            auth_data = {"grant_type": "client_credentials"}
+            auth_response = _session.post(
+                SPOTIFY_AUTH_URL,
+                data=auth_data,
+                auth=(self.client_id, self.client_secret),
+                timeout=REQUEST_TIMEOUT_S,
+            )
+            payload = auth_response.json()
+            token = payload.get("access_token")
+            if token:
+                ttl = float(payload.get("expires_in", 3600))
+                expires_at = time.monotonic() + max(ttl - TOKEN_REFRESH_MARGIN_S, 0)
+                _token_cache[self.client_id] = (token, expires_at)
+            return token
+
+    def _get(self, path, params=None):
+        """
+        GET against the Web API; on 401 refresh the token once and retry.
+        Raises SpotifyApiError for anything but a 2xx answer, so callers can
+        tell a failed request from an empty result (and not cache it).
+        """
+        url = f"{SPOTIFY_API_URL}{path}"
+        try:
+            for attempt in range(2):
+                headers = {
+                    "Authorization": f"Bearer {self._get_token(force=attempt > 0)}"
+                }
+                res = _session.get(
+                    url, headers=headers, params=params, timeout=REQUEST_TIMEOUT_S
+                )
+                if res.status_code != 401:
+                    break
+            if not res.ok:
+                raise SpotifyApiError(
+                    f"{res.status_code} from {path}: {res.text[:200]}"
+                )
+            return res.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise SpotifyApiError(f"{path}: {e}") from e
+
+    def search(self, query, types="track", limit=5, offset=0):
+        params = {"q": query, "type": types, "limit": limit, "offset": offset}
+        return self._get("/search", params=params)
 
     def get_audio_features(self, track_id):
-        headers = {"Authorization": f"Bearer {self.token}"}
-        url = f"https://api.spotify.com/v1/audio-features/{track_id}"
-        res = requests.get(url, headers=headers)
-        return res.json()
+        return self._get(f"/audio-features/{track_id}")
+
+    def get_audio_features_batch(self, track_ids):
+        """
+        Fetch audio features for many tracks with the multi-ID endpoint.
+
+        Returns:
+            dict: track_id -> features dict (None when Spotify has no features).
+        """
+        ids = [t for t in dict.fromkeys(track_ids) if t]
+        out = {t: None for t in ids}
+        for i in range(0, len(ids), AUDIO_FEATURES_BATCH):
+            chunk = ids[i : i + AUDIO_FEATURES_BATCH]
+            res = self._get("/audio-features", params={"ids": ",".join(chunk)})
+            for tid, feats in zip(chunk, res.get("audio_features") or []):
+                out[tid] = feats
+        return out
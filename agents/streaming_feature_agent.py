@@ -0,0 +1,410 @@
+# ⛩️ MoodMixr by Karmonic (Akshaykumarr Surti)
+# 🌐 A fusion of AI + Human creativity, built with sacred precision.
+# 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
+# 🌊 MoodMixr Agent: Streaming Feature Extractor
+# Memory-bounded feature extraction for hour-long mixes and radio shows. The
+# file is read in fixed-size blocks and every statistic (RMS, centroid, chroma,
+# mel dB, tempogram, HPSS energy) is accumulated incrementally, so peak memory
+# depends on the block size, never on the file length. Outputs match the
+# full-file extractors in mood_agent / vocal_detector_agent within tolerance.
+
+import os
+
+import numpy as np
+
+from agents.audio_decoder import AudioDecoder, PURPOSE_SR, RESAMPLE_QUALITY
+
+# --- Config ------------------------------------------------------------------
+# Files whose decoded mono float32 signal would exceed this go through streaming
+STREAM_THRESHOLD_BYTES = (
+    int(os.getenv("MOODMIXR_STREAM_THRESHOLD_MB", "256")) * 1024 * 1024
+)
+BLOCK_SECONDS = 10  # samples read from disk per step
+HPSS_SEGMENT_SECONDS = 10  # HPSS is run on segments of this length ...
+HPSS_CONTEXT_FRAMES = 32  # ... plus this much context (≥ median kernel / 2) per side
+TEMPOGRAM_CHUNK_FRAMES = 4096
+TEMPO_AC_SECONDS = 8.0  # librosa.feature.tempo's default ac_size
+TOP_DB = 80.0
+DB_HIST_RANGE = (-120.0, 160.0)
+DB_HIST_STEP = 0.01
+KEY_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+
+class _Framer:
+    """Cuts an incoming sample stream into frame-aligned blocks (center=False)."""
+
+    def __init__(self, n_fft, hop):
+        self.n_fft = n_fft
+        self.hop = hop
+        self.pending = np.zeros(0, dtype=np.float32)
+
+    def push(self, y):
+        buf = np.concatenate([self.pending, y]) if len(self.pending) else y
+        n = 1 + (len(buf) - self.n_fft) // self.hop if len(buf) >= self.n_fft else 0
+        if n <= 0:
+            self.pending = buf
+            return None
+        # Keep the tail starting at the next frame so frames tile seamlessly
+        self.pending = buf[n * self.hop :]
+        return buf[: (n - 1) * self.hop + self.n_fft]
+
+
+class _HpssAccumulator:
+    """
+    HPSS over fixed segments with overlapping context, so the median filters see
+    the same neighbourhood as a full-file run. Keeps sum|h|, sum|p| (vocal HPR)
+    and per-frame RMS sums of h and p (mood percussive ratio).
+    """
+
+    def __init__(self, sr, hop=512):
+        self.hop = hop
+        self.core = int(HPSS_SEGMENT_SECONDS * sr) // hop * hop
+        self.pad = HPSS_CONTEXT_FRAMES * hop + 2048
+        self.pad = -(-self.pad // hop) * hop  # keep segment edges on the frame grid
+        self.buf = np.zeros(0, dtype=np.float32)
+        self.left = 0  # samples of already-processed context at the start of buf
+        self.abs_h = self.abs_p = 0.0
+        self.n_samples = 0
+        self.rms_h = self.rms_p = 0.0
+        self.n_frames = 0
+
+    def push(self, y, final=False):
+        import librosa
+
+        self.buf = np.concatenate([self.buf, y])
+        while True:
+            avail = len(self.buf) - self.left
+            if avail <= 0 or (not final and avail < self.core + self.pad):
+                return
+            core = min(self.core, avail)
+            seg = self.buf[: min(len(self.buf), self.left + core + self.pad)]
+            h, p = librosa.effects.hpss(seg)
+            lo, hi = self.left, self.left + core
+            self.abs_h += float(np.abs(h[lo:hi]).sum())
+            self.abs_p += float(np.abs(p[lo:hi]).sum())
+            self.n_samples += core
+            f_lo, f_hi = lo // self.hop, -(-hi // self.hop)
+            rh = librosa.feature.rms(y=h, hop_length=self.hop)[0, f_lo:f_hi]
+            rp = librosa.feature.rms(y=p, hop_length=self.hop)[0, f_lo:f_hi]
+            self.rms_h += float(rh.sum())
+            self.rms_p += float(rp.sum())
+            self.n_frames += len(rh)
+
+            consumed = self.left + core
+            keep_from = max(0, consumed - self.pad)
+            self.buf = self.buf[keep_from:]
+            self.left = consumed - keep_from
+            if final and len(self.buf) <= self.left:
+                return
+
+    def hpr(self):
+        n = max(self.n_samples, 1)
+        return (self.abs_h / n) / ((self.abs_p / n) + 1e-6)
+
+    def perc_ratio(self):
+        n = max(self.n_frames, 1)
+        return (self.rms_p / n) / ((self.rms_h / n) + 1e-6)
+
+
+class _DbHistogram:
+    """Mean/std of power_to_db(S, ref=np.max, top_db=80) without keeping S."""
+
+    def __init__(self):
+        lo, hi = DB_HIST_RANGE
+        self.edges = np.arange(lo, hi + DB_HIST_STEP, DB_HIST_STEP)
+        self.centers = (self.edges[:-1] + self.edges[1:]) / 2
+        self.counts = np.zeros(len(self.centers), dtype=np.int64)
+        self.max_db = -np.inf
+
+    def push(self, S):
+        db = 10.0 * np.log10(np.maximum(S, 1e-10))
+        self.max_db = max(self.max_db, float(db.max()))
+        self.counts += np.histogram(np.clip(db, *DB_HIST_RANGE), bins=self.edges)[
+            0
+        ].astype(np.int64)
+
+    def stats(self):
+        # Relative to the global max, floored at max - TOP_DB (as power_to_db does)
+        vals = np.maximum(self.centers - self.max_db, -TOP_DB)
+        n = self.counts.sum()
+        mean = float((vals * self.counts).sum() / n)
+        std = float(np.sqrt(((vals - mean) ** 2 * self.counts).sum() / n))
+        return mean, std
+
+
+class _Resampler:
+    """Block-wise soxr stream (identity when the rate already matches)."""
+
+    def __init__(self, sr_in, sr_out):
+        self.stream = None
+        if sr_out != sr_in:
+            import soxr
+
+            self.stream = soxr.ResampleStream(
+                sr_in, sr_out, 1, dtype="float32", quality=RESAMPLE_QUALITY
+            )
+
+    def push(self, y, final=False):
+        if self.stream is None:
+            return y
+        return self.stream.resample_chunk(y, last=final)
+
+
+class _HarmonicLane(_HpssAccumulator):
+    """Vocal harmonic/percussive ratio on the native-rate stream."""
+
+    def result(self):
+        return {"hpr": self.hpr()}
+
+
+class _PercussiveLane(_HpssAccumulator):
+    """Mood percussive/harmonic RMS ratio at 22.05 kHz."""
+
+    def result(self):
+        return {"perc_ratio": self.perc_ratio()}
+
+
+class _SpectralLane:
+    """Vocal mel/spectral stats + spectral centroid on the native-rate stream."""
+
+    N_FFT = 2048
+    HOP = 512
+
+    def __init__(self, sr):
+        self.sr = sr
+        self.framer = _Framer(self.N_FFT, self.HOP)
+        self.db = _DbHistogram()
+        self.sums = {"centroid": 0.0, "flatness": 0.0, "zcr": 0.0, "rolloff": 0.0}
+        self.n_frames = 0
+
+    def push(self, y, final=False):
+        import librosa
+
+        block = self.framer.push(y)
+        if block is None:
+            return
+        mag = np.abs(
+            librosa.stft(block, n_fft=self.N_FFT, hop_length=self.HOP, center=False)
+        )
+        power = mag**2
+        mel = librosa.feature.melspectrogram(
+            S=power, sr=self.sr, n_mels=128, fmin=300, fmax=3000
+        )
+        self.db.push(mel)
+        sr = self.sr
+        self.sums["centroid"] += librosa.feature.spectral_centroid(S=mag, sr=sr).sum()
+        self.sums["flatness"] += librosa.feature.spectral_flatness(S=mag).sum()
+        self.sums["rolloff"] += librosa.feature.spectral_rolloff(
+            S=mag, sr=sr, roll_percent=0.85
+        ).sum()
+        self.sums["zcr"] += librosa.feature.zero_crossing_rate(
+            block, frame_length=self.N_FFT, hop_length=self.HOP, center=False
+        ).sum()
+        self.n_frames += mag.shape[1]
+
+    def result(self):
+        n = max(self.n_frames, 1)
+        mean_db, std_db = self.db.stats()
+        return {
+            "mean_db": mean_db,
+            "std_db": std_db,
+            "flatness": float(self.sums["flatness"] / n),
+            "zcr": float(self.sums["zcr"] / n),
+            "rolloff": float(self.sums["rolloff"] / n),
+            "spectral_centroid": float(self.sums["centroid"] / n),
+        }
+
+
+class _EnergyLane:
+    """RMS energy and chroma (key) at 22.05 kHz."""
+
+    N_FFT = 2048
+    HOP = 512
+
+    def __init__(self, sr):
+        self.sr = sr
+        self.framer = _Framer(self.N_FFT, self.HOP)
+        self.rms_sum = 0.0
+        self.chroma_sum = np.zeros(12)
+        self.n_frames = 0
+
+    def push(self, y, final=False):
+        import librosa
+
+        block = self.framer.push(y)
+        if block is None:
+            return
+        power = (
+            np.abs(
+                librosa.stft(block, n_fft=self.N_FFT, hop_length=self.HOP, center=False)
+            )
+            ** 2
+        )
+        self.rms_sum += librosa.feature.rms(
+            y=block, frame_length=self.N_FFT, hop_length=self.HOP, center=False
+        ).sum()
+        self.chroma_sum += librosa.feature.chroma_stft(S=power, sr=self.sr).sum(axis=1)
+        self.n_frames += power.shape[1]
+
+    def result(self):
+        return {
+            "energy": float(self.rms_sum / max(self.n_frames, 1)),
+            "key": KEY_NAMES[int(np.argmax(self.chroma_sum))],
+        }
+
+
+class _TempoLane:
+    """Onset envelope → running tempogram sum → librosa's tempo estimator."""
+
+    def __init__(self, sr):
+        import librosa
+
+        self.sr = sr
+        self.hop = AudioDecoder.hop_length(sr)
+        self.n_fft = 4 * self.hop
+        self.framer = _Framer(self.n_fft, self.hop)
+        self.win_length = int(
+            librosa.time_to_frames(TEMPO_AC_SECONDS, sr=sr, hop_length=self.hop)
+        )
+        self.prev_frame = None
+        self.max_db = -np.inf
+        self.env = np.zeros(0)
+        self.tg_sum = np.zeros(self.win_length)
+        self.tg_frames = 0
+
+    def _tempogram(self, env, center):
+        import librosa
+
+        return librosa.feature.tempogram(
+            onset_envelope=env,
+            sr=self.sr,
+            hop_length=self.hop,
+            win_length=self.win_length,
+            center=center,
+        )
+
+    def push(self, y, final=False):
+        import librosa
+
+        block = self.framer.push(y)
+        if block is not None:
+            mel = librosa.feature.melspectrogram(
+                y=block, sr=self.sr, n_fft=self.n_fft, hop_length=self.hop, center=False
+            )
+            mel_db = librosa.power_to_db(mel, ref=1.0, top_db=None)
+            # top_db clipping against the running maximum
+            self.max_db = max(self.max_db, float(mel_db.max()))
+            mel_db = np.maximum(mel_db, self.max_db - TOP_DB)
+            if self.prev_frame is not None:
+                mel_db = np.concatenate([self.prev_frame, mel_db], axis=1)
+            else:
+                mel_db = np.concatenate([mel_db[:, :1], mel_db], axis=1)
+            self.prev_frame = mel_db[:, -1:]
+            onset = np.maximum(0.0, mel_db[:, 1:] - mel_db[:, :-1]).mean(axis=0)
+            self.env = np.concatenate([self.env, onset])
+
+        # Tempogram columns in fixed chunks; each chunk carries win_length - 1
+        # frames of history so no autocorrelation window is cut short.
+        chunk = TEMPOGRAM_CHUNK_FRAMES
+        while len(self.env) >= chunk + self.win_length - 1:
+            tg = self._tempogram(self.env[: chunk + self.win_length - 1], False)
+            self.tg_sum += tg.sum(axis=1)
+            self.tg_frames += tg.shape[1]
+            self.env = self.env[chunk:]
+        if final and len(self.env):
+            short = self.tg_frames == 0 and len(self.env) < self.win_length
+            tg = self._tempogram(self.env, center=short)
+            self.tg_sum += tg.sum(axis=1)
+            self.tg_frames += tg.shape[1]
+            self.env = np.zeros(0)
+
+    def result(self):
+        import librosa
+
+        tg = (self.tg_sum / max(self.tg_frames, 1))[:, None]
+        tempo = librosa.feature.tempo(
+            sr=self.sr, hop_length=self.hop, tg=tg, aggregate=None
+        )
+        return {"tempo": float(np.ravel(tempo)[0])}
+
+
+_LANES = {
+    "spectral": (_SpectralLane, None),
+    "harmonic": (_HarmonicLane, None),
+    "energy": (_EnergyLane, "energy"),
+    "percussive": (_PercussiveLane, "energy"),
+    "tempo": (_TempoLane, "tempo"),
+}
+
+# Lanes behind each feature group of the mood / vocal agents
+GROUP_LANES = {
+    "vocal": ("spectral", "harmonic"),
+    "mood": ("spectral", "energy", "percussive", "tempo"),
+}
+
+
+class StreamingFeatureAgent:
+    """Block-wise extraction of the mood + vocal features for very long files."""
+
+    @staticmethod
+    def should_stream(track_path):
+        """True when a full mono float32 decode would exceed STREAM_THRESHOLD_BYTES."""
+        import soundfile as sf
+        from agents.probe_agent import ProbeAgent
+
+        info = ProbeAgent.probe(track_path)
+        if info and info["frames"] * 4 <= STREAM_THRESHOLD_BYTES:
+            return False  # cheap header answer for the common (short) case
+        try:
+            info = sf.info(track_path)
+        except RuntimeError:
+            return False  # not block-readable (m4a/webm): full-file path only
+        return info.frames * 4 > STREAM_THRESHOLD_BYTES
+
+    @staticmethod
+    def extract(track_path, lanes=tuple(_LANES), block_seconds=None):
+        """
+        Stream a file once and compute the features of the requested lanes.
+
+        Lanes:
+            spectral:   mean_db, std_db, flatness, zcr, rolloff, spectral_centroid
+            harmonic:   hpr (native rate)
+            energy:     energy, key (22.05 kHz)
+            percussive: perc_ratio (22.05 kHz)
+            tempo:      tempo (11.025 kHz)
+
+        Returns:
+            dict: the lanes' features plus duration_sec.
+        """
+        import soundfile as sf
+
+        info = sf.info(track_path)
+        sr = info.samplerate
+        active = []
+        for name in lanes:
+            lane_cls, purpose = _LANES[name]
+            lane_sr = sr if purpose is None else min(PURPOSE_SR[purpose], sr)
+            active.append((lane_cls(lane_sr), _Resampler(sr, lane_sr)))
+
+        blocks = sf.blocks(
+            track_path,
+            blocksize=int((block_seconds or BLOCK_SECONDS) * sr),
+            dtype="float32",
+            always_2d=True,
+        )
+        prev = None
+        for block in blocks:
+            # One block of look-behind so the last block can be flagged final
+            if prev is not None:
+                for lane, resampler in active:
+                    lane.push(resampler.push(prev), False)
+            prev = np.ascontiguousarray(block.mean(axis=1), dtype=np.float32)
+        if prev is not None:
+            for lane, resampler in active:
+                lane.push(resampler.push(prev, final=True), True)
+
+        out = {}
+        for lane, _ in active:
+            out.update(lane.result())
+        out["duration_sec"] = info.frames / sr
+        return out
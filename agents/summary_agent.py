@@ -8,12 +8,98 @@
 # © 2025 Karmonic | MoodMixr Signature Embedded
 # 🎭 Agent of Krishna — Turns data into emotion, stats into story.
 
+import os
+import re
+import time
+import hashlib
+import threading
+import concurrent.futures
+
 from utils.constants import MOODMIXR_SIGNATURE
+from utils.cache import TTLCache
+
+# --- Config ------------------------------------------------------------------
+SUMMARY_TTL_S = 90 * 24 * 3600
+BATCH_MAX = 20  # tracks per LLM request
+BATCH_WINDOW_S = 0.05  # background requests arriving this close share one batch
+MAX_TOKENS_PER_TRACK = 60
+TEMPERATURE = 0.7
+SUMMARY_WORKERS = 2
+BACKEND_RETRY_S = 300  # after a backend failure, use templates for this long
+
+_cache = TTLCache("summaries", SUMMARY_TTL_S)
+_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=SUMMARY_WORKERS, thread_name_prefix="summary"
+)
+_lock = threading.Lock()
+_inflight = {}  # fingerprint -> Future[str]
+_pending = []  # (track, Future[str]) waiting for the next batch
+_flush_scheduled = False
+_client = None
+_backend_down_until = 0.0
+
+
+def _api_key():
+    try:
+        import streamlit as st
+
+        return st.secrets["COHERE_API_KEY"]
+    except Exception:
+        return os.getenv("COHERE_API_KEY")
+
+
+def _get_client():
+    """Create the Cohere client on first use (never at import time)."""
+    global _client
+    with _lock:
+        if _client is None:
+            key = _api_key()
+            if not key:
+                return None
+            import cohere
+
+            _client = cohere.Client(key)
+        return _client
+
+
+def _backend_available():
+    return time.time() >= _backend_down_until
+
 
-import cohere
-import streamlit as st
+def _mark_backend_down(e):
+    global _backend_down_until
+    print(f"[SummaryAgent] Cohere error: {e}")
+    _backend_down_until = time.time() + BACKEND_RETRY_S
 
-co = cohere.Client(st.secrets["COHERE_API_KEY"])
+
+def _vocals(track, yes, no, unknown):
+    has = track.get("has_vocals")
+    return unknown if has is None else yes if has else no
+
+
+def _describe(track):
+    return (
+        f"Filename: {track['filename']} | BPM: {track['bpm']} | Key: {track['key']} | "
+        f"Mood: {track['mood']} | Set Role: {track['set_role']} | "
+        f"Vocals: {_vocals(track, 'Yes', 'No', 'Unknown')}"
+    )
+
+
+def _flush():
+    """Run every summary queued during the last BATCH_WINDOW_S as one batch."""
+    global _flush_scheduled
+    time.sleep(BATCH_WINDOW_S)
+    with _lock:
+        batch = _pending[:]
+        _pending.clear()
+        _flush_scheduled = False
+    try:
+        texts = SummaryAgent.generate_batch([t for t, _ in batch])
+    except Exception as e:
+        print(f"[SummaryAgent] Batch failed: {e}")
+        texts = [SummaryAgent.template_summary(t) for t, _ in batch]
+    for (_, fut), text in zip(batch, texts):
+        fut.set_result(text)
 
 
 class SummaryAgent:
@@ -23,27 +109,192 @@ class SummaryAgent:
     """
 
     @staticmethod
-    def generate_summary(filename, bpm, key, mood, set_role, has_vocals):
-        prompt = (
-            f"Create a 1-line summary for a DJ track with the following metadata:\n"
-            f"Filename: {filename}\n"
-            f"BPM: {bpm}\n"
-            f"Key: {key}\n"
-            f"Mood: {mood}\n"
-            f"Set Role: {set_role}\n"
-            f"Vocals: {'Yes' if has_vocals else 'No'}\n\n"
-            f"Summary:"
+    def _track(filename, bpm, key, mood, set_role, has_vocals):
+        return {
+            "filename": filename,
+            "bpm": bpm,
+            "key": key,
+            "mood": mood,
+            "set_role": set_role,
+            "has_vocals": None if has_vocals is None else bool(has_vocals),
+        }
+
+    @staticmethod
+    def fingerprint(track):
+        """Stable cache key for a (filename, bpm, key, mood, role, vocals) tuple."""
+        bpm = track["bpm"]
+        try:
+            bpm = round(float(bpm))
+        except (TypeError, ValueError):
+            pass
+        raw = "|".join(
+            str(v)
+            for v in (
+                track["filename"],
+                bpm,
+                track["key"],
+                track["mood"],
+                track["set_role"],
+                track["has_vocals"],
+            )
         )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
+    @staticmethod
+    def template_summary(track):
+        """Deterministic local summary used whenever no LLM backend is reachable."""
         try:
-            response = co.generate(prompt=prompt, max_tokens=60, temperature=0.7)
-            summary = response.generations[0].text.strip()
-            return summary
-
-        except Exception as e:
-            print(f"[SummaryAgent] Cohere error: {e}")
-            # graceful fallback
-            return f"{filename} | BPM: {bpm} | Key: {key} | Mood: {mood} | Role: {set_role} | Vocals: {'Yes' if has_vocals else 'No'}"
+            bpm = f"{round(float(track['bpm']))} BPM"
+        except (TypeError, ValueError):
+            bpm = "unknown tempo"
+        vocals = _vocals(track, " vocal-led", " instrumental", "")
+        return (
+            f"{track['mood']}{vocals} track at {bpm} in {track['key']} — "
+            f"fits the {track['set_role']} slot."
+        )
+
+    @staticmethod
+    def generate_batch(tracks):
+        """
+        Summaries for many tracks: cache hits first, then one LLM request per
+        BATCH_MAX misses, and the local template for anything still missing.
+
+        Args:
+            tracks: list of dicts with filename, bpm, key, mood, set_role, has_vocals.
+
+        Returns:
+            list[str]: one summary per input track, same order.
+        """
+        out = [None] * len(tracks)
+        misses = []
+        for i, t in enumerate(tracks):
+            cached = _cache.get(SummaryAgent.fingerprint(t))
+            if cached:
+                out[i] = cached
+            else:
+                misses.append(i)
+
+        client = _get_client() if misses and _backend_available() else None
+        for start in range(0, len(misses) if client else 0, BATCH_MAX):
+            chunk = misses[start : start + BATCH_MAX]
+            prompt = (
+                "Create a 1-line summary for each DJ track below. Answer with one "
+                "line per track, numbered to match, and nothing else.\n\n"
+                + "\n".join(
+                    f"{n}. {_describe(tracks[i])}" for n, i in enumerate(chunk, 1)
+                )
+                + "\n\nSummaries:"
+            )
+            try:
+                response = client.generate(
+                    prompt=prompt,
+                    max_tokens=MAX_TOKENS_PER_TRACK * len(chunk),
+                    temperature=TEMPERATURE,
+                )
+                text = response.generations[0].text
+            except Exception as e:
+                _mark_backend_down(e)
+                break
+
+            lines = {}
+            for line in text.splitlines():
+                m = re.match(r"\s*(\d+)[.):-]\s*(.+)", line)
+                if m:
+                    lines[int(m.group(1))] = m.group(2).strip()
+            if len(chunk) == 1 and not lines and text.strip():
+                lines[1] = text.strip().splitlines()[0]
+            for n, i in enumerate(chunk, 1):
+                if lines.get(n):
+                    out[i] = lines[n]
+                    _cache.set(SummaryAgent.fingerprint(tracks[i]), lines[n])
+
+        return [
+            s if s is not None else SummaryAgent.template_summary(t)
+            for s, t in zip(out, tracks)
+        ]
+
+    @staticmethod
+    def generate_summary(filename, bpm, key, mood, set_role, has_vocals):
+        """Blocking single-track summary (cache → LLM → template)."""
+        track = SummaryAgent._track(filename, bpm, key, mood, set_role, has_vocals)
+        return SummaryAgent.generate_batch([track])[0]
+
+    @staticmethod
+    def submit_many(tracks):
+        """
+        Generate summaries in the background, batched: tracks submitted
+        together (or within BATCH_WINDOW_S of each other) go out in one LLM
+        request per BATCH_MAX. Concurrent requests for the same fingerprint
+        share one Future.
+
+        Args:
+            tracks: list of dicts with filename, bpm, key, mood, set_role, has_vocals.
+
+        Returns:
+            list[Future[str]]: one per input track, same order.
+        """
+        global _flush_scheduled
+        futures = []
+        with _lock:
+            for track in tracks:
+                fp = SummaryAgent.fingerprint(track)
+                fut = _inflight.get(fp)
+                if fut is None:
+                    fut = concurrent.futures.Future()
+                    _inflight[fp] = fut
+                    fut.add_done_callback(lambda _, fp=fp: _inflight.pop(fp, None))
+                    _pending.append((track, fut))
+                futures.append(fut)
+            if _pending and not _flush_scheduled:
+                _flush_scheduled = True
+                _pool.submit(_flush)
+        return futures
+
+    @staticmethod
+    def submit_summary(filename, bpm, key, mood, set_role, has_vocals):
+        """
+        Generate one summary in the background (see submit_many).
+
+        Returns:
+            Future[str]
+        """
+        track = SummaryAgent._track(filename, bpm, key, mood, set_role, has_vocals)
+        return SummaryAgent.submit_many([track])[0]
+
+    @staticmethod
+    def summaries_or_placeholders(tracks):
+        """
+        Never blocks on the LLM; all cache misses go out as one batch.
+
+        Returns:
+            (list[str], list[Future | None]): per track, the cached summary and
+            None, or the local template plus a Future for the final summary.
+        """
+        texts = [_cache.get(SummaryAgent.fingerprint(t)) for t in tracks]
+        futures = [None] * len(tracks)
+        misses = [i for i, text in enumerate(texts) if not text]
+        live = _backend_available() and _api_key()
+        if misses and live:
+            for i, fut in zip(
+                misses, SummaryAgent.submit_many([tracks[i] for i in misses])
+            ):
+                futures[i] = fut
+        for i in misses:
+            texts[i] = SummaryAgent.template_summary(tracks[i])
+        return texts, futures
+
+    @staticmethod
+    def summary_or_placeholder(filename, bpm, key, mood, set_role, has_vocals):
+        """
+        Never blocks on the LLM.
+
+        Returns:
+            (str, Future | None): the cached summary and None, or the local
+            template plus a Future that resolves to the final summary.
+        """
+        track = SummaryAgent._track(filename, bpm, key, mood, set_role, has_vocals)
+        texts, futures = SummaryAgent.summaries_or_placeholders([track])
+        return texts[0], futures[0]
 
 
 # 🕉️ "This function embodies Saraswati’s clarity — only pure logic shall pass."
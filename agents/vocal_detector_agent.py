@@ -2,64 +2,119 @@
 # 🌐 A fusion of AI + Human creativity, built with sacred precision.
 # 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
 # Created: 2025-07-05 | Version: 0.9.0 | License: MIT + Karma Clause
-import librosa
 import numpy as np
 
+# --- Config: scoring thresholds ----------------------------------------------
+MEAN_DB_MIN = -24
+STD_DB_MIN = 5
+HPR_MIN = 1.4
+FLATNESS_MAX = 0.3
+ZCR_RANGE = (0.025, 0.15)
+ROLLOFF_MIN = 3500  # Vocals typically roll off > 3500Hz
+CONFIDENCE_THRESHOLD = 60
+
+# Piano / ambient override: very harmonic, tonal and static
+PIANO_HPR_MIN = 2.8
+PIANO_FLATNESS_MAX = 0.35
+PIANO_STD_DB_MAX = 6
+PIANO_CONFIDENCE = 20
+
+FEATURE_NAMES = ("mean_db", "std_db", "hpr", "flatness", "zcr", "rolloff")
+
 
 class VocalDetectorAgent:
     @staticmethod
-    def detect(track_path):
-        print(f"[VDE] 🔍 Analyzing vocals for: {track_path}")
-        try:
-            y, sr = librosa.load(track_path, sr=None)
+    def extract_features(track_path):
+        """Decode a track and return the raw features the vocal scoring runs on."""
+        import librosa
+        from agents.audio_decoder import AudioDecoder
+        from agents.streaming_feature_agent import StreamingFeatureAgent, GROUP_LANES
 
-            # === 1. Mel Band Energy ===
-            S = librosa.feature.melspectrogram(
-                y=y, sr=sr, n_mels=128, fmin=300, fmax=3000
-            )
-            db = librosa.power_to_db(S, ref=np.max)
-            mean_db = np.mean(db)
-            std_db = np.std(db)
+        if StreamingFeatureAgent.should_stream(track_path):
+            feats = StreamingFeatureAgent.extract(track_path, GROUP_LANES["vocal"])
+            return {name: feats[name] for name in FEATURE_NAMES}
 
-            # === 2. HPR (vocal has more harmonic energy than percussive)
-            harmonic, percussive = librosa.effects.hpss(y)
-            hpr = np.mean(np.abs(harmonic)) / (np.mean(np.abs(percussive)) + 1e-6)
+        # Thresholds below were tuned on native-rate audio (ZCR, roll-off)
+        y, sr = AudioDecoder.load_for(track_path, "vocal")
 
-            # === 3. Spectral Flatness & ZCR ===
-            flatness = np.mean(librosa.feature.spectral_flatness(y=y))
-            zcr = np.mean(librosa.feature.zero_crossing_rate(y))
+        # === 1. Mel Band Energy ===
+        S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmin=300, fmax=3000)
+        db = librosa.power_to_db(S, ref=np.max)
+        mean_db = np.mean(db)
+        std_db = np.std(db)
 
-            # === 4. New: Low-frequency roll-off — piano hits lower than vocals
-            rolloff = np.mean(
-                librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)
-            )
+        # === 2. HPR (vocal has more harmonic energy than percussive)
+        harmonic, percussive = librosa.effects.hpss(y)
+        hpr = np.mean(np.abs(harmonic)) / (np.mean(np.abs(percussive)) + 1e-6)
+
+        # === 3. Spectral Flatness & ZCR ===
+        flatness = np.mean(librosa.feature.spectral_flatness(y=y))
+        zcr = np.mean(librosa.feature.zero_crossing_rate(y))
+
+        # === 4. New: Low-frequency roll-off — piano hits lower than vocals
+        rolloff = np.mean(
+            librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)
+        )
+
+        return {
+            "mean_db": float(mean_db),
+            "std_db": float(std_db),
+            "hpr": float(hpr),
+            "flatness": float(flatness),
+            "zcr": float(zcr),
+            "rolloff": float(rolloff),
+        }
 
+    @staticmethod
+    def score_features(features):
+        """
+        Vectorized vocal decision over one or many feature dicts.
+
+        Returns:
+            (has_vocals, confidence): boolean and integer arrays of shape (N,).
+        """
+        if isinstance(features, dict):
+            features = [features]
+        X = {
+            name: np.array([float(f[name]) for f in features], dtype=np.float64)
+            for name in FEATURE_NAMES
+        }
+
+        # === 5. Scoring ===
+        score = (
+            (X["mean_db"] > MEAN_DB_MIN).astype(int)
+            + (X["std_db"] > STD_DB_MIN)
+            + (X["hpr"] > HPR_MIN)
+            + (X["flatness"] < FLATNESS_MAX)
+            + ((X["zcr"] > ZCR_RANGE[0]) & (X["zcr"] < ZCR_RANGE[1]))
+            + (X["rolloff"] > ROLLOFF_MIN)
+        )
+        confidence = np.round(score / 6 * 100).astype(int)
+        has_vocals = confidence >= CONFIDENCE_THRESHOLD
+
+        # Penalize very low-energy harmonic music (piano, ambient)
+        piano = (
+            (X["hpr"] > PIANO_HPR_MIN)
+            & (X["flatness"] < PIANO_FLATNESS_MAX)
+            & (X["std_db"] < PIANO_STD_DB_MAX)
+        )
+        has_vocals = np.where(piano, False, has_vocals)
+        confidence = np.where(piano, PIANO_CONFIDENCE, confidence)
+        return has_vocals, confidence
+
+    @staticmethod
+    def detect(track_path):
+        print(f"[VDE] 🔍 Analyzing vocals for: {track_path}")
+        try:
+            f = VocalDetectorAgent.extract_features(track_path)
             print(
-                f"[VDE] dB={mean_db:.2f}, std={std_db:.2f}, HPR={hpr:.2f}, Flat={flatness:.3f}, ZCR={zcr:.3f}, Rolloff={rolloff:.0f}"
+                f"[VDE] dB={f['mean_db']:.2f}, std={f['std_db']:.2f}, HPR={f['hpr']:.2f}, Flat={f['flatness']:.3f}, ZCR={f['zcr']:.3f}, Rolloff={f['rolloff']:.0f}"
             )
 
-            # === 5. Scoring ===
-            score = 0
-            if mean_db > -24:
-                score += 1
-            if std_db > 5:
-                score += 1
-            if hpr > 1.4:
-                score += 1
-            if flatness < 0.3:
-                score += 1
-            if 0.025 < zcr < 0.15:
-                score += 1
-            if rolloff > 3500:
-                score += 1  # Vocals typically roll off > 3500Hz
-
-            # Penalize very low-energy harmonic music (piano, ambient)
-            if hpr > 2.8 and flatness < 0.35 and std_db < 6:
+            has_vocals, confidence = VocalDetectorAgent.score_features(f)
+            if confidence[0] == PIANO_CONFIDENCE and not has_vocals[0]:
                 print("[VDE] 🚫 Likely piano or ambient — overriding vocals")
-                return False, 20
-
-            confidence = round((score / 6) * 100)
-            return confidence >= 60, confidence
+            return bool(has_vocals[0]), int(confidence[0])
 
         except Exception as e:
             print(f"[VDE] ❌ ERROR: {e}")
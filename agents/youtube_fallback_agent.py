@@ -2,54 +2,218 @@
 # 🌐 A fusion of AI + Human creativity, built with sacred precision.
 # 🧠 Modular Agent-Based Architecture | 🎵 Pro DJ Tools | ⚛️ Future Sound Intelligence
 import os
-import tempfile
-from yt_dlp import YoutubeDL
-from youtube_search import YoutubeSearch
+import threading
+import concurrent.futures
+
+from utils.cache import TTLCache, LRUFileStore
+
+# --- Config ------------------------------------------------------------------
+DOWNLOAD_WORKERS = int(os.getenv("MOODMIXR_YT_WORKERS", "3"))
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("MOODMIXR_YT_CACHE_MB", "1024")) * 1024 * 1024
+SEARCH_TTL_S = 7 * 24 * 3600
+TRANSCODE_CODEC = "mp3"
+TRANSCODE_QUALITY = "128"
+
+
+def _youtube_search(query):
+    """Default search backend: first YouTube result as {"id", "url"} or None."""
+    from youtube_search import YoutubeSearch
+
+    results = YoutubeSearch(query, max_results=1).to_dict()
+    if not results:
+        return None
+    return {
+        "id": results[0].get("id"),
+        "url": f"https://www.youtube.com{results[0]['url_suffix']}",
+    }
+
+
+def _ytdlp_download(url, out_base, max_seconds=None, transcode=True):
+    """
+    Default download backend (yt-dlp). Writes `<out_base>.<ext>` and returns its path.
+
+    max_seconds: only fetch the first N seconds of the stream.
+    transcode:   convert to mp3 with FFmpeg; False keeps the native stream (webm/m4a).
+    """
+    from yt_dlp import YoutubeDL
+
+    ydl_opts = {
+        "format": "bestaudio/best",
+        "outtmpl": f"{out_base}.%(ext)s",
+        "quiet": True,
+        "noprogress": True,
+    }
+    if transcode:
+        ydl_opts["postprocessors"] = [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": TRANSCODE_CODEC,
+                "preferredquality": TRANSCODE_QUALITY,
+            }
+        ]
+    if max_seconds:
+        from yt_dlp.utils import download_range_func
+
+        ydl_opts["download_ranges"] = download_range_func(None, [(0, max_seconds)])
+
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+    downloads = info.get("requested_downloads") or []
+    if downloads and downloads[0].get("filepath"):
+        return downloads[0]["filepath"]
+    return f"{out_base}.{TRANSCODE_CODEC if transcode else info.get('ext', 'webm')}"
 
 
 class YouTubeFallbackAgent:
+    """
+    Download manager for YouTube fallback audio: a bounded worker pool,
+    in-flight de-duplication by query and by video ID, and a persistent
+    size-capped audio cache. Backends can be swapped with configure().
+    """
+
+    search_backend = staticmethod(_youtube_search)
+    download_backend = staticmethod(_ytdlp_download)
+
+    _lock = threading.Lock()
+    _pool = None
+    _inflight_queries = {}  # query key -> Future[(path, url)]
+    _inflight_videos = {}  # video key -> Future[path]
+    _search_cache = None
+    _audio_store = None
+
+    @classmethod
+    def configure(cls, search=None, download=None, workers=None, cache_dir=None):
+        """Swap backends (e.g. local fakes in tests), pool size or cache namespace."""
+        with cls._lock:
+            if search is not None:
+                cls.search_backend = staticmethod(search)
+            if download is not None:
+                cls.download_backend = staticmethod(download)
+            if workers is not None:
+                if cls._pool is not None:
+                    cls._pool.shutdown(wait=False)
+                cls._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="yt-dl"
+                )
+            if cache_dir is not None:
+                cls._search_cache = TTLCache(f"{cache_dir}_search", SEARCH_TTL_S)
+                cls._audio_store = LRUFileStore(cache_dir, AUDIO_CACHE_MAX_BYTES)
+
+    @classmethod
+    def _ensure_ready(cls):
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=DOWNLOAD_WORKERS, thread_name_prefix="yt-dl"
+                )
+            if cls._audio_store is None:
+                cls._search_cache = TTLCache("youtube_search", SEARCH_TTL_S)
+                cls._audio_store = LRUFileStore("youtube_audio", AUDIO_CACHE_MAX_BYTES)
+
+    @classmethod
+    def _fetch_video(cls, video, max_seconds, transcode):
+        """Return a cached/downloaded path for a video, sharing concurrent downloads."""
+        vkey = f"{video['id'] or video['url']}|{max_seconds or 'full'}|{int(transcode)}"
+        path = cls._audio_store.get(vkey)
+        if path:
+            return path
+
+        with cls._lock:
+            fut = cls._inflight_videos.get(vkey)
+            owner = fut is None
+            if owner:
+                fut = concurrent.futures.Future()
+                cls._inflight_videos[vkey] = fut
+        if not owner:
+            return fut.result()
+
+        try:
+            print(f"[YouTubeFallbackAgent] Downloading from: {video['url']}")
+            path = cls.download_backend(
+                video["url"], cls._audio_store.base_path(vkey), max_seconds, transcode
+            )
+            cls._audio_store.trim()
+            fut.set_result(path)
+            return path
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with cls._lock:
+                cls._inflight_videos.pop(vkey, None)
+
+    @classmethod
+    def _run(cls, query, max_seconds, transcode):
+        print(f"[YouTubeFallbackAgent] Searching for: {query}")
+        video = cls._search_cache.get_or_compute(
+            query.strip().lower(), lambda: cls.search_backend(query)
+        )
+        if not video:
+            print("[YouTubeFallbackAgent] No results found.")
+            return None, None
+        path = cls._fetch_video(video, max_seconds, transcode)
+        print(f"[YouTubeFallbackAgent] Download complete: {path}")
+        return path, video["url"]
+
+    @classmethod
+    def submit(cls, query, max_seconds=None, transcode=True):
+        """
+        Queue a download on the worker pool. Identical in-flight requests share
+        one Future instead of downloading twice.
+
+        Returns:
+            Future[(str, str)]: resolves to (file_path, video_url).
+        """
+        cls._ensure_ready()
+        qkey = f"{query.strip().lower()}|{max_seconds or 'full'}|{int(transcode)}"
+        with cls._lock:
+            fut = cls._inflight_queries.get(qkey)
+            if fut is not None:
+                return fut
+            fut = cls._pool.submit(cls._run, query, max_seconds, transcode)
+            cls._inflight_queries[qkey] = fut
+
+        def _forget(_):
+            with cls._lock:
+                if cls._inflight_queries.get(qkey) is fut:
+                    del cls._inflight_queries[qkey]
+
+        fut.add_done_callback(_forget)
+        return fut
+
     @staticmethod
-    def download_audio(query: str) -> tuple[str, str] | tuple[None, None]:
+    def download_audio(
+        query: str, max_seconds=None, transcode=True
+    ) -> tuple[str, str] | tuple[None, None]:
         """
         Downloads the best audio version of the first YouTube search result.
 
         Args:
             query (str): Search term (e.g., track name + artist).
+            max_seconds (int | None): Only fetch the first N seconds.
+            transcode (bool): Convert to mp3; False keeps the native stream.
 
         Returns:
             (str, str): Tuple of (file_path, video_url), or (None, None) on failure.
+            The file lives in the shared audio cache — callers must not delete it.
         """
         try:
-            print(f"[YouTubeFallbackAgent] Searching for: {query}")
-            results = YoutubeSearch(query, max_results=1).to_dict()
-            if not results:
-                print("[YouTubeFallbackAgent] No results found.")
-                return None, None
-
-            url_suffix = results[0]["url_suffix"]
-            url = f"https://www.youtube.com{url_suffix}"
-            print(f"[YouTubeFallbackAgent] Downloading from: {url}")
-
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-            ydl_opts = {
-                "format": "bestaudio/best",
-                "outtmpl": temp_file.name,
-                "quiet": True,
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "128",
-                    }
-                ],
-            }
-
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-
-            print(f"[YouTubeFallbackAgent] Download complete: {temp_file.name}")
-            return temp_file.name, url
-
+            return YouTubeFallbackAgent.submit(query, max_seconds, transcode).result()
         except Exception as e:
             print(f"[YouTubeFallbackAgent] Error during download: {e}")
             return None, None
+
+    @staticmethod
+    def download_many(queries, max_seconds=None, transcode=True):
+        """Download several queries concurrently; results keep input order."""
+        futures = [
+            YouTubeFallbackAgent.submit(q, max_seconds, transcode) for q in queries
+        ]
+        out = []
+        for q, fut in zip(queries, futures):
+            try:
+                out.append(fut.result())
+            except Exception as e:
+                print(f"[YouTubeFallbackAgent] Error during download of {q}: {e}")
+                out.append((None, None))
+        return out
@@ -6,6 +6,7 @@
 # moodmixr_agent.py
 
 import os
+from agents.audio_agent import AudioAnalyzerAgent
 from agents.mood_agent import MoodClassifierAgent as MoodAgent
 from agents.genre_classifier_agent import GenreClassifierAgent
 from agents.vocal_detector_agent import VocalDetectorAgent
@@ -29,7 +30,8 @@ def run_moodmixr_agent(track_path):
               set role, and transition suggestions.
     """
     # 🔍 Audio Features
-    bpm, key = AudioAnalyzerAgent.analyze(track_path)
+    audio = AudioAnalyzerAgent.analyze(track_path)
+    bpm, key = audio.get("bpm"), audio.get("key")
     mood, energy = MoodAgent.analyze(track_path)
 
     # 🧠 Additional Intelligence
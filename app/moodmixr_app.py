@@ -14,23 +14,32 @@
 import os
 import sys
 import streamlit as st
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-import numpy as np
-import soundfile as sf
-from PIL import Image
-from io import BytesIO
 import datetime
 import concurrent.futures
 
+# librosa, matplotlib, soundfile and PIL are imported inside the pages that use
+# them so a cold start only pays for what the selected page needs.
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from agents.layout_agent import LayoutAgent
+from agents.audio_decoder import AudioDecoder
+from agents.analysis_engine import AnalysisEngine, AUDIO_FEATURES
 from agents.vocal_detector_agent import VocalDetectorAgent
+from agents.feature_store_agent import FeatureStoreAgent
+from agents.metadata_agent import MetadataAgent
+from agents.probe_agent import ProbeAgent
 from agents.set_optimizer_agent import SetOptimizerAgent
 from agents.transition_agent import TransitionRecommenderAgent
-from utils.api_client import call_audio_agent_api, call_mood_agent_api
+from utils.api_client import (
+    cache_local_analysis,
+    call_audio_agent_api,
+    call_mood_agent_api,
+    local_audio_analysis,
+    local_mood_analysis,
+)
+from utils.concurrency import status as concurrency_status
+from utils.hedging import hedged, status as hedging_status
 from utils.utils import (
     extract_album_art,
     extract_track_metadata,
@@ -40,7 +49,6 @@ from utils.utils import (
 from agents.summary_agent import SummaryAgent
 from agents.genre_classifier_agent import GenreClassifierAgent
 
-NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 
 # === Streamlit Config ===
 st.set_page_config(page_title="MoodMixr", layout="wide")
@@ -54,8 +62,12 @@ page = st.sidebar.radio(
 # 🔁 Call Audio Agent via Docker (or local service)
 def run_moodmixr_agent(track_path: str) -> dict:
     """Analyze a single track using Docker agents with graceful fallbacks."""
-    # 1) AUDIO (BPM/Key) via HTTP agents
-    audio_result = call_audio_agent_api(track_path)
+    # 1) AUDIO (BPM/Key) via HTTP agents, hedged with the same analysis locally
+    audio_result, audio_source = hedged(
+        "audio",
+        lambda: call_audio_agent_api(track_path),
+        lambda: local_audio_analysis(track_path),
+    )
 
     # accept both lower/upper-case keys and a common alias
     bpm_value = (
@@ -70,14 +82,11 @@ def run_moodmixr_agent(track_path: str) -> dict:
         st.error(f"❌ Audio Agent payload: {audio_result}")
         # ---- EMERGENCY LOCAL FALLBACK (no network / schema mismatch) ----
         try:
-            # Adjust variable names for librosa
-            y_audio, sr_audio = librosa.load(track_path, sr=None, mono=True)
-
-            tempo, _ = librosa.beat.beat_track(y=y_audio, sr=sr_audio)
-            bpm_value = float(tempo)
-
-            chroma = librosa.feature.chroma_cqt(y=y_audio, sr=sr_audio).mean(axis=1)
-            key_value = NOTE_NAMES[int(np.argmax(chroma))]
+            local = AnalysisEngine.analyze(track_path, AUDIO_FEATURES)
+            if local.get("error"):
+                raise ValueError(local["error"])
+            bpm_value = bpm_value or local["bpm"]
+            key_value = key_value or local["key"]
             st.warning("Used local fallback for BPM/Key.")
         except FileNotFoundError as e:
             st.error(f"File not found: {e}")
@@ -99,8 +108,16 @@ def run_moodmixr_agent(track_path: str) -> dict:
         st.write("Fallback BPM:", bpm_value)
         st.write("Fallback Key:", key_value)
 
-    # 2) MOOD/ENERGY via HTTP agents
-    mood_result = call_mood_agent_api(track_path)
+    # 2) MOOD/ENERGY via HTTP agents (hedged the same way)
+    mood_result, mood_source = hedged(
+        "mood",
+        lambda: call_mood_agent_api(track_path),
+        lambda: local_mood_analysis(track_path),
+    )
+    sources = {"audio": audio_source, "mood": mood_source}
+    local_parts = [name for name, src in sources.items() if src == "local"]
+    if local_parts:
+        st.info(f"Agent slow or down, analyzed locally: {', '.join(local_parts)}")
     mood_value = (
         mood_result.get("mood")
         or mood_result.get("Mood")
@@ -162,7 +179,10 @@ def run_moodmixr_agent(track_path: str) -> dict:
         st.error(f"OS error: {e}")
 
     try:
-        vocals, confidence = VocalDetectorAgent.detect(track_path)
+        # Raw features are persisted so vocal thresholds can be re-tuned offline
+        record = FeatureStoreAgent.extract(track_path, groups=("vocal",))
+        has_vocals, vocal_conf = VocalDetectorAgent.score_features(record["features"])
+        vocals, confidence = bool(has_vocals[0]), int(vocal_conf[0])
     except FileNotFoundError as e:
         vocals, confidence = False, 0.0
         st.error(f"File not found: {e}")
@@ -178,6 +198,9 @@ def run_moodmixr_agent(track_path: str) -> dict:
     except OSError as e:
         vocals, confidence = False, 0.0
         st.error(f"OS error: {e}")
+    except Exception as e:
+        vocals, confidence = False, 0.0
+        st.error(f"Vocal detection error: {e}")
 
     try:
         role = SetOptimizerAgent.classify_role(bpm_value, energy_value)
@@ -217,7 +240,9 @@ def run_moodmixr_agent(track_path: str) -> dict:
         transitions = []
         st.error(f"OS error: {e}")
 
-    summary = SummaryAgent.generate_summary(
+    # The LLM summary never blocks the numeric results: we get the cached text
+    # (or a local template) now, plus a Future the page resolves at the end.
+    summary, summary_future = SummaryAgent.summary_or_placeholder(
         filename=os.path.basename(track_path),
         bpm=bpm_value,
         key=key_value,
@@ -232,6 +257,7 @@ def run_moodmixr_agent(track_path: str) -> dict:
         "HasVocals": vocals,
         "VocalConfidence": confidence,
         "Summary": summary,
+        "SummaryFuture": summary_future,
         "BPM": bpm_value,
         "Key": key_value,
         "Energy": energy_value,
@@ -263,31 +289,20 @@ if page == "Agent Analyzer":
                 f.write(uploaded_file.getbuffer())
             uploaded_paths.append(file_path)
 
+        # Header probe only: no decode, works for MP3/M4A too
         track_info_display = []
         for path in uploaded_paths:
-            try:
-                f = sf.SoundFile(path)
-                duration_sec = len(f) / f.samplerate
-                minutes = int(duration_sec // 60)
-                seconds = int(duration_sec % 60)
-                size_mb = os.path.getsize(path) / (1024 * 1024)
-                ext = os.path.splitext(path)[1][1:].upper()
-                display = f"{os.path.basename(path)} | {minutes}m {seconds}s | {size_mb:.1f} MB | {ext}"
-            except FileNotFoundError as e:
-                display = os.path.basename(path)
-                st.error(f"File not found: {e}")
-            except ValueError as e:
-                display = os.path.basename(path)
-                st.error(f"Value error: {e}")
-            except KeyError as e:
-                display = os.path.basename(path)
-                st.error(f"Key error: {e}")
-            except TypeError as e:
-                display = os.path.basename(path)
-                st.error(f"Type error: {e}")
-            except OSError as e:
-                display = os.path.basename(path)
-                st.error(f"OS error: {e}")
+            name = os.path.basename(path)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            ext = os.path.splitext(path)[1][1:].upper()
+            info = ProbeAgent.probe(path)
+            if info:
+                minutes = int(info["duration_sec"] // 60)
+                seconds = int(info["duration_sec"] % 60)
+                display = f"{name} | {minutes}m {seconds}s | {ProbeAgent.describe(info)} | {size_mb:.1f} MB | {ext}"
+            else:
+                display = f"{name} | {size_mb:.1f} MB | {ext}"
+            track_info_display.append(display)
 
         selected_display = st.selectbox("Choose a track to analyze", track_info_display)
         selected_index = track_info_display.index(selected_display)
@@ -324,7 +339,13 @@ if page == "Agent Analyzer":
 
         # === WAVEFORM VISUALIZATION ===
         try:
-            y, sr = librosa.load(selected_path)
+            from io import BytesIO
+            import librosa
+            import librosa.display
+            import matplotlib.pyplot as plt
+            from PIL import Image
+
+            y, sr = AudioDecoder.load_for(selected_path, "display")
             fig, ax = plt.subplots(figsize=(10, 3), facecolor="#0D0D0D")
 
             librosa.display.waveshow(y, sr=sr, color=mood_color, alpha=0.85)
@@ -386,12 +407,22 @@ if page == "Agent Analyzer":
         st.markdown(
             f"**Vocals**: {'Yes' if result['HasVocals'] else 'No'} ({result['VocalConfidence']}%)"
         )
-        st.markdown(f"**Summary**: `{result['Summary']}`")
+        summary_slot = st.empty()
+        summary_slot.markdown(f"**Summary**: `{result['Summary']}`")
 
         st.markdown("**Transitions:**")
         for suggestion in result["Suggestions"]:
             st.markdown(f"- {suggestion}")
 
+        # Everything above is already on screen; swap in the AI summary when ready
+        if result.get("SummaryFuture") is not None:
+            try:
+                summary_slot.markdown(
+                    f"**Summary**: `{result['SummaryFuture'].result(timeout=60)}`"
+                )
+            except concurrent.futures.TimeoutError:
+                pass
+
 # === SET FLOW DESIGNER TAB ===
 elif page == "Set Flow Designer":
     from utils.api_client import analyze_batch, ping_agents
@@ -404,8 +435,37 @@ elif page == "Set Flow Designer":
     uploaded_tracks = st.file_uploader(
         "Upload DJ set tracks", type=["mp3", "wav", "flac"], accept_multiple_files=True
     )
+    run_in_background = st.checkbox(
+        "Run in background (job service)",
+        help="Queue the analysis; you can close the tab and come back to this URL.",
+    )
 
-    if uploaded_tracks:
+    # Job ids live in the URL too, so a reopened tab picks the batch back up
+    if "set_jobs" not in st.session_state:
+        ids = st.query_params.get("jobs", "")
+        st.session_state.set_jobs = [j for j in ids.split(",") if j]
+
+    if uploaded_tracks and run_in_background:
+        from utils.api_client import upload_job
+
+        audio_dir = os.path.join("app", "audio")
+        os.makedirs(audio_dir, exist_ok=True)
+        submitted = st.session_state.setdefault("set_jobs_submitted", {})
+        for f in uploaded_tracks:
+            if f.name in submitted:
+                continue
+            temp_path = os.path.join(audio_dir, f.name)
+            with open(temp_path, "wb") as out:
+                out.write(f.getbuffer())
+            try:
+                job = upload_job(temp_path, priority="interactive")
+                submitted[f.name] = job["id"]
+                st.session_state.set_jobs.append(job["id"])
+            except Exception as e:
+                st.warning(f"Could not queue {f.name}: {e}")
+        st.query_params["jobs"] = ",".join(st.session_state.set_jobs)
+
+    elif uploaded_tracks:
         # Persist uploads to disk (agents read files)
         audio_dir = os.path.join("app", "audio")
         os.makedirs(audio_dir, exist_ok=True)
@@ -422,14 +482,27 @@ elif page == "Set Flow Designer":
 
         ping = ping_agents()
         with st.expander("Agent status"):
-            st.json(ping)
+            st.json(
+                {
+                    **ping,
+                    "hedging": hedging_status(),
+                    "concurrency": concurrency_status(),
+                }
+            )
 
         # Prepare files and names for analyze_batch
         file_bytes = [f.getbuffer() for f in uploaded_tracks]
         file_names = [f.name for f in uploaded_tracks]
 
+        eta_line = st.empty()
+
+        def _show_eta(seconds_left, done, total):
+            left = f" · ~{seconds_left:.0f}s left" if seconds_left else ""
+            eta_line.caption(f"Analyzed {done}/{total}{left}")
+
         with st.spinner("Analyzing tracks with MoodMixr agents..."):
-            batch = analyze_batch(file_bytes, file_names)
+            batch = analyze_batch(file_bytes, file_names, on_eta=_show_eta)
+        eta_line.empty()
 
         # Merge results into the session queue once per file
         existing_files = {t.get("filename") for t in st.session_state.dj_set_queue}
@@ -474,7 +547,9 @@ elif page == "Set Flow Designer":
                 }
             )
 
-        # Run local librosa fallbacks in parallel for entries that truly need it
+        # Local fallbacks for entries that truly need it, in the engine's
+        # process pool (librosa holds the GIL, threads barely overlap). Results
+        # go into the analysis cache so a track falls back at most once.
         fallback_indices = [
             i
             for i, p in enumerate(prepared)
@@ -482,45 +557,35 @@ elif page == "Set Flow Designer":
             and ((not p["bpm"] or p["bpm"] == 0.0) or (not p["key"] or p["key"] == "?"))
         ]
 
-        def _compute_bpm_key(pth: str):
-            try:
-                y_local, sr_local = librosa.load(pth, sr=None, mono=True)
-                tempo_local, _ = librosa.beat.beat_track(y=y_local, sr=sr_local)
-                bpm_val = float(tempo_local) if tempo_local else None
-                chroma_local = librosa.feature.chroma_cqt(y=y_local, sr=sr_local).mean(
-                    axis=1
-                )
-                key_guess = NOTE_NAMES[int(np.argmax(chroma_local))]
-                return bpm_val, key_guess
-            except Exception:
-                return None, None
-
         if fallback_indices:
-            max_workers = min(4, (os.cpu_count() or 1))
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-                futures = {
-                    ex.submit(_compute_bpm_key, prepared[i]["path"]): i
-                    for i in fallback_indices
-                }
-                for fut in concurrent.futures.as_completed(futures):
-                    i = futures[fut]
-                    try:
-                        bpm_val, key_guess = fut.result()
-                        if bpm_val:
-                            prepared[i]["bpm"] = float(bpm_val)
-                        if key_guess and (
-                            not prepared[i]["key"] or prepared[i]["key"] == "?"
-                        ):
-                            prepared[i]["key"] = key_guess
-                        prepared[i]["used_fallback"] = bool(bpm_val or key_guess)
-                        if prepared[i]["used_fallback"]:
-                            st.warning(
-                                f"Used local fallback for {prepared[i]['filename']}: BPM={prepared[i]['bpm']}, Key={prepared[i]['key']}"
-                            )
-                    except Exception as e:
-                        st.info(
-                            f"Local fallback failed for {prepared[i]['filename']}: {e}"
+            futures = {
+                AnalysisEngine.submit(prepared[i]["path"], AUDIO_FEATURES): i
+                for i in fallback_indices
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                i = futures[fut]
+                try:
+                    local = fut.result()
+                    if local.get("error"):
+                        raise RuntimeError(local["error"])
+                    cache_local_analysis(prepared[i]["path"], local)
+                    bpm_val, key_guess = local.get("bpm") or None, local.get("key")
+                    if bpm_val:
+                        prepared[i]["bpm"] = float(bpm_val)
+                    if key_guess and (
+                        not prepared[i]["key"] or prepared[i]["key"] == "?"
+                    ):
+                        prepared[i]["key"] = key_guess
+                    prepared[i]["used_fallback"] = bool(bpm_val or key_guess)
+                    if prepared[i]["used_fallback"]:
+                        st.warning(
+                            f"Used local fallback for {prepared[i]['filename']}: BPM={prepared[i]['bpm']}, Key={prepared[i]['key']}"
                         )
+                except Exception as e:
+                    st.info(f"Local fallback failed for {prepared[i]['filename']}: {e}")
+
+        # Tags for every new track in one parallel pass (cached for later reruns)
+        MetadataAgent.read_many([p["path"] for p in prepared if p])
 
         # Now write debug files and append to session_state
         for p in prepared:
@@ -590,6 +655,60 @@ elif page == "Set Flow Designer":
 
             st.session_state.dj_set_queue.append(track_info)
 
+    if st.session_state.set_jobs:
+        from utils.api_client import get_job
+
+        st.subheader("Background jobs")
+        jobs = []
+        for job_id in st.session_state.set_jobs:
+            try:
+                jobs.append(get_job(job_id))
+            except Exception as e:
+                st.warning(f"Job {job_id[:8]} unavailable: {e}")
+        for job in jobs:
+            progress = (job.get("progress") or {}).get("step") or ""
+            name = job["payload"].get("name") or job["id"][:8]
+            st.write(
+                f"- {name}: **{job['state']}** {progress} {job.get('error') or ''}"
+            )
+        st.button("Refresh job status")
+
+        finished = [j for j in jobs if j["state"] == "succeeded"]
+        if finished and st.button(f"Add {len(finished)} finished track(s) to set"):
+            existing_files = {t.get("filename") for t in st.session_state.dj_set_queue}
+            for job in finished:
+                filename = job["result"]["name"]
+                if filename in existing_files:
+                    continue
+                merged = job["result"].get("merged") or {}
+                path = os.path.join("app", "audio", filename)
+                meta = extract_track_metadata(path) if os.path.exists(path) else {}
+                bpm, energy = merged.get("bpm"), merged.get("energy")
+                st.session_state.dj_set_queue.append(
+                    {
+                        "name": meta.get("title", filename),
+                        "artist": meta.get("artist", "Unknown"),
+                        "bpm": (
+                            round(float(bpm)) if isinstance(bpm, (int, float)) else 0
+                        ),
+                        "key": merged.get("key") or "?",
+                        "mood": merged.get("mood") or "Unknown",
+                        "energy": (
+                            round(float(energy), 2)
+                            if isinstance(energy, (int, float))
+                            else 0.5
+                        ),
+                        "file_path": path,
+                        "filename": filename,
+                    }
+                )
+            done_ids = {j["id"] for j in finished}
+            st.session_state.set_jobs = [
+                j for j in st.session_state.set_jobs if j not in done_ids
+            ]
+            st.query_params["jobs"] = ",".join(st.session_state.set_jobs)
+            st.rerun()
+
     # DJ Set Queue
     if st.session_state.dj_set_queue:
         st.subheader("Current DJ Set Queue")
@@ -603,10 +722,28 @@ elif page == "Set Flow Designer":
                 st.success("Set optimized — order updated.")
             except Exception as e:
                 st.warning(f"Optimization failed: {e}")
-        for track in st.session_state.dj_set_queue:
+        # One batched LLM request for every queued track without a cached
+        # summary; templates show until it answers (resolved at the end)
+        summaries, summary_futures = SummaryAgent.summaries_or_placeholders(
+            [
+                {
+                    "filename": t["filename"],
+                    "bpm": t["bpm"],
+                    "key": t["key"],
+                    "mood": t["mood"],
+                    "set_role": SetOptimizerAgent.classify_role(t["bpm"], t["energy"]),
+                    "has_vocals": t.get("has_vocals"),
+                }
+                for t in st.session_state.dj_set_queue
+            ]
+        )
+        summary_slots = []
+        for track, summary in zip(st.session_state.dj_set_queue, summaries):
             st.write(
                 f"- {track['name']} by {track['artist']} (BPM: {track['bpm']}, Key: {track['key']})"
             )
+            summary_slots.append(st.empty())
+            summary_slots[-1].caption(summary)
 
         with st.expander("Set Flow Visualization"):
             # Generate and display the energy curve for the current set
@@ -652,5 +789,12 @@ elif page == "Set Flow Designer":
                 except Exception as e:
                     st.warning(f"Could not generate transitions: {e}")
 
+        for slot, fut in zip(summary_slots, summary_futures):
+            if fut is not None:
+                try:
+                    slot.caption(fut.result(timeout=60))
+                except concurrent.futures.TimeoutError:
+                    pass
+
     else:
         st.info("Upload tracks to get started with your DJ set.")
@@ -1,11 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from services.warmup import AnalysisWorkers  # sets librosa/numba cache dirs first
+from services import shared_paths
+from services.singleflight import SingleFlight, content_key
 from services.audio_agent.audio_logic import analyze_audio
-import os, shutil
+import os, shutil, asyncio, tempfile
 
-app = FastAPI()
 UPLOAD_DIR = "/app/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+workers = AnalysisWorkers()
+flights = SingleFlight()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers.start()
+    yield
+    workers.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/ping")
@@ -13,17 +29,50 @@ def ping():
     return {"ok": True, "service": "audio"}
 
 
-def _process(upload: UploadFile):
-    file_location = os.path.join(UPLOAD_DIR, upload.filename)
-    with open(file_location, "wb") as buffer:
+@app.get("/ready")
+def ready():
+    status = {"service": "audio", **workers.status(), "singleflight": flights.status()}
+    return JSONResponse(status_code=200 if workers.ready else 503, content=status)
+
+
+def _remove(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def _analyze(file_path: str, filename: str, cleanup=None):
+    """analyze_audio, shared by concurrent requests for the same audio content."""
+    try:
+        key = await asyncio.to_thread(content_key, file_path)
+    except BaseException:
+        if cleanup:
+            cleanup()
+        raise
+    result = await flights.do(
+        key, lambda: workers.run(analyze_audio, file_path), cleanup=cleanup
+    )
+    return {**result, "filename": filename} if isinstance(result, dict) else result
+
+
+async def _process(upload: UploadFile):
+    # Unique name: identical uploads may arrive while one is being analyzed
+    with tempfile.NamedTemporaryFile(
+        dir=UPLOAD_DIR, suffix=os.path.splitext(upload.filename or "")[1], delete=False
+    ) as buffer:
         shutil.copyfileobj(upload.file, buffer)
-    return analyze_audio(file_location)
+        file_location = buffer.name
+    # Deleted when the shared run finishes, even if this client disconnects
+    return await _analyze(
+        file_location, upload.filename, cleanup=lambda: _remove(file_location)
+    )
 
 
 @app.post("/analyze")
 async def analyze(file: UploadFile = File(...)):
     try:
-        return JSONResponse(content=_process(file))
+        return JSONResponse(content=await _process(file))
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -41,6 +90,25 @@ async def analyze_alias(
             detail="No file provided. Use multipart/form-data with field 'file'.",
         )
     try:
-        return JSONResponse(content=_process(upload))
+        return JSONResponse(content=await _process(upload))
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+class PathRequest(BaseModel):
+    path: str  # relative to MOODMIXR_SHARED_ROOT
+
+
+@app.post("/analyze/path")
+async def analyze_path(req: PathRequest):
+    """Analyze a file on the shared volume in place (no upload)."""
+    try:
+        file_path = shared_paths.resolve(req.path)
+    except shared_paths.SharedPathError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    try:
+        return JSONResponse(
+            content=await _analyze(file_path, os.path.basename(file_path))
+        )
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -0,0 +1,84 @@
+# services/job_agent/cli.py
+# Submit work to the job service and check on it later. Usage:
+#   python -m services.job_agent.cli submit track1.mp3 track2.wav [--priority bulk]
+#   python -m services.job_agent.cli scan /library [--features]
+#   python -m services.job_agent.cli status <job_id>
+#   python -m services.job_agent.cli watch <job_id>
+#   python -m services.job_agent.cli list [--state queued]
+#   python -m services.job_agent.cli cancel <job_id>
+import sys, json, argparse
+
+from utils import api_client
+
+
+def _summary(job):
+    progress = job.get("progress") or {}
+    step = f" [{progress.get('step')}]" if progress.get("step") else ""
+    error = f" error={job['error']}" if job.get("error") else ""
+    return (
+        f"{job['id']}  {job['kind']:16} {job['state']:10}"
+        f" attempts={job['attempts']}/{job['max_attempts']}{step}{error}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MoodMixr background jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("submit", help="Upload tracks and queue them for analysis")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--priority", default="interactive")
+
+    p = sub.add_parser("scan", help="Queue every track in a folder the workers can see")
+    p.add_argument("root")
+    p.add_argument("--features", action="store_true", help="Feature store only")
+
+    p = sub.add_parser("status")
+    p.add_argument("job_id")
+
+    p = sub.add_parser("watch", help="Stream a job's state until it finishes")
+    p.add_argument("job_id")
+
+    p = sub.add_parser("list")
+    p.add_argument("--state")
+    p.add_argument("--kind")
+    p.add_argument("--limit", type=int, default=50)
+
+    p = sub.add_parser("cancel")
+    p.add_argument("job_id")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        for path in args.paths:
+            print(_summary(api_client.upload_job(path, priority=args.priority)))
+    elif args.command == "scan":
+        kind = "extract_features" if args.features else "analyze_track"
+        payload = {"root": args.root, "child_kind": kind}
+        print(_summary(api_client.submit_job("library_scan", payload, "bulk")))
+    elif args.command == "status":
+        print(json.dumps(api_client.get_job(args.job_id), indent=2))
+    elif args.command == "watch":
+        job = None
+        for job in api_client.stream_job_events(args.job_id):
+            print(_summary(job))
+        if job and job["state"] == "succeeded":
+            print(json.dumps(job["result"], indent=2))
+        return 0 if job and job["state"] == "succeeded" else 1
+    elif args.command == "list":
+        out = api_client.list_jobs(args.state, args.kind, args.limit)
+        for job in out["jobs"]:
+            print(_summary(job))
+        print(" ".join(f"{k}={v}" for k, v in out["counts"].items()))
+    elif args.command == "cancel":
+        out = api_client.cancel_job(args.job_id)
+        print(
+            "cancelled"
+            if out["cancelled"]
+            else f"not cancelled ({out['job']['state']})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
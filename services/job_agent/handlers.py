@@ -0,0 +1,147 @@
+# services/job_agent/handlers.py
+# Job kinds and the functions that run them inside a worker process. Handlers
+# reuse the same analysis code as the audio/mood services; raising marks the
+# attempt as failed (and retried with backoff while attempts remain).
+import os, json
+from typing import Any, Callable, Dict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ANALYSIS_CACHE_DIR = os.path.join(REPO_ROOT, "data", "analysis_cache")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".aiff", ".aif", ".ogg", ".m4a")
+
+
+class PermanentJobError(Exception):
+    """A failure retrying cannot fix (missing file, bad payload)."""
+
+
+def _require_file(payload: Dict[str, Any]) -> str:
+    path = payload.get("path")
+    if not path or not os.path.isfile(path):
+        raise PermanentJobError(f"file-not-found: {path}")
+    return path
+
+
+def _read_cache(cache_path: str):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cf:
+            return json.load(cf)
+    except (OSError, ValueError):
+        return None
+
+
+def analyze_track(payload: Dict[str, Any], ctx) -> Dict[str, Any]:
+    """Audio + mood analysis of one file, shaped like an analyze_batch item."""
+    from agents.fingerprint_index_agent import FingerprintIndexAgent
+    from agents.probe_agent import ProbeAgent
+    from agents.analysis_engine import AnalysisEngine, FEATURES, FINGERPRINT
+    from utils.api_client import merge_agent_results
+
+    path = _require_file(payload)
+    name = payload.get("name") or os.path.basename(path)
+    # Keyed on the audio payload: a re-tagged file is not analyzed again
+    track_id = ProbeAgent.content_id(path)
+    cache_path = os.path.join(ANALYSIS_CACHE_DIR, f"{track_id}.json")
+    cached = None if payload.get("force") else _read_cache(cache_path)
+    if cached:
+        ctx.progress({"step": "cached", "done": 2, "total": 2})
+        return {
+            "name": name,
+            "ok": True,
+            "audio": cached.get("audio"),
+            "mood": cached.get("mood"),
+            "merged": cached.get("merged"),
+        }
+
+    ctx.progress({"step": "analyze", "done": 0, "total": 2})
+    # One engine pass covers both agents' payloads and the fingerprint
+    result = AnalysisEngine.analyze(path, FEATURES + (FINGERPRINT,))
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    fp = FingerprintIndexAgent.take(result)
+    duration = result.get("duration_sec") or 0.0
+    ctx.progress({"step": "analyzed", "done": 1, "total": 2})
+
+    # Same recording in another format/encode: keep that track's analysis
+    duplicate_of = None
+    if fp is not None and not payload.get("force"):
+        try:
+            duplicate_of = FingerprintIndexAgent.match(fp, duration, (track_id,))
+        except Exception as e:
+            print(f"[JobAgent] Duplicate lookup failed for {path}: {e}")
+    if duplicate_of:
+        cached = _read_cache(
+            os.path.join(ANALYSIS_CACHE_DIR, f"{duplicate_of['track_id']}.json")
+        )
+    if cached:
+        reused = FingerprintIndexAgent.reuse(cached, name, duration)
+        audio, mood, merged = reused["audio"], reused["mood"], reused["merged"]
+    else:
+        duplicate_of = None
+        audio = AnalysisEngine.audio_payload(result)
+        mood = AnalysisEngine.mood_payload(result)
+        merged = merge_agent_results(audio, mood)
+    if fp is not None:
+        FingerprintIndexAgent.add(track_id, fp, duration, name=name, path=path)
+
+    # Same cache analyze_batch reads, so a later upload of this file is instant
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as cf:
+            json.dump({"audio": audio, "mood": mood, "merged": merged}, cf)
+    except OSError as e:
+        print(f"[JobAgent] Could not write analysis cache for {path}: {e}")
+
+    ctx.progress({"step": "done", "done": 2, "total": 2})
+    item = {"name": name, "ok": True, "audio": audio, "mood": mood, "merged": merged}
+    if duplicate_of:
+        item["duplicate_of"] = duplicate_of
+    return item
+
+
+def extract_features(payload: Dict[str, Any], ctx) -> Dict[str, Any]:
+    """Populate the feature store for one file (vocal/mood feature groups)."""
+    from agents.feature_store_agent import FeatureStoreAgent
+
+    path = _require_file(payload)
+    groups = tuple(payload.get("groups") or ("vocal", "mood"))
+    record = FeatureStoreAgent.extract(
+        path, groups=groups, force=payload.get("force", False)
+    )
+    return {"track_id": record.get("track_id"), "path": path, "groups": list(groups)}
+
+
+def library_scan(payload: Dict[str, Any], ctx) -> Dict[str, Any]:
+    """Walk a folder and queue one bulk-priority job per audio file."""
+    root = payload.get("root")
+    if not root or not os.path.isdir(root):
+        raise PermanentJobError(f"folder-not-found: {root}")
+    child_kind = payload.get("child_kind", "analyze_track")
+    if child_kind not in HANDLERS or child_kind == "library_scan":
+        raise PermanentJobError(f"unsupported child kind: {child_kind}")
+
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths += [
+            os.path.join(dirpath, f)
+            for f in sorted(filenames)
+            if f.lower().endswith(AUDIO_EXTENSIONS)
+        ]
+    child_ids = []
+    for i, path in enumerate(sorted(paths), start=1):
+        child_ids.append(
+            ctx.queue.submit(
+                child_kind,
+                {"path": path, "parent": ctx.job_id},
+                priority=payload.get("child_priority", "bulk"),
+            )
+        )
+        if i % 50 == 0:
+            ctx.progress({"step": "queueing", "done": i, "total": len(paths)})
+    return {"root": root, "files": len(paths), "jobs": child_ids}
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any], Any], Dict[str, Any]]] = {
+    "analyze_track": analyze_track,
+    "extract_features": extract_features,
+    "library_scan": library_scan,
+}
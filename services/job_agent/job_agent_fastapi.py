@@ -0,0 +1,120 @@
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from services.job_agent.job_queue import (
+    JobQueue,
+    PRIORITIES,
+    MAX_ATTEMPTS,
+    TERMINAL_STATES,
+)
+from services.job_agent.handlers import HANDLERS
+from services.job_agent.worker import JobWorkers
+import os, json, uuid, shutil, asyncio
+
+UPLOAD_DIR = os.getenv("MOODMIXR_JOB_UPLOADS", "/app/uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+EVENT_POLL_S = 0.5
+queue = JobQueue()
+workers = JobWorkers()
+
+
+class JobRequest(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    priority: str = "default"
+    max_attempts: int = MAX_ATTEMPTS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers.start()
+    yield
+    workers.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _submit(kind, payload, priority, max_attempts=MAX_ATTEMPTS):
+    if kind not in HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+    if priority not in PRIORITIES and not str(priority).lstrip("-").isdigit():
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority}")
+    job_id = queue.submit(kind, payload, priority, max_attempts)
+    return queue.get(job_id)
+
+
+@app.get("/ping")
+def ping():
+    return {"ok": True, "service": "jobs"}
+
+
+@app.get("/ready")
+def ready():
+    status = {"service": "jobs", **workers.status(), "queue": queue.counts()}
+    ok = status["alive"] > 0
+    return JSONResponse(status_code=200 if ok else 503, content=status)
+
+
+@app.post("/jobs")
+def submit_job(req: JobRequest):
+    return _submit(req.kind, req.payload, req.priority, req.max_attempts)
+
+
+@app.post("/jobs/upload")
+def submit_upload(
+    file: UploadFile = File(...),
+    kind: str = Form("analyze_track"),
+    priority: str = Form("interactive"),
+):
+    # Uploads get a private copy the worker deletes once the job is finished
+    name = os.path.basename(file.filename or "upload")
+    path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}_{name}")
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return _submit(kind, {"path": path, "name": name, "cleanup": True}, priority)
+
+
+@app.get("/jobs")
+def list_jobs(
+    state: Optional[str] = None, kind: Optional[str] = None, limit: int = 100
+):
+    return {"jobs": queue.list(state, kind, limit), "counts": queue.counts()}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"cancelled": queue.cancel(job_id), "job": queue.get(job_id)}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one `data:` line per change, closed at a terminal state."""
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            job = await asyncio.to_thread(queue.get, job_id)
+            marker = (job["state"], job["updated_at"], job["attempts"])
+            if marker != last:
+                last = marker
+                yield f"event: {job['state']}\ndata: {json.dumps(job)}\n\n"
+            if job["state"] in TERMINAL_STATES:
+                return
+            await asyncio.sleep(EVENT_POLL_S)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
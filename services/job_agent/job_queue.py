@@ -0,0 +1,267 @@
+# services/job_agent/job_queue.py
+# Persistent SQLite job queue: priorities, retries with exponential backoff,
+# worker heartbeats and recovery of jobs whose worker died mid-run.
+import os, json, time, uuid, random, sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DB_PATH = os.getenv("MOODMIXR_JOB_DB") or os.path.join(
+    REPO_ROOT, "data", "jobs.sqlite3"
+)
+
+# Lower runs first: an interactive single-track request overtakes a library scan
+PRIORITIES = {"interactive": 0, "default": 50, "bulk": 100}
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 300.0
+STALE_AFTER_S = 120.0  # running jobs without a heartbeat for this long are requeued
+
+STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    priority     INTEGER NOT NULL,
+    state        TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after    REAL NOT NULL,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    heartbeat    REAL,
+    worker       TEXT,
+    progress     TEXT,
+    result       TEXT,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, priority, run_after, created_at);
+"""
+
+
+def priority_value(priority) -> int:
+    """Accept a named priority ("interactive", "bulk", ...) or a raw integer."""
+    if isinstance(priority, str) and not priority.lstrip("-").isdigit():
+        return PRIORITIES[priority]
+    return int(priority)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given (1-based) failed attempt."""
+    delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _cleanup_payload(payload: Dict[str, Any]):
+    """Delete an uploaded copy the job owns ("cleanup": true) once it is terminal."""
+    path = payload.get("path")
+    if payload.get("cleanup") and path and os.path.exists(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    job = dict(row)
+    for field in ("payload", "result", "progress"):
+        if job.get(field) is not None:
+            job[field] = json.loads(job[field])
+    return job
+
+
+class JobQueue:
+    """
+    One SQLite file shared by the API process and every worker process.
+    Each call opens its own short-lived connection, so instances are safe to
+    use from threads and to hand to forked workers.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection; claim() opens its own write transaction
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority="default",
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, priority, state, max_attempts,"
+                " run_after, created_at, updated_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (
+                    job_id,
+                    kind,
+                    json.dumps(payload),
+                    priority_value(priority),
+                    max_attempts,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the most urgent runnable job, or None."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE state = 'queued' AND run_after <= ?"
+                    " ORDER BY priority, created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'running', attempts = attempts + 1,"
+                        " started_at = ?, heartbeat = ?, updated_at = ?, worker = ?,"
+                        " error = NULL WHERE id = ?",
+                        (now, now, now, worker, row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def heartbeat(self, job_id: str, progress: Optional[Dict[str, Any]] = None):
+        now = time.time()
+        with self._connect() as conn:
+            if progress is None:
+                conn.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE id = ? AND state = 'running'",
+                    (now, job_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET heartbeat = ?, progress = ?, updated_at = ?"
+                    " WHERE id = ? AND state = 'running'",
+                    (now, json.dumps(progress), now, job_id),
+                )
+
+    def _finished(self, job_id: str):
+        """A job just reached a terminal state: release what its payload owns."""
+        job = self.get(job_id)
+        if job is not None:
+            _cleanup_payload(job["payload"])
+
+    def complete(self, job_id: str, result: Any):
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'succeeded', result = ?, finished_at = ?,"
+                " updated_at = ? WHERE id = ? AND state = 'running'",
+                (json.dumps(result), now, now, job_id),
+            )
+        if cur.rowcount:
+            self._finished(job_id)
+
+    def fail(self, job_id: str, error: str, retry: bool = True) -> str:
+        """Record a failed attempt; requeue with backoff while attempts remain."""
+        job = self.get(job_id)
+        if job is None or job["state"] != "running":
+            return job["state"] if job else "missing"
+        now = time.time()
+        if retry and job["attempts"] < job["max_attempts"]:
+            state, run_after = "queued", now + backoff_delay(job["attempts"])
+        else:
+            state, run_after = "failed", job["run_after"]
+        with self._connect() as conn:
+            # Only the attempt we read: a worker may have completed it, or it
+            # may have been requeued and claimed again, since the get() above
+            cur = conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, run_after = ?, updated_at = ?,"
+                " finished_at = CASE WHEN ? = 'failed' THEN ? ELSE NULL END,"
+                " worker = NULL WHERE id = ? AND state = 'running' AND attempts = ?",
+                (state, error, run_after, now, state, now, job_id, job["attempts"]),
+            )
+            if cur.rowcount == 0:
+                row = conn.execute(
+                    "SELECT state FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+                return row["state"] if row else "missing"
+        if state == "failed":
+            _cleanup_payload(job["payload"])
+        return state
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet (running jobs finish their attempt)."""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'cancelled', finished_at = ?, updated_at = ?"
+                " WHERE id = ? AND state = 'queued'",
+                (now, now, job_id),
+            )
+        if cur.rowcount:
+            self._finished(job_id)
+        return cur.rowcount > 0
+
+    def requeue_stale(self, stale_after_s: float = STALE_AFTER_S) -> int:
+        """
+        Return jobs of crashed workers to the queue (counts as a failed attempt;
+        a job out of attempts ends failed and its upload is deleted).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            stale = conn.execute(
+                "SELECT id FROM jobs WHERE state = 'running' AND heartbeat < ?",
+                (now - stale_after_s,),
+            ).fetchall()
+        for row in stale:
+            self.fail(row["id"], "worker stopped responding")
+        return len(stale)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list(
+        self, state: Optional[str] = None, kind: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        query, args = "SELECT * FROM jobs WHERE 1 = 1", []
+        if state:
+            query += " AND state = ?"
+            args.append(state)
+        if kind:
+            query += " AND kind = ?"
+            args.append(kind)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [_row_to_job(r) for r in conn.execute(query, args).fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"
+            ).fetchall()
+        out = {s: 0 for s in STATES}
+        out.update({r["state"]: r["n"] for r in rows})
+        return out
@@ -0,0 +1,138 @@
+# services/job_agent/worker.py
+# Worker processes for the job queue. Each worker warms up once, then loops:
+# claim the most urgent job, heartbeat while it runs, record the outcome.
+# Usage (standalone, without the API):  python -m services.job_agent.worker [N]
+import os, sys, time, socket, threading, multiprocessing
+
+from services.job_agent.job_queue import JobQueue, DB_PATH, STALE_AFTER_S
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(min(2, os.cpu_count() or 1))))
+POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "1.0"))
+HEARTBEAT_S = 10.0
+REAP_EVERY_S = 30.0  # how often a worker returns crashed workers' jobs to the queue
+
+
+class JobContext:
+    """What a handler may touch: progress reporting and the queue (for fan-out)."""
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    def progress(self, info):
+        self.queue.heartbeat(self.job_id, progress=info)
+
+
+def _heartbeat_loop(queue: JobQueue, job_id: str, stop: threading.Event):
+    while not stop.wait(HEARTBEAT_S):
+        try:
+            queue.heartbeat(job_id)
+        except Exception as e:
+            print(f"[JobWorker] Heartbeat failed for {job_id}: {e}")
+
+
+def run_job(queue: JobQueue, job) -> str:
+    """Run one claimed job to an outcome; returns the job's new state."""
+    from services.job_agent.handlers import HANDLERS, PermanentJobError
+
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        return queue.fail(job["id"], f"unknown job kind: {job['kind']}", retry=False)
+
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=_heartbeat_loop, args=(queue, job["id"], stop), daemon=True
+    )
+    beat.start()
+    started = time.perf_counter()
+    try:
+        result = handler(job["payload"], JobContext(queue, job["id"]))
+        queue.complete(job["id"], result)
+        state = "succeeded"
+    except PermanentJobError as e:
+        state = queue.fail(job["id"], str(e), retry=False)
+    except Exception as e:
+        state = queue.fail(job["id"], f"{type(e).__name__}: {e}")
+    finally:
+        stop.set()
+        beat.join()
+
+    print(
+        f"[JobWorker] {job['kind']} {job['id'][:8]} -> {state}"
+        f" (attempt {job['attempts']}/{job['max_attempts']},"
+        f" {time.perf_counter() - started:.1f}s)"
+    )
+    # Uploaded copies are deleted by the queue once the job is terminal
+    return state
+
+
+def worker_loop(name: str, db_path: str = DB_PATH, stop_event=None, warm=True):
+    """Claim and run jobs until stop_event is set (forever when None)."""
+    if warm:
+        from services.warmup import warm_up
+
+        warm_up()
+    queue = JobQueue(db_path)
+    last_reap = 0.0
+    print(f"[JobWorker] {name} (pid={os.getpid()}) polling {db_path}")
+    while stop_event is None or not stop_event.is_set():
+        if time.time() - last_reap > REAP_EVERY_S:
+            last_reap = time.time()
+            requeued = queue.requeue_stale(STALE_AFTER_S)
+            if requeued:
+                print(f"[JobWorker] Requeued {requeued} stale job(s)")
+        job = queue.claim(name)
+        if job is None:
+            if stop_event is not None:
+                stop_event.wait(POLL_INTERVAL_S)
+            else:
+                time.sleep(POLL_INTERVAL_S)
+            continue
+        run_job(queue, job)
+
+
+class JobWorkers:
+    """A set of worker processes started/stopped with the job API's lifespan."""
+
+    def __init__(self, workers=JOB_WORKERS, db_path=DB_PATH):
+        self.workers = workers
+        self.db_path = db_path
+        self.stop_event = multiprocessing.Event()
+        self.processes = []
+
+    def start(self):
+        host = socket.gethostname()
+        for i in range(self.workers):
+            p = multiprocessing.Process(
+                target=worker_loop,
+                args=(f"{host}-{i}", self.db_path, self.stop_event),
+                name=f"job-worker-{i}",
+                daemon=True,
+            )
+            p.start()
+            self.processes.append(p)
+
+    def shutdown(self, timeout=5.0):
+        # Running jobs finish their attempt or get requeued by a later reaper
+        self.stop_event.set()
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+
+    def status(self):
+        return {
+            "workers": self.workers,
+            "alive": sum(p.is_alive() for p in self.processes),
+        }
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else JOB_WORKERS
+    pool = JobWorkers(count)
+    pool.start()
+    try:
+        for p in pool.processes:
+            p.join()
+    except KeyboardInterrupt:
+        pool.shutdown()
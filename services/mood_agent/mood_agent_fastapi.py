@@ -1,9 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from services.warmup import AnalysisWorkers  # sets librosa/numba cache dirs first
+from services import shared_paths
+from services.singleflight import SingleFlight, content_key
 from services.mood_agent.mood_logic import analyze_mood_energy
-import tempfile, uvicorn
+import os, asyncio, tempfile, uvicorn
 
-app = FastAPI()
+workers = AnalysisWorkers()
+flights = SingleFlight()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers.start()
+    yield
+    workers.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -17,16 +34,43 @@ def ping():
     return {"ok": True, "service": "mood"}
 
 
-def _process(upload: UploadFile):
+@app.get("/ready")
+def ready():
+    status = {"service": "mood", **workers.status(), "singleflight": flights.status()}
+    return JSONResponse(status_code=200 if workers.ready else 503, content=status)
+
+
+def _remove(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def _process(upload: UploadFile):
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
         tmp.write(upload.file.read())
         file_path = tmp.name
-    return analyze_mood_energy(file_path)
+    # Deleted when the shared run finishes, even if this client disconnects
+    return await _analyze(file_path, cleanup=lambda: _remove(file_path))
+
+
+async def _analyze(file_path: str, cleanup=None):
+    """analyze_mood_energy, shared by concurrent requests for the same audio content."""
+    try:
+        key = await asyncio.to_thread(content_key, file_path)
+    except BaseException:
+        if cleanup:
+            cleanup()
+        raise
+    return await flights.do(
+        key, lambda: workers.run(analyze_mood_energy, file_path), cleanup=cleanup
+    )
 
 
 @app.post("/analyze")
 async def analyze(file: UploadFile = File(...)):
-    return _process(file)
+    return await _process(file)
 
 
 @app.post("/mood")
@@ -40,7 +84,21 @@ async def analyze_alias(
             status_code=400,
             detail="No file provided. Use multipart/form-data with field 'file'.",
         )
-    return _process(upload)
+    return await _process(upload)
+
+
+class PathRequest(BaseModel):
+    path: str  # relative to MOODMIXR_SHARED_ROOT
+
+
+@app.post("/analyze/path")
+async def analyze_path(req: PathRequest):
+    """Analyze a file on the shared volume in place (no upload)."""
+    try:
+        file_path = shared_paths.resolve(req.path)
+    except shared_paths.SharedPathError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return await _analyze(file_path)
 
 
 if __name__ == "__main__":
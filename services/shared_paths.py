@@ -0,0 +1,34 @@
+# services/shared_paths.py
+# "Analyze by path" for deployments where the app and the agents mount the same
+# music volume: the client sends a path relative to MOODMIXR_SHARED_ROOT instead
+# of uploading the file. Paths are sandboxed to that root (no "..", absolute
+# paths or symlinks pointing outside it).
+import os
+
+SHARED_ROOT = os.getenv("MOODMIXR_SHARED_ROOT") or None
+# Where clients stage uploaded bytes (content-addressed) so they can be analyzed
+# by path too; relative to the shared root.
+STAGING_DIR = ".moodmixr_staging"
+
+
+class SharedPathError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def resolve(rel_path: str) -> str:
+    """Absolute path of a file inside the shared root, or SharedPathError."""
+    if not SHARED_ROOT:
+        raise SharedPathError(501, "Path mode disabled: MOODMIXR_SHARED_ROOT not set")
+    if not rel_path or "\x00" in rel_path or os.path.isabs(rel_path):
+        raise SharedPathError(400, "Expected a path relative to the shared root")
+
+    root = os.path.realpath(SHARED_ROOT)
+    full = os.path.realpath(os.path.join(root, rel_path))
+    if os.path.commonpath([root, full]) != root:
+        raise SharedPathError(403, "Path escapes the shared root")
+    if not os.path.isfile(full):
+        raise SharedPathError(404, f"Not found under shared root: {rel_path}")
+    return full
@@ -0,0 +1,110 @@
+# services/singleflight.py
+# Request coalescing for the analysis services: concurrent requests for the
+# same audio content (same content hash) share one analysis. The first caller
+# runs it; the others await its result. Finished results stay in a small
+# in-memory memo so a burst arriving just after completion is served too.
+import os, time, asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+MEMO_ENTRIES = int(os.getenv("MOODMIXR_SINGLEFLIGHT_MEMO", "256"))
+MEMO_TTL_S = float(os.getenv("MOODMIXR_SINGLEFLIGHT_TTL_S", "600"))
+
+
+def content_key(path: str) -> Optional[str]:
+    """Audio-payload hash of an uploaded/shared file (None if unreadable)."""
+    from agents.probe_agent import ProbeAgent
+
+    try:
+        return ProbeAgent.content_id(path)
+    except OSError as e:
+        print(f"[SingleFlight] Could not hash {path}: {e}")
+        return None
+
+
+class SingleFlight:
+    """Per-process coalescing of identical in-flight work (event-loop side)."""
+
+    def __init__(
+        self, memo_entries: int = MEMO_ENTRIES, memo_ttl_s: float = MEMO_TTL_S
+    ):
+        self.memo_entries = memo_entries
+        self.memo_ttl_s = memo_ttl_s
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # key -> (expires_at, result)
+        self._memo: "OrderedDict[str, tuple]" = OrderedDict()
+        self.runs = 0
+        self.coalesced = 0
+        self.memo_hits = 0
+
+    def _memo_get(self, key: str):
+        hit = self._memo.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.time():
+            del self._memo[key]
+            return None
+        self._memo.move_to_end(key)
+        return hit[1]
+
+    def _memo_put(self, key: str, result: Any):
+        if self.memo_entries <= 0:
+            return
+        self._memo[key] = (time.time() + self.memo_ttl_s, result)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_entries:
+            self._memo.popitem(last=False)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+            if not (isinstance(result, dict) and result.get("error")):
+                self._memo_put(key, result)  # failures are retried by the next request
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def do(
+        self,
+        key: Optional[str],
+        fn: Callable[[], Awaitable[Any]],
+        cleanup: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Await fn() once per key: callers arriving while it runs get the same
+        result (or exception). key=None disables coalescing.
+
+        cleanup() runs once the run this caller waited on has finished, even
+        if the caller itself went away (e.g. to delete the uploaded file the
+        run may still be reading).
+        """
+        cached = self._memo_get(key) if key is not None else None
+        if cached is not None:
+            self.memo_hits += 1
+            if cleanup:
+                cleanup()
+            return cached
+        flight = self._inflight.get(key) if key is not None else None
+        if flight is None:
+            flight = asyncio.ensure_future(
+                self._run(key, fn) if key is not None else fn()
+            )
+            # Retrieve the exception even if every caller went away
+            flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if key is not None:
+                self._inflight[key] = flight
+            self.runs += 1
+        else:
+            self.coalesced += 1
+        if cleanup:
+            flight.add_done_callback(lambda _: cleanup())
+        # shield: one caller disconnecting must not cancel the shared run
+        return await asyncio.shield(flight)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "memo_hits": self.memo_hits,
+        }
@@ -0,0 +1,172 @@
+# services/warmup.py
+# Warm-up for the analysis services. librosa JIT-compiles its numba kernels and
+# builds filterbanks on first use; run every analysis path once on a short
+# synthetic signal at startup (and in each pool worker) so no real request pays
+# for it. Filterbanks and compiled kernels are cached on disk and shared by all
+# workers and restarts via LIBROSA_CACHE_DIR / NUMBA_CACHE_DIR.
+import os, time, queue, asyncio, threading
+import multiprocessing
+import concurrent.futures
+
+CACHE_ROOT = os.getenv("MOODMIXR_WARM_CACHE", "/tmp/moodmixr_warm")
+# Must be set before librosa/numba are imported anywhere in the process
+os.environ.setdefault("LIBROSA_CACHE_DIR", os.path.join(CACHE_ROOT, "librosa"))
+os.environ.setdefault("NUMBA_CACHE_DIR", os.path.join(CACHE_ROOT, "numba"))
+
+WARMUP_SAMPLE_RATES = (22050, 44100, 48000)  # filterbanks are built per rate
+WARMUP_SECONDS = 3.0
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(min(2, os.cpu_count() or 1))))
+# /ready stays 503 (with an error) if not every worker has warmed by then
+WARMUP_TIMEOUT_S = float(os.getenv("MOODMIXR_WARMUP_TIMEOUT", "300"))
+
+_warm_lock = threading.Lock()
+_warm_elapsed = None
+
+
+def synthetic_signal(sr, seconds=WARMUP_SECONDS):
+    """Short tone + click track: enough structure for beat/chroma/HPSS to run."""
+    import numpy as np
+
+    t = np.arange(int(sr * seconds)) / sr
+    y = 0.3 * np.sin(2 * np.pi * 440.0 * t) + 0.2 * np.sin(2 * np.pi * 660.0 * t)
+    clicks = np.zeros_like(y)
+    clicks[:: int(sr * 0.5)] = 1.0  # 120 BPM
+    return (y + clicks).astype(np.float32)
+
+
+def _exercise(y, sr):
+    import numpy as np
+    import librosa
+
+    librosa.get_duration(y=y, sr=sr)
+    librosa.beat.beat_track(y=y, sr=sr)
+    librosa.feature.tempo(y=y, sr=sr)
+    librosa.feature.rms(y=y)
+    librosa.feature.chroma_cqt(y=y, sr=sr)
+    librosa.feature.chroma_stft(y=y, sr=sr)
+    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmin=300, fmax=3000)
+    librosa.power_to_db(S, ref=np.max)
+    librosa.onset.onset_strength(y=y, sr=sr)
+    harmonic, percussive = librosa.effects.hpss(y)
+    librosa.feature.spectral_centroid(y=y, sr=sr)
+    librosa.feature.spectral_flatness(y=y)
+    librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)
+    librosa.feature.zero_crossing_rate(y)
+
+
+def _exercise_decode(y, sr):
+    """Round-trip through soundfile, the shared decoder and its soxr resampling."""
+    import tempfile
+    import soundfile as sf
+    from agents.audio_decoder import AudioDecoder, PURPOSE_SR
+
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    try:
+        os.close(fd)
+        sf.write(path, y, sr)
+        for target in sorted({r for r in PURPOSE_SR.values() if r}):
+            AudioDecoder.decode(path, target, cache=False)
+        AudioDecoder.duration(path)
+    finally:
+        os.unlink(path)
+
+
+def warm_up():
+    """Run every analysis path once in this process. Idempotent; returns seconds spent."""
+    global _warm_elapsed
+    with _warm_lock:
+        if _warm_elapsed is not None:
+            return _warm_elapsed
+        start = time.perf_counter()
+        for sr in WARMUP_SAMPLE_RATES:
+            y = synthetic_signal(sr)
+            _exercise_decode(y, sr)
+            _exercise(y, sr)
+        _warm_elapsed = time.perf_counter() - start
+        print(f"[Warmup] pid={os.getpid()} warmed in {_warm_elapsed:.1f}s")
+        return _warm_elapsed
+
+
+def _warm_worker(checkin):
+    """Pool initializer: warm up, then report this worker's pid to the parent."""
+    warm_up()
+    checkin.put(os.getpid())
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+class AnalysisWorkers:
+    """
+    Process pool whose workers warm up before taking work, plus the readiness
+    state behind the services' /ready endpoint.
+    """
+
+    def __init__(self, workers=ANALYSIS_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.ready = False
+        self.error = None
+        self.warm_pids = []
+        self.started_at = time.time()
+        self.elapsed = None
+
+    def _start(self):
+        try:
+            if self.workers > 0:
+                # Every worker checks in from its own initializer; a probe result
+                # alone only proves the first worker to finish is warm
+                checkin = multiprocessing.get_context().Queue()
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_warm_worker,
+                    initargs=(checkin,),
+                )
+                # Start methods other than fork spawn workers on demand, one per
+                # task that finds no idle worker: submit one per worker
+                for _ in range(self.workers):
+                    self.executor.submit(_worker_ready)
+                deadline = time.time() + WARMUP_TIMEOUT_S
+                pids = set()
+                while len(pids) < self.workers:
+                    try:
+                        pids.add(checkin.get(timeout=max(0.0, deadline - time.time())))
+                    except queue.Empty:
+                        raise TimeoutError(
+                            f"only {len(pids)}/{self.workers} workers warmed"
+                            f" within {WARMUP_TIMEOUT_S:g}s"
+                        )
+                self.warm_pids = sorted(pids)
+            else:
+                warm_up()  # analysis runs in-process (thread pool)
+                self.warm_pids = [os.getpid()]
+            self.elapsed = time.time() - self.started_at
+            self.ready = True
+            print(
+                f"[Warmup] Ready after {self.elapsed:.1f}s (workers={self.warm_pids})"
+            )
+        except Exception as e:
+            self.error = str(e)
+            print(f"[Warmup] Failed: {e}")
+
+    def start(self):
+        """Warm up in the background so /ping answers while /ready is still 503."""
+        threading.Thread(target=self._start, name="warmup", daemon=True).start()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "workers": self.warm_pids,
+            "warmup_sec": round(self.elapsed, 2) if self.elapsed else None,
+        }
+
+    async def run(self, fn, *args):
+        """Run an analysis function in the warm pool (or a thread when workers=0)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
@@ -3,6 +3,20 @@ import os, tempfile, requests, hashlib, json, time
 import concurrent.futures
 from typing import Iterable, Dict, Any
 
+from agents.fingerprint_index_agent import FingerprintIndexAgent
+from agents.probe_agent import ProbeAgent
+from services.shared_paths import SHARED_ROOT, STAGING_DIR
+from utils.concurrency import MAX_LIMIT, OVERLOAD_STATUS, limiter
+from utils.hedging import hedged, mark_sent
+from utils.scheduling import (
+    BATCH_ORDER,
+    LARGE_LANE_SLOTS,
+    Progress,
+    estimate_cost,
+    plan,
+)
+from utils.replicas import ReplicaPool, parse_urls
+
 
 def _env(name: str, default: str) -> str:
     # Docker compose exports *_AGENT_URL. Local may not.
@@ -11,86 +25,335 @@ def _env(name: str, default: str) -> str:
 
 AUDIO_URL = _env("AUDIO_AGENT_URL", "http://localhost:8000")
 MOOD_URL = _env("MOOD_AGENT_URL", "http://localhost:8001")
+JOB_URL = _env("JOB_AGENT_URL", "http://localhost:8002")
+# Several replicas per service: AUDIO_AGENT_URLS="http://a1:8000,http://a2:8000"
+AUDIO_POOL = ReplicaPool("audio", parse_urls(os.getenv("AUDIO_AGENT_URLS"), AUDIO_URL))
+MOOD_POOL = ReplicaPool("mood", parse_urls(os.getenv("MOOD_AGENT_URLS"), MOOD_URL))
+# Concurrent analyses each replica is sized for (its ANALYSIS_WORKERS)
+REPLICA_CONCURRENCY = int(_env("MOODMIXR_REPLICA_CONCURRENCY", "2"))
 # Increase timeout for larger uploads and allow retries on transient failures
 TIMEOUT_S = int(_env("MOODMIXR_TIMEOUT_S", "300"))
 RETRIES = int(_env("MOODMIXR_RETRIES", "3"))
 BACKOFF_FACTOR = float(_env("MOODMIXR_BACKOFF", "1.0"))
+# Replica is down/overloaded: retry elsewhere. Other 5xx are analysis errors.
+# Error dicts of calls that never got an answer carry "unavailable": True.
+UNAVAILABLE_STATUS = OVERLOAD_STATUS
+# Path mode answered but can't serve this file: upload it instead
+PATH_MODE_FALLBACK_STATUS = (400, 403, 404, 405, 501)
+# "local": no HTTP agents at all, analyses run in this machine's engine pool
+LOCAL_MODE = _env("MOODMIXR_MODE", "remote").lower() == "local"
+# Per-repo cache of merged results, keyed by audio content id
+ANALYSIS_CACHE_DIR = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+    "data",
+    "analysis_cache",
+)
 
 
 def ping_agents() -> Dict[str, Any]:
+    """/ping every replica of each service (ejecting the ones that don't answer)."""
+    if LOCAL_MODE:
+        from agents.analysis_engine import ENGINE_WORKERS
+
+        return {"mode": "local", "engine_workers": ENGINE_WORKERS}
     out = {}
-    for n, u in {"audio": AUDIO_URL, "mood": MOOD_URL}.items():
-        try:
-            r = requests.get(f"{u}/ping", timeout=5)
-            out[n] = {"ok": r.ok, "status": r.status_code, "url": f"{u}/ping"}
-        except requests.exceptions.RequestException as e:
-            out[n] = {"ok": False, "error": str(e), "url": f"{u}/ping"}
+    for n, pool in {"audio": AUDIO_POOL, "mood": MOOD_POOL}.items():
+        replicas = pool.check_health()
+        if len(replicas) == 1:
+            out[n] = replicas[0]
+        else:
+            out[n] = {"ok": any(r["ok"] for r in replicas), "replicas": replicas}
     return out
 
 
-def _post_file(url: str, path: str) -> Dict[str, Any]:
-    """POST a file with a small retry/backoff loop and return parsed JSON or error dict."""
-    last_exc = None
-    for attempt in range(1, RETRIES + 1):
-        try:
-            with open(path, "rb") as f:
-                files = {
-                    "file": (os.path.basename(path), f, "application/octet-stream")
-                }
-                r = requests.post(url, files=files, timeout=TIMEOUT_S)
+def shared_relpath(path: str):
+    """Path relative to MOODMIXR_SHARED_ROOT when the file lives under it, else None."""
+    if not SHARED_ROOT:
+        return None
+    root = os.path.realpath(SHARED_ROOT)
+    full = os.path.realpath(path)
+    if full == root or os.path.commonpath([root, full]) != root:
+        return None
+    return os.path.relpath(full, root)
+
+
+def _send_file(url: str, route: str, path: str) -> requests.Response:
+    """Analyze by shared path when possible, otherwise upload the bytes."""
+    rel = shared_relpath(path)
+    if rel is not None:
+        r = requests.post(f"{url}/analyze/path", json={"path": rel}, timeout=TIMEOUT_S)
+        if r.status_code not in PATH_MODE_FALLBACK_STATUS:
+            return r
+    with open(path, "rb") as f:
+        files = {"file": (os.path.basename(path), f, "application/octet-stream")}
+        return requests.post(f"{url}{route}", files=files, timeout=TIMEOUT_S)
+
+
+def _audio_minutes(path: str) -> float:
+    """Request size for the concurrency limiter (header probe; 1 when unknown)."""
+    try:
+        seconds = ProbeAgent.duration(path)
+    except Exception:
+        seconds = None
+    return seconds / 60.0 if seconds else 1.0
 
-            # raise for HTTP errors so callers see 4xx/5xx details
-            r.raise_for_status()
 
-            # attempt to parse JSON
+def _post_file(pool: ReplicaPool, route: str, path: str) -> Dict[str, Any]:
+    """
+    Send a file to the least-busy replica of a service and return parsed JSON or
+    an error dict. Analyses are idempotent, so a failed attempt is retried on a
+    different replica; backoff only kicks in once every replica has been tried.
+    Requests in flight per service are capped by its adaptive limiter, which
+    every attempt's latency and overload status feed back into.
+    """
+    limit = limiter(pool.name, len(pool) * REPLICA_CONCURRENCY)
+    minutes = _audio_minutes(path)
+    last_exc = None
+    tried = set()
+    for attempt in range(1, RETRIES + 1):
+        backoff = 0.0
+        with limit.slot():
+            mark_sent()  # the hedge clock starts here, not in the slot queue
+            replica = pool.acquire(exclude=tried)
+            ok = False
+            measured = overloaded = False
+            started = time.time()
             try:
-                return r.json()
-            except ValueError as e:
-                return {"error": f"invalid-json: {e}", "raw": r.text}
-
-        except FileNotFoundError as e:
-            return {"error": f"file-not-found: {e}"}
-        except requests.exceptions.RequestException as e:
-            last_exc = e
-            # If this was the last attempt, return the error. Otherwise backoff and retry.
-            if attempt == RETRIES:
-                return {"error": str(e)}
-            backoff = BACKOFF_FACTOR * (2 ** (attempt - 1))
-            time.sleep(backoff)
+                r = _send_file(replica.url, route, path)
+
+                if r.status_code in UNAVAILABLE_STATUS:
+                    measured = overloaded = True
+                    raise requests.exceptions.HTTPError(
+                        f"{r.status_code} from {replica.url}{route}", response=r
+                    )
+                ok = True
+                if r.status_code >= 500:
+                    # The analysis itself failed; another replica would fail the same way
+                    try:
+                        return r.json()
+                    except ValueError:
+                        return {"error": f"{r.status_code}: {r.text[:200]}"}
+                r.raise_for_status()
+                measured = True
+
+                # attempt to parse JSON
+                try:
+                    return r.json()
+                except ValueError as e:
+                    return {"error": f"invalid-json: {e}", "raw": r.text}
+
+            except FileNotFoundError as e:
+                ok = True  # not the replica's fault
+                return {"error": f"file-not-found: {e}"}
+            except requests.exceptions.RequestException as e:
+                last_exc = e
+                if isinstance(
+                    e,
+                    (
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ConnectionError,
+                    ),
+                ):
+                    measured = overloaded = True
+                # If this was the last attempt, return the error. Otherwise retry.
+                if attempt == RETRIES:
+                    return {"error": str(e), "unavailable": True}
+                tried.add(replica.url)
+                if len(tried) >= len(pool):
+                    tried.clear()
+                    backoff = BACKOFF_FACTOR * (2 ** (attempt - 1))
+            finally:
+                pool.release(replica, ok)
+                if measured:
+                    limit.record(time.time() - started, overloaded, minutes)
+        if backoff:
+            time.sleep(backoff)  # outside the slot: waiting isn't load
 
     # Should not reach here, but return last exception if so
-    return {"error": str(last_exc) if last_exc is not None else "unknown-error"}
+    return {
+        "error": str(last_exc) if last_exc is not None else "unknown-error",
+        "unavailable": True,
+    }
 
 
 def analyze_audio_file(path: str) -> Dict[str, Any]:
+    if LOCAL_MODE:
+        return local_audio_analysis(path)
     # tolerant alias; your agents also expose /analyze
     try:
-        return _post_file(f"{AUDIO_URL}/audio", path)
+        return _post_file(AUDIO_POOL, "/audio", path)
     except FileNotFoundError as e:
         return {"error": f"file-not-found: {e}"}
     except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+        return {"error": str(e), "unavailable": True}
 
 
 def analyze_mood_file(path: str) -> Dict[str, Any]:
+    if LOCAL_MODE:
+        return local_mood_analysis(path)
     try:
-        return _post_file(f"{MOOD_URL}/mood", path)
+        return _post_file(MOOD_POOL, "/mood", path)
     except FileNotFoundError as e:
         return {"error": f"file-not-found: {e}"}
     except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+        return {"error": str(e), "unavailable": True}
+
+
+def local_analysis(path: str, fingerprint: bool = False) -> Dict[str, Any]:
+    """Full engine result computed on this machine, in the engine's process pool."""
+    from agents.analysis_engine import AnalysisEngine, FEATURES, FINGERPRINT
+
+    features = FEATURES + (FINGERPRINT,) if fingerprint else FEATURES
+    return AnalysisEngine.submit(path, features).result()
+
+
+def local_audio_analysis(path: str, fingerprint: bool = False) -> Dict[str, Any]:
+    """
+    The audio agent's payload, computed locally (hedge / MOODMIXR_MODE=local).
+    With `fingerprint` it carries one, as the audio service's always does.
+    """
+    from agents.analysis_engine import AnalysisEngine, AUDIO_FEATURES, FINGERPRINT
+
+    features = AUDIO_FEATURES + (FINGERPRINT,) if fingerprint else AUDIO_FEATURES
+    return AnalysisEngine.audio_payload(AnalysisEngine.submit(path, features).result())
+
+
+def local_mood_analysis(path: str) -> Dict[str, Any]:
+    """The mood agent's payload, computed locally (hedge / MOODMIXR_MODE=local)."""
+    from agents.analysis_engine import AnalysisEngine, MOOD_FEATURES
+
+    return AnalysisEngine.mood_payload(
+        AnalysisEngine.submit(path, MOOD_FEATURES).result()
+    )
+
+
+def cache_local_analysis(path: str, result: Dict[str, Any]) -> bool:
+    """
+    Fold a local engine result into the track's analysis-cache entry, filling
+    only what the cached agent payloads lack, so the next analyze_batch of
+    the same audio is a complete cache hit. Returns False if nothing was written.
+    """
+    from agents.analysis_engine import AnalysisEngine
+
+    if not isinstance(result, dict) or result.get("error"):
+        return False
+    try:
+        cache_path = os.path.join(
+            ANALYSIS_CACHE_DIR, f"{ProbeAgent.content_id(path)}.json"
+        )
+        cached = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as cf:
+                cached = json.load(cf) or {}
+        payloads = {
+            "audio": AnalysisEngine.audio_payload(result),
+            "mood": AnalysisEngine.mood_payload(result),
+        }
+        for name, local in payloads.items():
+            have = cached.get(name)
+            if not isinstance(have, dict) or have.get("error"):
+                have = {}
+            filled = {k: v for k, v in local.items() if v is not None}
+            cached[name] = {**filled, **{k: v for k, v in have.items() if v}}
+        cached["merged"] = merge_agent_results(cached["audio"], cached["mood"])
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cf:
+            json.dump(cached, cf)
+        os.replace(tmp_path, cache_path)
+        return True
+    except Exception as e:
+        print(f"[api_client] Could not cache local analysis of {path}: {e}")
+        return False
+
+
+def normalize_merged(m: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce merged agent fields (bpm, key, energy 0..1, mood label) to one schema."""
+    NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+    out = dict(m)
+
+    # BPM
+    bpm_val = out.get("bpm")
+    try:
+        if bpm_val is None:
+            bpm_num = None
+        else:
+            bpm_num = float(bpm_val)
+            if bpm_num <= 0:
+                bpm_num = None
+        out["bpm"] = bpm_num
+    except (ValueError, TypeError):
+        out["bpm"] = None
+
+    # Key
+    key_val = out.get("key") or out.get("Key") or out.get("key_label")
+    if key_val is None:
+        out["key"] = None
+    else:
+        try:
+            if isinstance(key_val, (int, float)):
+                idxn = int(key_val) % 12
+                out["key"] = NOTE_NAMES[idxn]
+            else:
+                out["key"] = str(key_val).strip()
+        except (ValueError, TypeError, IndexError):
+            out["key"] = None
+
+    # Energy
+    from agents.analysis_engine import normalize_energy
+
+    out["energy"] = normalize_energy(out.get("energy"))
+
+    # Mood
+    mood_val = (
+        out.get("mood")
+        or out.get("mood_label")
+        or out.get("label")
+        or out.get("emotion")
+    )
+    if isinstance(mood_val, dict):
+        mood_label = mood_val.get("label") or mood_val.get("mood")
+    else:
+        mood_label = mood_val
+    out["mood"] = str(mood_label).capitalize() if mood_label is not None else None
+
+    return out
+
+
+def merge_agent_results(audio: Any, mood: Any) -> Dict[str, Any]:
+    """Merge the audio and mood agent payloads into one normalized dict."""
+    merged = {}
+    for src in (audio or {}, mood or {}):
+        if isinstance(src, dict):
+            merged.update(src)
 
+    merged.setdefault("bpm", None)
+    merged.setdefault("key", None)
+    merged.setdefault("energy", None)
+    merged.setdefault("mood", merged.get("mood_label") or merged.get("emotion") or None)
+    return normalize_merged(merged)
 
-def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None):
+
+def analyze_batch(
+    files: Iterable[bytes],
+    names: Iterable[str],
+    on_progress=None,
+    order: str = BATCH_ORDER,
+    on_eta=None,
+):
     """
     Parallelized analyze_batch: write temp files, reuse cache when available, and run agent calls
     concurrently to reduce wall time for multi-file uploads. Returns a list of items preserving
     input order.
+
+    Files to analyze are scheduled by estimated cost (see utils/scheduling.py): `order` is
+    "sjf" (first results soonest), "ljf" (shortest makespan) or "fifo"; very large files
+    run in their own lane. on_eta(seconds_left | None, done, total) is called after each
+    analyzed file.
     """
     results = [None] * len(list(names))
     # Prepare cache directory (per-repo) to avoid re-analyzing identical uploads
-    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    cache_dir = os.path.join(repo_root, "data", "analysis_cache")
+    cache_dir = ANALYSIS_CACHE_DIR
     os.makedirs(cache_dir, exist_ok=True)
 
     # Build a list of entries to process and handle cached items immediately
@@ -105,16 +368,27 @@ def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None
         except Exception:
             b = blob.tobytes() if hasattr(blob, "tobytes") else blob
 
-        sha = hashlib.sha1(b).hexdigest()
-        cache_path = os.path.join(cache_dir, f"{sha}.json")
-
-        # Persist to temp file (agents expect a filesystem path)
+        # Persist to temp file (agents expect a filesystem path). With a shared
+        # volume, stage it there so the agents read it by path, not by upload.
+        staging = os.path.join(SHARED_ROOT, STAGING_DIR) if SHARED_ROOT else None
+        if staging:
+            os.makedirs(staging, exist_ok=True)
         with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(name)[-1]
+            delete=False, suffix=os.path.splitext(name)[-1], dir=staging
         ) as tmp:
             tmp.write(b)
             tmp_path = tmp.name
 
+        # Cache key hashes the audio payload only, so re-tagged copies hit it.
+        # Entries written under the old whole-file key are moved over once.
+        cache_path = os.path.join(cache_dir, f"{ProbeAgent.content_id(tmp_path)}.json")
+        legacy_path = os.path.join(cache_dir, f"{hashlib.sha1(b).hexdigest()}.json")
+        if not os.path.exists(cache_path) and os.path.exists(legacy_path):
+            try:
+                os.replace(legacy_path, cache_path)
+            except OSError:
+                cache_path = legacy_path
+
         # Fast-path: if cache exists reuse and skip agent calls
         if os.path.exists(cache_path):
             try:
@@ -141,133 +415,108 @@ def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None
 
         # collect for parallel processing
         entries.append(
-            {"idx": idx, "name": name, "tmp_path": tmp_path, "cache_path": cache_path}
+            {
+                "idx": idx,
+                "name": name,
+                "tmp_path": tmp_path,
+                "cache_path": cache_path,
+                "cost": estimate_cost(tmp_path),
+            }
         )
 
-    # Worker function for a single file entry
-    def _process_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
-        idx = entry["idx"]
+    # Per-file stages: audio (plus duplicate lookup), then mood, then merge
+    # and cache. Each file's state lives on its entry between stages.
+    def _audio_stage(entry: Dict[str, Any]) -> bool:
+        """Audio analysis (the whole analysis locally); True if mood is still needed."""
         name = entry["name"]
         tmp_path = entry["tmp_path"]
-        cache_path = entry["cache_path"]
-
+        track_id = os.path.splitext(os.path.basename(entry["cache_path"]))[0]
         item = {"name": name, "ok": False, "audio": None, "mood": None, "merged": None}
-        try:
-            audio = analyze_audio_file(tmp_path)
-            item["audio"] = audio
-        except Exception as e:
-            item["audio"] = {"ok": False, "error": str(e)}
-
-        try:
-            mood = analyze_mood_file(tmp_path)
-            item["mood"] = mood
-        except Exception as e:
-            item["mood"] = {"ok": False, "error": str(e)}
-
-        # Merge audio + mood dicts if present
-        merged = {}
-        for src in (item.get("audio") or {}, item.get("mood") or {}):
-            if isinstance(src, dict):
-                merged.update(src)
-
-        merged.setdefault("bpm", None)
-        merged.setdefault("key", None)
-        merged.setdefault("energy", None)
-        merged.setdefault(
-            "mood", merged.get("mood_label") or merged.get("emotion") or None
+        entry.update(item=item, fp=None, duration=0.0, reused=None)
+
+        def _reuse_duplicate(payload):
+            # Same recording in another format/encode: reuse its analysis. The
+            # fingerprint comes back with the audio analysis (the engine takes
+            # it from its tempo decode); this box only looks it up.
+            fp = entry["fp"] = FingerprintIndexAgent.take(payload)
+            duration = entry["duration"] = float(
+                (payload or {}).get("duration_sec") or 0.0
+            )
+            if fp is None:
+                return
+            try:
+                match = FingerprintIndexAgent.match(fp, duration, exclude=(track_id,))
+                if match:
+                    match_path = os.path.join(cache_dir, f"{match['track_id']}.json")
+                    with open(match_path, "r", encoding="utf-8") as cf:
+                        reused = FingerprintIndexAgent.reuse(
+                            json.load(cf), name, duration
+                        )
+                    item.update(ok=True, duplicate_of=match, **reused)
+                    entry["reused"] = reused
+            except Exception as e:
+                print(f"[api_client] Duplicate lookup failed for {name}: {e}")
+
+        if LOCAL_MODE:
+            # No agents: one engine pass yields both payloads
+            from agents.analysis_engine import AnalysisEngine
+
+            result = local_analysis(tmp_path, fingerprint=True)
+            _reuse_duplicate(result)
+            if not entry["reused"]:
+                item["audio"] = AnalysisEngine.audio_payload(result)
+                item["mood"] = AnalysisEngine.mood_payload(result)
+                item["sources"] = {"audio": "local", "mood": "local"}
+            return False
+
+        # Remote agents, hedged with the same analysis run locally. A
+        # duplicate found from the audio answer skips the mood call.
+        audio, audio_src = hedged(
+            "audio",
+            lambda: analyze_audio_file(tmp_path),
+            lambda: local_audio_analysis(tmp_path, fingerprint=True),
+        )
+        _reuse_duplicate(audio)
+        if entry["reused"]:
+            return False
+        item["audio"] = audio
+        item["sources"] = {"audio": audio_src}
+        return True
+
+    def _mood_stage(entry: Dict[str, Any]):
+        item = entry["item"]
+        item["mood"], item["sources"]["mood"] = hedged(
+            "mood",
+            lambda: analyze_mood_file(entry["tmp_path"]),
+            lambda: local_mood_analysis(entry["tmp_path"]),
         )
 
-        # normalization helper (same logic as prior implementation)
-        def _normalize_merged(m: Dict[str, Any]) -> Dict[str, Any]:
-            NOTE_NAMES = [
-                "C",
-                "C#",
-                "D",
-                "D#",
-                "E",
-                "F",
-                "F#",
-                "G",
-                "G#",
-                "A",
-                "A#",
-                "B",
-            ]
-            out = dict(m)
-
-            # BPM
-            bpm_val = out.get("bpm")
-            try:
-                if bpm_val is None:
-                    bpm_num = None
-                else:
-                    bpm_num = float(bpm_val)
-                    if bpm_num <= 0:
-                        bpm_num = None
-                out["bpm"] = bpm_num
-            except (ValueError, TypeError):
-                out["bpm"] = None
-
-            # Key
-            key_val = out.get("key") or out.get("Key") or out.get("key_label")
-            if key_val is None:
-                out["key"] = None
-            else:
-                try:
-                    if isinstance(key_val, (int, float)):
-                        idxn = int(key_val) % 12
-                        out["key"] = NOTE_NAMES[idxn]
-                    else:
-                        out["key"] = str(key_val).strip()
-                except (ValueError, TypeError, IndexError):
-                    out["key"] = None
-
-            # Energy
-            energy_val = out.get("energy")
-            try:
-                if energy_val is None:
-                    out["energy"] = None
-                else:
-                    e = float(energy_val)
-                    if e <= 0:
-                        out["energy"] = None
-                    elif e <= 1:
-                        out["energy"] = round(e, 3)
-                    else:
-                        if e <= 10:
-                            out["energy"] = round(e / 10.0, 3)
-                        elif e <= 100:
-                            out["energy"] = round(e / 100.0, 3)
-                        else:
-                            out["energy"] = round(min(e / 1000.0, 1.0), 3)
-            except (ValueError, TypeError):
-                out["energy"] = None
-
-            # Mood
-            mood_val = (
-                out.get("mood")
-                or out.get("mood_label")
-                or out.get("label")
-                or out.get("emotion")
-            )
-            if isinstance(mood_val, dict):
-                mood_label = mood_val.get("label") or mood_val.get("mood")
-            else:
-                mood_label = mood_val
-            out["mood"] = (
-                str(mood_label).capitalize() if mood_label is not None else None
+    def _finish_entry(entry: Dict[str, Any]):
+        idx = entry["idx"]
+        name = entry["name"]
+        item = entry["item"]
+        cache_path = entry["cache_path"]
+        track_id = os.path.splitext(os.path.basename(cache_path))[0]
+
+        if not entry["reused"]:
+            merged = merge_agent_results(item.get("audio"), item.get("mood"))
+            item["merged"] = merged
+            item["ok"] = not any(
+                [
+                    isinstance(item.get("audio"), dict)
+                    and item.get("audio").get("error"),
+                    isinstance(item.get("mood"), dict)
+                    and item.get("mood").get("error"),
+                ]
             )
 
-            return out
-
-        merged = _normalize_merged(merged)
-        item["merged"] = merged
-        item["ok"] = not any(
-            [
-                isinstance(item.get("audio"), dict) and item.get("audio").get("error"),
-                isinstance(item.get("mood"), dict) and item.get("mood").get("error"),
-            ]
-        )
+        if entry["fp"] is not None and item["ok"]:
+            try:
+                FingerprintIndexAgent.add(
+                    track_id, entry["fp"], entry["duration"], name=name
+                )
+            except Exception as e:
+                print(f"[api_client] Could not index fingerprint of {name}: {e}")
 
         # Persist to cache
         try:
@@ -283,18 +532,79 @@ def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None
 
         # Cleanup temp file
         try:
-            os.unlink(tmp_path)
+            os.unlink(entry["tmp_path"])
         except Exception:
             pass
 
         return (idx, item)
 
+    def _run_audio(entry: Dict[str, Any]):
+        """Main lane, first stage: None when the file moves on to the mood stage."""
+        return _finish_entry(entry) if not _audio_stage(entry) else None
+
+    def _run_mood(entry: Dict[str, Any]):
+        _mood_stage(entry)
+        return _finish_entry(entry)
+
+    def _process_entry(entry: Dict[str, Any]):
+        """Every stage in one task (large lane: the file keeps its slot throughout)."""
+        if _audio_stage(entry):
+            _mood_stage(entry)
+        return _finish_entry(entry)
+
     # Run parallel processing
     if entries:
-        max_workers = min(8, (os.cpu_count() or 1) * 2)
+        # Each stage runs as many files as its own service's adaptive limit
+        # (re-read whenever a stage finishes), so the batch runs at whatever
+        # concurrency each service currently sustains and no call waits in a
+        # client-side slot queue.
+        def _slots(pool: ReplicaPool) -> int:
+            if LOCAL_MODE:
+                from agents.analysis_engine import ENGINE_WORKERS
+
+                return ENGINE_WORKERS + 1
+            return max(
+                1, int(limiter(pool.name, len(pool) * REPLICA_CONCURRENCY).limit)
+            )
+
+        # Cheap files don't queue behind a long mix: the main lane runs in
+        # cost order, files over the size limit share their own slot(s).
+        main, large = plan([e["cost"] for e in entries], order)
+        progress = Progress([e["cost"] for e in entries])
+        owners = {}
+
+        def _completed():
+            mood_queue = []
+            lanes = (
+                ([entries[i] for i in main], _run_audio, lambda: _slots(AUDIO_POOL)),
+                (mood_queue, _run_mood, lambda: _slots(MOOD_POOL)),
+                ([entries[i] for i in large], _process_entry, lambda: LARGE_LANE_SLOTS),
+            )
+            running = [set() for _ in lanes]
+            while any(q for q, _, _ in lanes) or any(running):
+                for lane, (queue, stage, slots) in enumerate(lanes):
+                    while queue and len(running[lane]) < slots():
+                        fut = ex.submit(stage, queue[0])
+                        owners[fut] = queue.pop(0)
+                        running[lane].add(fut)
+                done, _ = concurrent.futures.wait(
+                    set().union(*running),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for fut in done:
+                    for lane in running:
+                        lane.discard(fut)
+                    if fut.exception() is None and fut.result() is None:
+                        mood_queue.append(owners.pop(fut))  # audio done, mood next
+                        continue
+                    progress.finish(owners[fut]["cost"])
+                    yield fut
+                    if on_eta:
+                        on_eta(progress.eta(), progress.done, progress.count)
+
+        max_workers = min(len(entries), 2 * MAX_LIMIT + LARGE_LANE_SLOTS)
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = [ex.submit(_process_entry, e) for e in entries]
-            for fut in concurrent.futures.as_completed(futures):
+            for fut in _completed():
                 try:
                     idx, item = fut.result()
                     results[idx - 1] = item
@@ -302,24 +612,14 @@ def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None
                         on_progress(idx, item.get("name"), item)
                 except Exception as e:
                     # best-effort: record a failure item
-                    # locate which future failed (best-effort)
-                    try:
-                        failed_idx = None
-                        # attempt to access fut._args (not guaranteed); fallback to -1
-                    except Exception:
-                        failed_idx = -1
-                    failure_item = {
-                        "name": getattr(e, "name", "unknown"),
+                    entry = owners[fut]
+                    results[entry["idx"] - 1] = {
+                        "name": entry["name"],
                         "ok": False,
                         "audio": {"error": str(e)},
                         "mood": None,
                         "merged": None,
                     }
-                    if failed_idx and 1 <= failed_idx <= len(results):
-                        results[failed_idx - 1] = failure_item
-                    else:
-                        # append to the end if we cannot determine index
-                        results.append(failure_item)
 
     # Final sanity: ensure every slot is populated (convert None to minimal item)
     for i in range(len(results)):
@@ -340,9 +640,75 @@ def analyze_batch(files: Iterable[bytes], names: Iterable[str], on_progress=None
 
 def call_mood_agent_api(path: str) -> Dict[str, Any]:
     """Send a single file to the mood agent's /analyze endpoint (multipart/form-data)."""
-    return _post_file(f"{MOOD_URL}/analyze", path)
+    if LOCAL_MODE:
+        return local_mood_analysis(path)
+    return _post_file(MOOD_POOL, "/analyze", path)
 
 
 def call_audio_agent_api(path: str) -> Dict[str, Any]:
     """Send a single file to the audio agent's /analyze endpoint (multipart/form-data)."""
-    return _post_file(f"{AUDIO_URL}/analyze", path)
+    if LOCAL_MODE:
+        return local_audio_analysis(path)
+    return _post_file(AUDIO_POOL, "/analyze", path)
+
+
+# --- Background jobs (services/job_agent) -----------------------------------
+
+
+def submit_job(
+    kind: str, payload: Dict[str, Any], priority: str = "default"
+) -> Dict[str, Any]:
+    """Queue a job by kind ("analyze_track", "extract_features", "library_scan")."""
+    r = requests.post(
+        f"{JOB_URL}/jobs",
+        json={"kind": kind, "payload": payload, "priority": priority},
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+def upload_job(
+    path: str, kind: str = "analyze_track", priority: str = "interactive"
+) -> Dict[str, Any]:
+    """Upload a local file to the job service and queue it for analysis."""
+    with open(path, "rb") as f:
+        files = {"file": (os.path.basename(path), f, "application/octet-stream")}
+        r = requests.post(
+            f"{JOB_URL}/jobs/upload",
+            files=files,
+            data={"kind": kind, "priority": priority},
+            timeout=TIMEOUT_S,
+        )
+    r.raise_for_status()
+    return r.json()
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    r = requests.get(f"{JOB_URL}/jobs/{job_id}", timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def list_jobs(state: str = None, kind: str = None, limit: int = 100) -> Dict[str, Any]:
+    params = {k: v for k, v in {"state": state, "kind": kind}.items() if v}
+    r = requests.get(f"{JOB_URL}/jobs", params={**params, "limit": limit}, timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    r = requests.post(f"{JOB_URL}/jobs/{job_id}/cancel", timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def stream_job_events(job_id: str):
+    """Yield job snapshots from the service's SSE stream until a terminal state."""
+    with requests.get(
+        f"{JOB_URL}/jobs/{job_id}/events", stream=True, timeout=(10, None)
+    ) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if line and line.startswith("data: "):
+                yield json.loads(line[len("data: ") :])
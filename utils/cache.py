@@ -0,0 +1,124 @@
+# utils/cache.py
+# Small persistent caches shared by agents: JSON values with a TTL, and a
+# size-capped LRU directory for downloaded audio.
+import os, json, time, hashlib, threading
+from typing import Any, Callable, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_ROOT = os.getenv("MOODMIXR_CACHE_DIR") or os.path.join(REPO_ROOT, "data", "cache")
+
+_MISSING = object()
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """One JSON file per key under CACHE_ROOT/<namespace>/, expired lazily on read."""
+
+    def __init__(self, namespace: str, ttl_s: float):
+        self.dir = os.path.join(CACHE_ROOT, namespace)
+        self.ttl_s = ttl_s
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, f"{_digest(key)}.json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return default
+        return entry.get("value", default)
+
+    def set(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        entry = {
+            "key": key,
+            "expires_at": time.time() + (self.ttl_s if ttl_s is None else ttl_s),
+            "value": value,
+        }
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[Cache] Could not write {key}: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+
+class LRUFileStore:
+    """
+    Directory of cached files capped at max_bytes. Reads refresh a file's mtime,
+    and the least recently used files are evicted when the cap is exceeded.
+    """
+
+    def __init__(self, namespace: str, max_bytes: int):
+        self.dir = os.path.join(CACHE_ROOT, namespace)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = "") -> str:
+        return os.path.join(self.dir, f"{_digest(key)}{suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path for key (any suffix), or None."""
+        prefix = _digest(key)
+        for name in os.listdir(self.dir):
+            if name.startswith(prefix) and not name.endswith(".part"):
+                path = os.path.join(self.dir, name)
+                try:
+                    os.utime(path)
+                except OSError:
+                    continue
+                return path
+        return None
+
+    def base_path(self, key: str) -> str:
+        """Suffix-less target path for tools that pick their own extension."""
+        return self._path(key)
+
+    def trim(self) -> None:
+        """Enforce the size cap after files were written via base_path()."""
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.dir):
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(self.dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            entries.sort()
+            while total > self.max_bytes and entries:
+                _, size, path = entries.pop(0)
+                try:
+                    os.unlink(path)
+                    total -= size
+                except OSError:
+                    pass
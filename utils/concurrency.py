@@ -0,0 +1,128 @@
+# utils/concurrency.py
+# Adaptive concurrency limits for the analysis services (AIMD). Each service
+# gets its own limit on requests in flight: it grows by ~1 per round of
+# successful calls while the limit is actually in use, and is cut
+# multiplicatively on overload (429/502/503/504, timeouts, refused
+# connections) or when latency per minute of audio climbs well above the
+# service's recent baseline (a low percentile). A single small container settles at a few requests
+# in flight; a scaled-out cluster is driven up to its throughput knee.
+import os, time, threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+MIN_LIMIT = 1
+MAX_LIMIT = int(os.getenv("MOODMIXR_MAX_CONCURRENCY", "64"))
+DECREASE_RATIO = 0.7
+# Latency (per minute of audio) this far above the windowed best = queueing
+LATENCY_TOLERANCE = float(os.getenv("MOODMIXR_LATENCY_TOLERANCE", "2.0"))
+BASELINE_WINDOW = 100  # recent successful requests the baseline is taken over
+# The baseline is a low percentile, not the minimum, so a few outliers can't
+# pin it; congestion is only judged once enough requests have been timed
+BASELINE_PERCENTILE = 10
+BASELINE_MIN_SAMPLES = 10
+# Answers this much faster than the baseline are cache/memo hits, not samples
+CACHE_HIT_RATIO = 0.2
+MIN_UNITS = 0.5  # shorter files cost about as much as a 30 s one (startup, upload)
+OVERLOAD_STATUS = (429, 502, 503, 504)
+
+
+class AdaptiveLimiter:
+    """AIMD limit on one service's requests in flight (thread-safe)."""
+
+    def __init__(self, name: str, initial: int = 2, max_limit: int = MAX_LIMIT):
+        self.name = name
+        self.max_limit = max(MIN_LIMIT, max_limit)
+        self.limit = float(min(max(initial, MIN_LIMIT), self.max_limit))
+        self.inflight = 0
+        self.overloads = 0
+        self._latencies = deque(maxlen=BASELINE_WINDOW)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _baseline(self) -> Optional[float]:
+        if len(self._latencies) < BASELINE_MIN_SAMPLES:
+            return None
+        samples = sorted(self._latencies)
+        return samples[int(round(BASELINE_PERCENTILE / 100 * (len(samples) - 1)))]
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the service's request slots (waits while the limit is reached)."""
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.inflight -= 1
+                self._cond.notify_all()
+
+    def record(self, seconds: float, overloaded: bool = False, units: float = 1.0):
+        """
+        Feed back one finished request. `units` is its size (minutes of audio)
+        so long files don't read as congestion.
+        """
+        with self._cond:
+            saturated = self.inflight >= int(self.limit) - 1
+            per_unit = seconds / max(units, MIN_UNITS)
+            baseline = self._baseline()
+            if (
+                not overloaded
+                and baseline is not None
+                and per_unit < baseline * CACHE_HIT_RATIO
+            ):
+                return  # served from a cache: says nothing about load
+            if not overloaded:
+                self._latencies.append(per_unit)
+            congested = overloaded or (
+                baseline is not None and per_unit > baseline * LATENCY_TOLERANCE
+            )
+            if congested:
+                if overloaded:
+                    self.overloads += 1
+                # One cut per round trip: a burst of failures from the same
+                # overload must not collapse the limit to 1
+                now = time.time()
+                if now - self._last_decrease >= seconds:
+                    self._last_decrease = now
+                    old = self.limit
+                    self.limit = max(MIN_LIMIT, self.limit * DECREASE_RATIO)
+                    if int(old) != int(self.limit):
+                        print(
+                            f"[Concurrency] {self.name}: limit {old:.1f} -> {self.limit:.1f}"
+                            f" ({'overload' if overloaded else 'latency'})"
+                        )
+            elif saturated:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        baseline = self._baseline()
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.inflight,
+            "overloads": self.overloads,
+            "baseline_s_per_min": round(baseline, 2) if baseline is not None else None,
+        }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name: str, initial: int = 2) -> AdaptiveLimiter:
+    """The service's limiter (created with `initial` slots on first use)."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(name, initial)
+        return _limiters[name]
+
+
+def status() -> Dict[str, Any]:
+    """Current limit and load per service (for agent status panels)."""
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {name: lim.status() for name, lim in items}
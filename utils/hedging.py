@@ -0,0 +1,230 @@
+# utils/hedging.py
+# Hedged remote/local execution for the analysis agents. The HTTP call starts
+# first; if it hasn't answered by the service's recent latency percentile (or
+# can't be reached), local librosa analysis starts alongside it and whichever
+# good result arrives first wins. Analysis errors are the service's answer.
+# The hedge clock starts when the request actually goes out (mark_sent()),
+# not while it waits for a client-side concurrency slot. A circuit breaker
+# skips the remote call entirely while a service keeps failing, so a dead
+# agent costs nothing instead of TIMEOUT_S x RETRIES + backoff per track.
+import os, time, threading
+import concurrent.futures
+from collections import deque
+from typing import Any, Callable, Dict, Tuple
+
+HEDGE_PERCENTILE = float(os.getenv("MOODMIXR_HEDGE_PERCENTILE", "95"))
+# Delay before the first HEDGE_MIN_SAMPLES calls have been timed
+HEDGE_DEFAULT_DELAY_S = float(os.getenv("MOODMIXR_HEDGE_DELAY_S", "20"))
+HEDGE_MIN_DELAY_S = 2.0
+HEDGE_MIN_SAMPLES = 5
+LATENCY_WINDOW = 100  # recent successful calls per service
+BREAKER_FAILURES = int(os.getenv("MOODMIXR_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_S = float(os.getenv("MOODMIXR_BREAKER_COOLDOWN_S", "30"))
+# Remote calls are I/O waits; local analyses are CPU-bound and capped separately
+REMOTE_THREADS = 32
+LOCAL_SLOTS = int(os.getenv("MOODMIXR_LOCAL_SLOTS", str(os.cpu_count() or 1)))
+
+_remote_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=REMOTE_THREADS, thread_name_prefix="hedge-remote"
+)
+_local_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=LOCAL_SLOTS, thread_name_prefix="hedge-local"
+)
+_sending = threading.local()  # the running remote call's mark_sent hook
+
+
+def mark_sent():
+    """
+    Called from a remote callable when its request leaves this machine (after
+    any client-side queueing): the hedge delay and latency sample run from
+    here. Later calls in the same remote call are ignored.
+    """
+    hook = getattr(_sending, "hook", None)
+    if hook is not None:
+        hook()
+
+
+def _unavailable(result: Any) -> bool:
+    """
+    Did the remote call fail to get an answer (transport error, timeout,
+    429/502/503/504)? An analysis error is the service's answer, not a failure.
+    """
+    if isinstance(result, dict):
+        return bool(result.get("error") and result.get("unavailable"))
+    return result is None
+
+
+def _good(result: Any) -> bool:
+    return result is not None and not (isinstance(result, dict) and result.get("error"))
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after cooldown."""
+
+    def __init__(
+        self, failures: int = BREAKER_FAILURES, cooldown_s: float = BREAKER_COOLDOWN_S
+    ):
+        self.max_failures = failures
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return (
+            "half-open" if time.time() - self.opened_at >= self.cooldown_s else "open"
+        )
+
+    def allow(self) -> bool:
+        """May a remote call go out? Half-open lets exactly one trial call through."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.max_failures:
+                self.opened_at = time.time()  # (re)open, restarting the cooldown
+
+
+class LatencyTracker:
+    """Recent remote latencies of one service; the hedge delay is a percentile."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self, percentile: float = HEDGE_PERCENTILE) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_S
+        rank = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return max(HEDGE_MIN_DELAY_S, samples[rank])
+
+
+_services: Dict[str, Tuple[CircuitBreaker, LatencyTracker]] = {}
+_services_lock = threading.Lock()
+
+
+def _service(name: str) -> Tuple[CircuitBreaker, LatencyTracker]:
+    with _services_lock:
+        if name not in _services:
+            _services[name] = (CircuitBreaker(), LatencyTracker())
+        return _services[name]
+
+
+def hedged(
+    name: str,
+    remote: Callable[[], Any],
+    local: Callable[[], Any],
+) -> Tuple[Any, str]:
+    """
+    Run `remote` with `local` as a hedge; returns (result, "remote" | "local").
+
+    Local analysis starts when the remote call gets no answer (transport error,
+    timeout, overload), exceeds the service's latency percentile, or the
+    breaker is open. An analysis error is the remote's answer and is returned
+    as is. The first good result wins; the loser keeps running in the
+    background only to update latency/breaker state. When both fail, the
+    remote error result is returned. The latency percentile is timed from the
+    remote's mark_sent() call, so client-side queueing never triggers a hedge.
+    """
+    breaker, latency = _service(name)
+
+    def _local():
+        try:
+            return local()
+        except Exception as e:
+            return {"error": str(e)}
+
+    if not breaker.allow():
+        return _local_pool.submit(_local).result(), "local"
+
+    sent = threading.Event()
+    sent_at = []
+
+    def _mark():
+        if not sent_at:
+            sent_at.append(time.time())
+            sent.set()
+
+    def _remote():
+        started = time.time()
+        _sending.hook = _mark
+        try:
+            try:
+                result = remote()
+            except Exception as e:
+                result = {"error": str(e), "unavailable": True}
+            finally:
+                _sending.hook = None
+            failed = _unavailable(result)
+            breaker.record(not failed)
+            if _good(result):
+                latency.add(time.time() - (sent_at[0] if sent_at else started))
+            return result
+        finally:
+            sent.set()  # remotes without mark_sent() are hedged only on failure
+
+    remote_fut = _remote_pool.submit(_remote)
+    # Waiting for a thread or a concurrency slot on this side is not the
+    # service being slow: no hedge for a request that hasn't gone out yet
+    sent.wait()
+    delay = latency.hedge_delay()
+    if sent_at:
+        delay -= time.time() - sent_at[0]
+    try:
+        result = remote_fut.result(timeout=max(0.0, delay))
+        if not _unavailable(result):
+            # Including analysis errors: the file would fail locally too
+            return result, "remote"
+    except concurrent.futures.TimeoutError:
+        print(f"[Hedging] {name}: remote slower than p{HEDGE_PERCENTILE:.0f}, hedging")
+
+    local_fut = _local_pool.submit(_local)
+    futures = {remote_fut: "remote", local_fut: "local"}
+    remote_result = None
+    for fut in concurrent.futures.as_completed(futures):
+        value = fut.result()
+        if fut is remote_fut:
+            if not _unavailable(value):
+                local_fut.cancel()  # still queued behind other local analyses
+                return value, "remote"
+            remote_result = value
+        elif _good(value):
+            return value, "local"
+    return remote_result, "remote"
+
+
+def status() -> Dict[str, Any]:
+    """Breaker state and current hedge delay per service (for agent status panels)."""
+    with _services_lock:
+        items = list(_services.items())
+    return {
+        name: {
+            "breaker": breaker.state,
+            "failures": breaker.failures,
+            "hedge_delay_s": round(latency.hedge_delay(), 2),
+        }
+        for name, (breaker, latency) in items
+    }
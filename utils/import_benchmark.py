@@ -0,0 +1,126 @@
+# utils/import_benchmark.py
+# Import-time budget for the app and agents. Each module is imported in a fresh
+# interpreter; the run fails if a module blows its budget or drags in a heavy
+# dependency at import time. Usage:
+#   python -m utils.import_benchmark [--runs 3] [--scale 1.0]
+import os, sys, ast, json, argparse, subprocess
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that must only ever be imported inside the function/page using them
+HEAVY_MODULES = (
+    "librosa",
+    "matplotlib",
+    "mutagen",
+    "soundfile",
+    "scipy",
+    "numba",
+    "cohere",
+    "yt_dlp",
+    "pyarrow",
+)
+
+# Cold-import budgets in milliseconds. Anything importing streamlit pays ~0.5 s
+# for streamlit itself; the rest should stay close to numpy/requests.
+IMPORT_BUDGETS_MS = {
+    "utils.cache": 50,
+    "utils.api_client": 250,
+    "utils.utils": 700,
+    "agents.layout_agent": 700,
+    "agents.summary_agent": 150,
+    "agents.transition_agent": 100,
+    "agents.set_optimizer_agent": 250,
+    "agents.mood_agent": 250,
+    "agents.vocal_detector_agent": 250,
+    "agents.feature_store_agent": 300,
+    "agents.library_export_agent": 300,
+    "agents.metadata_agent": 100,
+    "agents.probe_agent": 50,
+    "agents.analysis_engine": 250,
+}
+
+# Streamlit scripts can't be imported without running them; their top-level
+# import statements are checked statically instead.
+APP_SCRIPTS = ("app/moodmixr_app.py",)
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - t) * 1000
+heavy = sorted(h for h in {heavy!r} if h in sys.modules)
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module, runs=3):
+    """Best-of-N cold import time (ms) and the heavy modules it loaded."""
+    best, heavy = None, []
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result["ms"] < best:
+            best = result["ms"]
+        heavy = result["heavy"]
+    return best, heavy
+
+
+def eager_heavy_imports(script):
+    """Heavy modules imported at the top level of a script (not inside a page/function)."""
+    with open(os.path.join(REPO_ROOT, script), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script)
+    found = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        found += [n for n in names if n.split(".")[0] in HEAVY_MODULES + ("PIL",)]
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MoodMixr import-time budget")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=float(os.getenv("MOODMIXR_IMPORT_BUDGET_SCALE", "1.0")),
+        help="Multiply every budget (e.g. 2.0 on slow CI machines)",
+    )
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':32} {'ms':>7} {'budget':>7}  heavy")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        budget *= args.scale
+        ms, heavy = measure(module, args.runs)
+        flag = "" if ms <= budget and not heavy else "  <-- FAIL"
+        print(f"{module:32} {ms:7.0f} {budget:7.0f}  {','.join(heavy) or '-'}{flag}")
+        if flag:
+            failures.append(module)
+
+    for script in APP_SCRIPTS:
+        eager = eager_heavy_imports(script)
+        print(f"{script:32} top-level heavy imports: {', '.join(eager) or 'none'}")
+        if eager:
+            failures.append(script)
+
+    if failures:
+        print(f"[ImportBenchmark] Over budget: {', '.join(failures)}")
+        return 1
+    print("[ImportBenchmark] All imports within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# utils/replicas.py
+# Client-side load balancing across analysis service replicas: least
+# outstanding requests, /ping health checks, and temporary ejection of
+# replicas that keep failing.
+import os, time, random, socket, threading
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+EJECT_AFTER_FAILURES = int(os.getenv("MOODMIXR_EJECT_AFTER", "2"))
+EJECT_SECONDS = float(os.getenv("MOODMIXR_EJECT_SECONDS", "30"))
+REFRESH_SECONDS = 10.0  # DNS re-resolution / re-probing of ejected replicas
+PING_TIMEOUT_S = 3
+# Expand each URL's hostname to every address behind it, so one compose
+# service name (`audio_agent`) reaches all `--scale`d containers individually.
+RESOLVE_REPLICAS = os.getenv("MOODMIXR_RESOLVE_REPLICAS", "0") == "1"
+
+
+def parse_urls(value: Optional[str], default: str) -> List[str]:
+    """Comma/space separated URL list from an env value, else [default]."""
+    urls = [u.strip().rstrip("/") for u in (value or "").replace(",", " ").split()]
+    return [u for u in urls if u] or [default.rstrip("/")]
+
+
+def _resolve(url: str) -> List[str]:
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        return [url]
+    hosts = sorted({info[4][0] for info in infos})
+    out = []
+    for host in hosts:
+        netloc = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+        out.append(urlunsplit((parts.scheme, netloc, parts.path, "", "")))
+    return out or [url]
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0  # consecutive
+        self.ejected_until = 0.0
+        self.served = 0
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures,
+            "ejected": self.ejected_until > time.time(),
+        }
+
+
+class ReplicaPool:
+    """Thread-safe set of interchangeable endpoints for one service."""
+
+    def __init__(
+        self, name: str, urls: Iterable[str], resolve: bool = RESOLVE_REPLICAS
+    ):
+        self.name = name
+        self.configured = list(urls)
+        self.resolve = resolve
+        self._lock = threading.Lock()
+        self._replicas: Dict[str, Replica] = {}
+        self._refreshed_at = 0.0
+        self.refresh()
+
+    def __len__(self):
+        return len(self._replicas)
+
+    def refresh(self):
+        """Re-resolve endpoints (keeping stats of known ones)."""
+        urls = []
+        for url in self.configured:
+            urls += _resolve(url) if self.resolve else [url]
+        with self._lock:
+            self._replicas = {u: self._replicas.get(u) or Replica(u) for u in urls}
+            self._refreshed_at = time.time()
+
+    def _maybe_refresh(self):
+        with self._lock:
+            if time.time() - self._refreshed_at < REFRESH_SECONDS:
+                return
+            self._refreshed_at = time.time()  # one thread refreshes at a time
+        if self.resolve:
+            self.refresh()
+        # Ejection windows that ran out: readmit only replicas answering /ping
+        now = time.time()
+        for replica in list(self._replicas.values()):
+            if replica.ejected_until and replica.ejected_until <= now:
+                if not self.ping(replica)["ok"]:
+                    self._eject(replica)
+
+    def _eject(self, replica: Replica):
+        with self._lock:
+            replica.ejected_until = time.time() + EJECT_SECONDS
+        print(f"[Replicas] {self.name}: ejected {replica.url} for {EJECT_SECONDS:.0f}s")
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Replica:
+        """Reserve the healthy replica with the fewest requests in flight."""
+        self._maybe_refresh()
+        exclude = set(exclude)
+        with self._lock:
+            now = time.time()
+            candidates = [
+                r for r in self._replicas.values() if r.url not in exclude
+            ] or list(self._replicas.values())
+            healthy = [r for r in candidates if r.healthy(now)]
+            if healthy:
+                least = min(r.outstanding for r in healthy)
+                replica = random.choice([r for r in healthy if r.outstanding == least])
+            else:
+                # Everything is ejected: try the one that will recover soonest
+                replica = min(candidates, key=lambda r: r.ejected_until)
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, ok: bool):
+        eject = False
+        with self._lock:
+            replica.outstanding -= 1
+            if ok:
+                replica.failures = 0
+                replica.ejected_until = 0.0
+                replica.served += 1
+            else:
+                replica.failures += 1
+                eject = replica.failures >= EJECT_AFTER_FAILURES
+        if eject:
+            self._eject(replica)
+
+    def ping(self, replica: Replica) -> Dict[str, Any]:
+        try:
+            r = requests.get(f"{replica.url}/ping", timeout=PING_TIMEOUT_S)
+            return {"ok": r.ok, "status": r.status_code, "url": f"{replica.url}/ping"}
+        except requests.exceptions.RequestException as e:
+            return {"ok": False, "error": str(e), "url": f"{replica.url}/ping"}
+
+    def check_health(self) -> List[Dict[str, Any]]:
+        """/ping every replica now; failing ones are ejected, answering ones readmitted."""
+        self.refresh()
+        results = []
+        for replica in list(self._replicas.values()):
+            res = self.ping(replica)
+            if res["ok"]:
+                with self._lock:
+                    replica.failures = 0
+                    replica.ejected_until = 0.0
+            else:
+                self._eject(replica)
+            results.append({**res, **replica.status()})
+        return results
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [r.status() for r in self._replicas.values()]
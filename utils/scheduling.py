@@ -0,0 +1,94 @@
+# utils/scheduling.py
+# Cost-aware ordering for batch analysis. Each file's cost is estimated from
+# its header probe (duration x sample rate x codec decode factor, no decode),
+# so short tracks can run first (results show up immediately) or long ones
+# first (shortest makespan). Files above a size limit go to a separate lane
+# so a 2-hour mix never holds a slot the short tracks are waiting for.
+import os, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ORDERS = ("sjf", "ljf", "fifo")
+BATCH_ORDER = os.getenv("MOODMIXR_BATCH_ORDER", "sjf").lower()
+# Cost unit: one minute of 44.1 kHz WAV. Above this a file runs in the large lane.
+LARGE_FILE_COST = float(os.getenv("MOODMIXR_LARGE_FILE_COST", "20"))
+LARGE_LANE_SLOTS = int(os.getenv("MOODMIXR_LARGE_LANE_SLOTS", "1"))
+REFERENCE_SR = 44100
+# Decode effort relative to PCM; unknown containers go through audioread
+CODEC_COST = {"wav": 1.0, "aiff": 1.0, "flac": 1.3, "mp3": 1.6, "m4a": 1.8}
+UNKNOWN_CODEC_COST = 2.0
+UNKNOWN_BITRATE_KBPS = 256  # duration guess for files the probe can't read
+MIN_COST = 0.05  # per-file overhead (upload, startup) even for tiny files
+
+
+def estimate_cost(path: str) -> float:
+    """Relative analysis cost of a file (minutes of 44.1 kHz WAV equivalent)."""
+    from agents.probe_agent import ProbeAgent
+
+    info = ProbeAgent.probe(path)
+    if info:
+        cost = (
+            info["duration_sec"]
+            / 60.0
+            * info["sample_rate"]
+            / REFERENCE_SR
+            * CODEC_COST.get(info["format"], UNKNOWN_CODEC_COST)
+        )
+    else:
+        try:
+            seconds = os.path.getsize(path) * 8 / (UNKNOWN_BITRATE_KBPS * 1000)
+        except OSError:
+            seconds = 0.0
+        cost = seconds / 60.0 * UNKNOWN_CODEC_COST
+    return max(MIN_COST, cost)
+
+
+def plan(
+    costs: Sequence[float],
+    order: str = BATCH_ORDER,
+    large_cost: float = LARGE_FILE_COST,
+) -> Tuple[List[int], List[int]]:
+    """
+    Split indices into (main lane, large lane), each in run order:
+    "sjf" cheapest first, "ljf" most expensive first, "fifo" as given.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"unknown batch order {order!r} (expected one of {ORDERS})")
+    indices = list(range(len(costs)))
+    if order != "fifo":
+        # stable: equal costs keep input order
+        indices.sort(key=lambda i: costs[i], reverse=(order == "ljf"))
+    main = [i for i in indices if costs[i] <= large_cost]
+    large = [i for i in indices if costs[i] > large_cost]
+    return main, large
+
+
+class Progress:
+    """Estimated time remaining from finished cost per second of wall time."""
+
+    def __init__(self, costs: Sequence[float]):
+        self.total = float(sum(costs))
+        self.count = len(costs)
+        self.done_cost = 0.0
+        self.done = 0
+        self.started = time.time()
+
+    def finish(self, cost: float):
+        self.done_cost += cost
+        self.done += 1
+
+    def eta(self) -> Optional[float]:
+        """Seconds left, or None until something has finished."""
+        if self.done >= self.count:
+            return 0.0
+        if self.done_cost <= 0:
+            return None
+        rate = self.done_cost / max(time.time() - self.started, 1e-6)
+        return max(0.0, (self.total - self.done_cost) / rate)
+
+    def status(self) -> Dict[str, Any]:
+        eta = self.eta()
+        return {
+            "done": self.done,
+            "total": self.count,
+            "eta_s": round(eta, 1) if eta is not None else None,
+        }
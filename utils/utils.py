@@ -3,19 +3,11 @@
 # 🧠 Purpose: Handle audio processing, mood detection, waveform rendering, transition logic, and platform sync
 # Created: 2025-07-21 | License: MIT + Karma Clause
 
-import os, json, requests, io
-import numpy as np
+# Heavy modules (librosa, plotly, mutagen, PIL, the Spotify agent) are imported
+# inside the functions that use them so importing utils stays cheap.
+import os
+import requests
 import streamlit as st
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from mutagen import File as MutagenFile
-from mutagen.flac import FLAC
-from mutagen.mp3 import MP3
-from PIL import Image
-
-from agents.spotify_api_agent import SpotifyApiAgent
 
 
 # === SECRETS ===
@@ -25,8 +17,10 @@ def get_secret(key):
 
 # === FILE + AUDIO HANDLING ===
 def load_audio(file_path):
+    from agents.audio_decoder import AudioDecoder
+
     try:
-        y, sr = librosa.load(file_path, sr=None)
+        y, sr = AudioDecoder.decode(file_path)
         return y, sr
     except Exception as e:
         print(f"[Utils] Audio load error: {e}")
@@ -35,30 +29,21 @@ def load_audio(file_path):
 
 # === ALBUM ART + METADATA ===
 def extract_album_art(audio_path):
+    from agents.metadata_agent import MetadataAgent
+
     try:
-        metadata = MutagenFile(audio_path)
-        if metadata is None:
-            return None
-        if isinstance(metadata, FLAC) and metadata.pictures:
-            return Image.open(io.BytesIO(metadata.pictures[0].data))
-        elif isinstance(metadata, MP3):
-            for tag in metadata.tags.values():
-                if tag.FrameID == "APIC":
-                    return Image.open(io.BytesIO(tag.data))
-        return None
+        return MetadataAgent.album_art(audio_path)
     except Exception as e:
         print(f"[AlbumArt] Error: {e}")
         return None
 
 
 def extract_track_metadata(audio_path):
+    from agents.metadata_agent import MetadataAgent
+
     try:
-        meta = {}
-        file = MutagenFile(audio_path, easy=True)
-        meta["artist"] = file.get("artist", ["Unknown"])[0]
-        meta["title"] = file.get("title", ["Unknown"])[0]
-        meta["album"] = file.get("album", ["Unknown"])[0]
-        return meta
+        meta = MetadataAgent.read(audio_path)
+        return {k: meta[k] for k in ("artist", "title", "album")}
     except Exception as e:
         print(f"[Metadata] Error: {e}")
         return {"artist": "Unknown", "title": "Unknown", "album": "Unknown"}
@@ -85,6 +70,8 @@ def get_bpm_animation_speed(bpm):
 
 # === WAVEFORM VISUALIZATION (Optional: move to agent later) ===
 def generate_plotly_energy_curve(tracks):
+    import plotly.graph_objects as go
+
     energies = [t["energy"] for t in tracks]
     labels = [t["filename"] for t in tracks]
     moods = [t["mood"] for t in tracks]
@@ -118,13 +105,22 @@ def generate_plotly_energy_curve(tracks):
 
 
 # === SPOTIFY ===
+_spotify_client = None
+
+
 def get_spotify_client():
-    return SpotifyApiAgent()
+    # One shared client so every call reuses the cached OAuth token
+    global _spotify_client
+    if _spotify_client is None:
+        from agents.spotify_api_agent import SpotifyApiAgent
+
+        _spotify_client = SpotifyApiAgent()
+    return _spotify_client
 
 
-def search_spotify_track(query):
+def search_spotify_track(query, limit=5, offset=0):
     spotify = get_spotify_client()
-    results = spotify.search(query)
+    results = spotify.search(query, limit=limit, offset=offset)
     tracks = results.get("tracks", {}).get("items", [])
     return [
         {
@@ -144,6 +140,11 @@ def get_spotify_audio_features(track_id):
     return spotify.get_audio_features(track_id)
 
 
+def get_spotify_audio_features_batch(track_ids):
+    spotify = get_spotify_client()
+    return spotify.get_audio_features_batch(track_ids)
+
+
 # === YOUTUBE ===
 def search_youtube_videos(query, max_results=5, api_key=None):
     if not api_key: